@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+#
+# Banc d'essai reproductible : catalogue synthétique (generator) et scénarios
+# chronométrés (scenarios). Point d'entrée : `python manage.py benchmark`.
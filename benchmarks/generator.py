@@ -0,0 +1,116 @@
+# benchmarks/generator.py
+
+import datetime
+import random
+import re
+import time
+
+from catalog.aggregates import rebuild_counts
+from catalog.cache import CATALOG_TAG, invalidate_tags
+from catalog.geo import geo_cell
+from catalog.models import Dataset, Organization, Source, Theme
+from catalog.search import rebuild_index
+from catalog.versioning import bump_catalog_version
+
+# Tailles nommées ; un nombre (« 2500 », « 250k ») est aussi accepté
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BATCH_SIZE = 5000
+
+SOURCES = ["OpenGouv", "Données Québec", "CanWin", "SLGO", "CIOOS", "Borealis", "MPO", "ISMER"]
+THEMES = [
+    "Climat", "Eau", "Océanographie", "Biodiversité", "Pêches", "Glaces", "Courants", "Marées",
+    "Qualité de l'eau", "Sédiments", "Phytoplancton", "Mammifères marins", "Bathymétrie",
+    "Météorologie", "Navigation", "Côtes", "Estuaire", "Hydrologie", "Écosystèmes", "Chimie",
+]
+WORDS = [
+    "eau", "température", "salinité", "glace", "courant", "marée", "phytoplancton", "baleine",
+    "hareng", "oxygène", "nitrates", "sédiments", "côte", "estuaire", "golfe", "Saint-Laurent",
+    "climat", "pêche", "bathymétrie", "vagues", "chlorophylle", "turbidité", "plancton", "crevette",
+]
+# Emprise des coordonnées générées : estuaire et golfe du Saint-Laurent
+LATITUDES, LONGITUDES = (45.0, 52.0), (-71.0, -56.0)
+LOCATED_RATIO = 0.7
+MAX_THEMES_PER_DATASET = 4
+
+
+def parse_scale(value):
+    """« 10k », « 100k », « 1M » ou un nombre de jeux (« 2500 », « 250k »)."""
+    value = str(value).strip().lower().replace("_", "")
+    if value in SCALES:
+        return SCALES[value]
+    match = re.fullmatch(r"(\d+)([km]?)", value)
+    if not match:
+        raise ValueError(f"Échelle invalide : {value!r} (ex. 10k, 100k, 1M, 2500)")
+    return int(match[1]) * {"": 1, "k": 1_000, "m": 1_000_000}[match[2]]
+
+
+def _sentence(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+# ==============================================================
+# 🧪 Catalogue synthétique déterministe
+# ==============================================================
+def generate_catalog(rows, seed=13, stdout=None):
+    """
+    Remplit sources, organisations, thèmes et `rows` jeux de données (thèmes
+    M2M et coordonnées compris) par insertions groupées, puis reconstruit ce
+    que les signaux tiennent d'habitude à jour : compteurs, index plein texte,
+    version du catalogue et cache. Même graine → même catalogue.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    sources = Source.objects.bulk_create(
+        Source(name=name, base_url=f"https://{name.lower().replace(' ', '-')}.example.org") for name in SOURCES
+    )
+    organizations = Organization.objects.bulk_create(
+        Organization(name=f"Organisation synthétique {i}", website=f"https://org-{i}.example.org")
+        for i in range(min(2000, max(20, rows // 500)))
+    )
+    themes = Theme.objects.bulk_create(Theme(name=name) for name in THEMES)
+    links = Dataset.themes.through
+    first_day = datetime.date(2000, 1, 1)
+
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = []
+        for i in range(offset, min(offset + BATCH_SIZE, rows)):
+            lat = lon = None
+            if rng.random() < LOCATED_RATIO:
+                lat, lon = rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)
+            batch.append(Dataset(
+                title=f"{_sentence(rng, 3).capitalize()} {i}",
+                external_id=f"synth-{i:07d}",
+                description=_sentence(rng, 25),
+                publication_date=first_day + datetime.timedelta(days=rng.randrange(9000)),
+                url=f"https://example.org/jeux/{i}",
+                source=rng.choice(sources),
+                organization=rng.choice(organizations) if rng.random() < 0.9 else None,
+                latitude=lat,
+                longitude=lon,
+                geo_cell=geo_cell(lat, lon),
+            ))
+        Dataset.objects.bulk_create(batch)
+        links.objects.bulk_create(
+            links(dataset_id=dataset.pk, theme_id=theme.pk)
+            for dataset in batch
+            for theme in rng.sample(themes, rng.randint(0, MAX_THEMES_PER_DATASET))
+        )
+        if stdout:
+            stdout.write(f"📦 {offset + len(batch):,} / {rows:,} jeux générés...")
+
+    # Insertions groupées : aucun signal, tout est reconstruit d'un coup
+    rebuild_counts()
+    rebuild_index()
+    bump_catalog_version()
+    invalidate_tags(CATALOG_TAG)
+
+    return {
+        "datasets": rows,
+        "sources": len(sources),
+        "organizations": len(organizations),
+        "themes": len(themes),
+        "theme_links": links.objects.count(),
+        "located": Dataset.objects.filter(latitude__isnull=False).count(),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,121 @@
+# benchmarks/scenarios.py
+
+import contextlib
+import io
+import time
+
+from django.test import Client
+
+from catalog.models import Source, Theme
+from harvest.ckan_harvester import harvest_standard_ckan
+from harvest.fake_ckan import FakeCKAN, make_packages
+from ogsl_core.profiling import instrument, percentile
+
+# (nom, chemin) : {source} et {theme} désignent une source et un thème du catalogue
+HTTP_SCENARIOS = [
+    ("rest:datasets", "/api/datasets/"),
+    ("rest:datasets:filtered", "/api/datasets/?source={source}&theme={theme}"),
+    ("rest:datasets:bbox", "/api/datasets/?bbox=-68,48,-66,49"),
+    ("rest:sources", "/api/sources/"),
+    ("rest:themes", "/api/themes/"),
+    ("dashboard:datasets_by_source", "/dashboard/data/datasets_by_source/"),
+    ("dashboard:datasets_by_theme", "/dashboard/datasets-by-theme/"),
+    ("dashboard:datasets_by_theme_filtered", "/dashboard/data/datasets_by_theme_filtered/{source}/"),
+    ("search", "/portal/search/?q=eau"),
+    ("search:terms", "/portal/search/?q=temperature+golfe"),
+    ("search:faceted", "/portal/search/?q=glace&source={source}"),
+    ("map", "/dashboard/map/"),
+    # Tuiles sur le golfe : grappes (z5) puis points (z9, au large de Rimouski)
+    ("map:tile:clusters", "/dashboard/map/tiles/5/10/11.json"),
+    ("map:tile:points", "/dashboard/map/tiles/9/159/176.json"),
+]
+HARVEST_SCENARIOS = ["harvest:fake_ckan", "harvest:fake_ckan:unchanged"]
+HARVEST_SOURCE = "Banc d'essai CKAN"
+SCENARIOS = [name for name, _ in HTTP_SCENARIOS] + HARVEST_SCENARIOS
+
+
+def selected(names, only=None):
+    """Scénarios dont le nom commence par l'un des préfixes `only` (tous si vide)."""
+    return [n for n in names if not only or any(n.startswith(prefix) for prefix in only)]
+
+
+def _summary(samples):
+    """Durées (ms) : min, p50, p95, max."""
+    values = sorted(samples)
+    return {
+        "min": round(values[0], 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "max": round(values[-1], 2),
+    }
+
+
+# ==============================================================
+# 🌐 Vues HTTP (client de test Django : middleware compris, sans réseau)
+# ==============================================================
+def run_http(name, path, repeat):
+    client = Client()
+    client.get(path)  # premier passage non mesuré (gabarits, connexions)
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with instrument() as timer:
+            response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{name} : HTTP {response.status_code} pour {path}")
+
+    return {
+        "path": path,
+        "runs": repeat,
+        "ms": _summary(samples),
+        "queries": timer.count,
+        "db_ms": round(timer.duration, 2),
+        "bytes": len(response.content),
+    }
+
+
+# ==============================================================
+# 🌾 Moissonneur contre un faux CKAN local
+# ==============================================================
+def run_harvest(packages):
+    """Premier moissonnage de `packages` paquets, puis second passage sans changement."""
+    results = {}
+    with FakeCKAN(make_packages(packages)) as ckan:
+        source = Source.objects.create(name=HARVEST_SOURCE, base_url=ckan.base_url)
+        for name in HARVEST_SCENARIOS:
+            started = time.perf_counter()
+            # Le moissonneur journalise chaque page : sortie écartée pendant la mesure
+            with instrument() as timer, contextlib.redirect_stdout(io.StringIO()):
+                stats = harvest_standard_ckan(source, "", packages, full=True)
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "runs": 1,
+                "ms": _summary([elapsed * 1000]),
+                "queries": timer.count,
+                "db_ms": round(timer.duration, 2),
+                "packages": packages,
+                "rows_per_s": round(packages / elapsed, 1) if elapsed else None,
+                "stats": stats,
+            }
+    return results
+
+
+def run_scenarios(repeat=5, harvest_packages=5000, only=None):
+    """Exécute les scénarios choisis sur le catalogue en place ; {nom: mesures}."""
+    ids = {
+        "source": Source.objects.order_by("pk").values_list("pk", flat=True).first(),
+        "theme": Theme.objects.order_by("pk").values_list("pk", flat=True).first(),
+    }
+    names = selected(SCENARIOS, only)
+    results = {}
+    for name, path in HTTP_SCENARIOS:
+        if name in names:
+            results[name] = run_http(name, path.format(**ids), repeat)
+    if set(HARVEST_SCENARIOS) & set(names):
+        # Catalogue existant laissé intact : le faux CKAN écrit dans sa propre source
+        harvested = run_harvest(harvest_packages)
+        results.update({name: harvested[name] for name in HARVEST_SCENARIOS if name in names})
+        Source.objects.filter(name=HARVEST_SOURCE).delete()
+    return results
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Source, Organization, Theme, Dataset
+from .models import CatalogVersion, Source, Organization, Theme, Dataset
 
 # === SOURCE ===
 @admin.register(Source)
@@ -30,7 +30,14 @@ class ThemeAdmin(admin.ModelAdmin):
 @admin.register(Dataset)
 class DatasetAdmin(admin.ModelAdmin):
     list_display = ("title", "source", "organization", "publication_date", "last_update")
-    search_fields = ("title", "description")
+    search_fields = ("title", "description", "external_id")
     list_filter = ("source", "themes", "organization")
     ordering = ("-publication_date",)
     date_hierarchy = "publication_date"
+
+
+# === VERSION DU CATALOGUE (ETag) ===
+@admin.register(CatalogVersion)
+class CatalogVersionAdmin(admin.ModelAdmin):
+    list_display = ("version", "updated_at")
+    readonly_fields = ("version", "updated_at")
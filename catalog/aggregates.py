@@ -0,0 +1,77 @@
+# catalog/aggregates.py
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from catalog.cache import DATASETS_TAG, cached, invalidate_tags
+from catalog.models import Dataset, Organization, Source, Theme
+
+# Statistiques globales du catalogue (page d'accueil, tableau de bord)
+STATS_CACHE_NAME = "catalog:stats"
+STATS_CACHE_SECONDS = 300
+
+
+# ==============================================================
+# 🧮 Compteurs dénormalisés Source.dataset_count / Theme.dataset_count
+# ==============================================================
+def _count_subquery(queryset, field):
+    """COUNT corrélé sur `field` = OuterRef("pk"), 0 si aucune ligne."""
+    counts = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def refresh_source_counts(source_ids=None):
+    """Recalcule le nombre de jeux de données des sources données (toutes si None)."""
+    sources = Source.objects.all()
+    if source_ids is not None:
+        sources = sources.filter(pk__in=set(source_ids))
+    sources.update(dataset_count=_count_subquery(Dataset.objects.all(), "source_id"))
+    # Le total de jeux de données a pu changer
+    invalidate_tags(DATASETS_TAG)
+
+
+def refresh_theme_counts(theme_ids=None):
+    """Recalcule le nombre de jeux de données des thèmes donnés (tous si None)."""
+    themes = Theme.objects.all()
+    if theme_ids is not None:
+        themes = themes.filter(pk__in=set(theme_ids))
+    themes.update(dataset_count=_count_subquery(Dataset.themes.through.objects.all(), "theme_id"))
+
+
+def rebuild_counts():
+    """Reconstruit tous les compteurs à partir des tables sources."""
+    refresh_source_counts()
+    refresh_theme_counts()
+
+
+# ==============================================================
+# 📊 Statistiques globales, servies depuis le cache
+# ==============================================================
+def _compute_stats():
+    totals = Source.objects.order_by().aggregate(
+        sources_count=Count("pk"),
+        datasets_count=Coalesce(Sum("dataset_count"), 0),
+    )
+    return {
+        "sources_count": totals["sources_count"],
+        "datasets_count": totals["datasets_count"],
+        "organizations_count": Organization.objects.count(),
+        "themes_count": Theme.objects.count(),
+    }
+
+
+def catalog_stats():
+    """
+    Nombre de sources, jeux de données, organisations et thèmes.
+
+    Le total de jeux est la somme des compteurs dénormalisés par source ;
+    le résultat est mis en cache STATS_CACHE_SECONDS et invalidé dès que
+    refresh_source_counts() recalcule un compteur.
+    """
+    return cached(STATS_CACHE_NAME, _compute_stats, (DATASETS_TAG,), STATS_CACHE_SECONDS)
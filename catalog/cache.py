@@ -0,0 +1,263 @@
+# catalog/cache.py
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+# Étiquettes d'invalidation : toute entrée dépend implicitement de CATALOG_TAG
+# (sources, organisations, thèmes) ; DATASETS_TAG couvre les agrégats sur tous
+# les jeux ; source_tag(id) les vues limitées à une source.
+CATALOG_TAG = "catalog"
+DATASETS_TAG = "datasets"
+
+# Recalcul unique (single-flight) : verrou posé par le premier processus en défaut
+LOCK_SECONDS = 30
+WAIT_INTERVAL = 0.05
+
+_MISSING = object()
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def source_tag(source_id):
+    return f"source:{source_id}"
+
+
+# ==============================================================
+# 📈 Compteurs de succès / défauts (par processus)
+# ==============================================================
+def _count(name, event):
+    with _stats_lock:
+        _stats[name][event] += 1
+
+
+def cache_stats():
+    """hits, misses et waits (attente du recalcul d'un autre) par entrée et au total."""
+    with _stats_lock:
+        entries = {name: dict(counts) for name, counts in sorted(_stats.items())}
+    totals = Counter()
+    for counts in entries.values():
+        totals.update(counts)
+    lookups = totals["hits"] + totals["misses"] + totals["waits"]
+    return {
+        "hits": totals["hits"],
+        "misses": totals["misses"],
+        "waits": totals["waits"],
+        "hit_ratio": round((totals["hits"] + totals["waits"]) / lookups, 4) if lookups else None,
+        "entries": entries,
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ==============================================================
+# 🏷️ Étiquettes : une version par étiquette, incluse dans la clé des entrées
+# ==============================================================
+def _tag_key(tag):
+    return f"catalog:tag:{tag}"
+
+
+def _tag_versions(tags):
+    keys = [_tag_key(t) for t in (CATALOG_TAG, *tags)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Version initiale unique : une étiquette évincée ne ressuscite pas d'anciennes entrées
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[k] for k in keys]
+
+
+def _entry_key(name, versions):
+    return f"catalog:cache:{name}:{'.'.join(str(v) for v in versions)}"
+
+
+def invalidate_tags(*tags):
+    """
+    Périme les entrées portant ces étiquettes. Dans une transaction,
+    l'invalidation est refaite à la validation : une lecture concurrente
+    ne peut pas garder en cache un état antérieur à l'écriture.
+    """
+    def bump():
+        for tag in tags:
+            try:
+                cache.incr(_tag_key(tag))
+            except ValueError:
+                cache.set(_tag_key(tag), time.time_ns(), None)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+# ==============================================================
+# 🧊 Valeurs en cache avec recalcul unique
+# ==============================================================
+def _lookup(name, tags):
+    """(clé, valeur ou _MISSING, verrou obtenu) : toute la lecture en un passage."""
+    key = _entry_key(name, _tag_versions(tags))
+    value = cache.get(key, _MISSING)
+    locked = value is _MISSING and cache.add(f"{key}:lock", 1, LOCK_SECONDS)
+    return key, value, locked
+
+
+def _store(key, value, timeout):
+    if value is not _MISSING:
+        cache.set(key, value, settings.CATALOG_CACHE_SECONDS if timeout is None else timeout)
+    cache.delete(f"{key}:lock")
+
+
+def _peek(key):
+    """(valeur ou _MISSING, recalcul encore en cours)"""
+    return cache.get(key, _MISSING), cache.get(f"{key}:lock") is not None
+
+
+def cached(name, compute, tags=(), timeout=None, stat_name=None):
+    """
+    Valeur de `compute()` mise en cache sous `name`, périmée par `tags`.
+    Un seul appelant recalcule une entrée absente ; les autres attendent son résultat.
+    Succès et défauts sont comptés sous `stat_name` (par défaut `name`).
+    """
+    key, value, locked = _lookup(name, tags)
+    name = stat_name or name
+    if value is not _MISSING:
+        _count(name, "hits")
+        return value
+
+    if locked:
+        _count(name, "misses")
+        try:
+            value = compute()
+        finally:
+            _store(key, value, timeout)
+        return value
+
+    # Un autre appelant recalcule : attendre sa valeur plutôt que de doubler la requête
+    deadline = time.monotonic() + LOCK_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value, pending = _peek(key)
+        if value is not _MISSING:
+            _count(name, "waits")
+            return value
+        if not pending:
+            break
+    # Verrou libéré sans valeur (erreur) ou expiré : calcul sans partage
+    _count(name, "misses")
+    return compute()
+
+
+async def acached(name, compute, tags=(), timeout=None, stat_name=None):
+    """
+    cached() pour les vues asynchrones : `compute` est une coroutine. Les
+    méthodes asynchrones du cache Django passent chacune par un fil ; la
+    lecture et l'écriture sont donc regroupées en un passage chacune.
+    """
+    key, value, locked = await sync_to_async(_lookup)(name, tags)
+    name = stat_name or name
+    if value is not _MISSING:
+        _count(name, "hits")
+        return value
+
+    if locked:
+        _count(name, "misses")
+        try:
+            value = await compute()
+        finally:
+            await sync_to_async(_store)(key, value, timeout)
+        return value
+
+    deadline = time.monotonic() + LOCK_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_INTERVAL)
+        value, pending = await sync_to_async(_peek)(key)
+        if value is not _MISSING:
+            _count(name, "waits")
+            return value
+        if not pending:
+            break
+    _count(name, "misses")
+    return await compute()
+
+
+def cached_queryset(name, queryset, tags=(), timeout=None):
+    """Lignes d'un queryset (values() de préférence), évaluées une fois par version des étiquettes."""
+    return cached(name, lambda: list(queryset), tags, timeout)
+
+
+class _Uncacheable(Exception):
+    """Réponse d'erreur d'une vue : rendue telle quelle, jamais mise en cache."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def cache_view(name, tags=(), timeout=None):
+    """
+    Réponses 200 d'une vue fonction (GET/HEAD) mises en cache par URL complète.
+    `tags` : étiquettes, ou fonction (request, *args, **kwargs) qui les retourne.
+    Une vue asynchrone partage les entrées de sa version synchrone de même `name`.
+    Les statistiques sont comptées sous `name`, pas par URL : une chaîne de
+    requête arbitraire ne crée pas de nouveau compteur.
+    """
+    def entry(request, *args, **kwargs):
+        entry_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"{name}:{path}", entry_tags
+
+    def stored(response):
+        if response.status_code != 200:
+            raise _Uncacheable(response)
+        return dict(response.items()), response.content
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def awrapped(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+
+                async def render():
+                    return stored(await view(request, *args, **kwargs))
+
+                key, entry_tags = entry(request, *args, **kwargs)
+                try:
+                    headers, content = await acached(key, render, entry_tags, timeout, stat_name=name)
+                except _Uncacheable as e:
+                    return e.response
+                return HttpResponse(content, headers=headers)
+
+            return awrapped
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            def render():
+                return stored(view(request, *args, **kwargs))
+
+            key, entry_tags = entry(request, *args, **kwargs)
+            try:
+                headers, content = cached(key, render, entry_tags, timeout, stat_name=name)
+            except _Uncacheable as e:
+                return e.response
+            return HttpResponse(content, headers=headers)
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,85 @@
+# catalog/enrich.py
+
+import random
+
+from django.utils import timezone
+
+from catalog.cache import DATASETS_TAG, invalidate_tags
+from catalog.geo import geo_cell
+from catalog.models import Dataset
+from catalog.search import fold
+from catalog.versioning import bump_catalog_version
+
+# Région par défaut des positions simulées (entre Montréal et Québec, golfe)
+SIMULATED_BOUNDS = ((45.0, 49.5), (-79.5, -65.0))
+# Dispersion autour d'une position connue, pour ne pas empiler les marqueurs
+JITTER_DEGREES = 0.05
+
+# Positions (lat, lon) des producteurs connus, cherchées dans le nom de
+# l'organisation puis de la source (minuscules sans accents) ; du plus précis au plus général
+KNOWN_LOCATIONS = [
+    ("rimouski", (48.4527, -68.5140)),       # UQAR / ISMER
+    ("manitoba", (49.8090, -97.1330)),       # CanWin, Winnipeg
+    ("canwin", (49.8090, -97.1330)),
+    ("borealis", (43.6629, -79.3957)),       # Scholars Portal, Toronto
+    ("quebec", (46.8139, -71.2080)),         # Données Québec
+    ("opengouv", (45.4215, -75.6972)),       # Gouvernement du Canada, Ottawa
+    ("canada", (45.4215, -75.6972)),
+]
+
+
+# ==============================================================
+# 📍 Enrichissement hors ligne des coordonnées
+# ==============================================================
+def locate(pk, organization, source, simulate=False):
+    """Position d'un jeu d'après son organisation ou sa source, ou None."""
+    rng = random.Random(pk)  # déterministe : relancer l'enrichissement ne déplace rien
+    for name in (organization, source):
+        folded = fold(name)
+        for keyword, (lat, lon) in KNOWN_LOCATIONS:
+            if keyword in folded:
+                return (
+                    lat + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES),
+                    lon + rng.uniform(-JITTER_DEGREES, JITTER_DEGREES),
+                )
+    if simulate:
+        (south, north), (west, east) = SIMULATED_BOUNDS
+        return rng.uniform(south, north), rng.uniform(west, east)
+    return None
+
+
+def enrich_coordinates(batch_size=1000, simulate=False):
+    """
+    Attribue des coordonnées aux jeux qui n'en ont pas, par lots
+    (bulk_update, clé geo_cell comprise). Retourne (localisés, sans position).
+    bulk_update ignore auto_now : last_update est posé explicitement pour que
+    les exports incrémentaux (`since=`) voient les nouvelles positions.
+    """
+    located = unknown = 0
+    last_pk = 0
+    pending = Dataset.objects.filter(latitude__isnull=True).order_by("pk")
+    while True:
+        rows = list(
+            pending.filter(pk__gt=last_pk)
+            .values_list("pk", "organization__name", "source__name")[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        updates = []
+        now = timezone.now()
+        for pk, organization, source in rows:
+            position = locate(pk, organization, source, simulate)
+            if position is None:
+                unknown += 1
+                continue
+            lat, lon = position
+            updates.append(Dataset(pk=pk, latitude=lat, longitude=lon, geo_cell=geo_cell(lat, lon),
+                                   last_update=now))
+        Dataset.objects.bulk_update(updates, ["latitude", "longitude", "geo_cell", "last_update"])
+        located += len(updates)
+    if located:
+        bump_catalog_version()
+        invalidate_tags(DATASETS_TAG)
+    return located, unknown
@@ -0,0 +1,183 @@
+# catalog/export.py
+
+import csv
+import importlib.util
+import io
+import json
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from catalog.models import Dataset
+
+# Lignes lues par aller-retour du curseur serveur ; thèmes résolus par lot de même taille
+EXPORT_CHUNK_SIZE = 2000
+# Parquet (colonnaire) seulement si pyarrow est installé
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_COLUMNS = [
+    "id", "external_id", "title", "description", "url", "publication_date", "last_update",
+    "source", "organization", "themes", "latitude", "longitude",
+]
+_VALUES = {
+    "source": "source__name",
+    "organization": "organization__name",
+}
+
+
+# ==============================================================
+# 📤 Lecture en flux : curseur serveur, mémoire constante
+# ==============================================================
+def export_queryset(queryset):
+    """Ordre stable (last_update, id) : le plus grand last_update reçu sert de prochain `since=`."""
+    return queryset.order_by("last_update", "id")
+
+
+def iter_rows(queryset, chunk_size=None):
+    """
+    Dicts d'export (noms de source, d'organisation et de thèmes), lus via
+    iterator(chunk_size) ; les thèmes sont joints par lot, une requête par lot.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    columns = [_VALUES.get(c, c) for c in EXPORT_COLUMNS if c != "themes"]
+    rows = export_queryset(queryset).values(*columns).iterator(chunk_size=chunk_size)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield from _with_themes(batch)
+            batch = []
+    if batch:
+        yield from _with_themes(batch)
+
+
+def _with_themes(batch):
+    themes = defaultdict(list)
+    links = Dataset.themes.through.objects.filter(dataset_id__in=[r["id"] for r in batch])
+    for dataset_id, name in links.values_list("dataset_id", "theme__name").order_by("theme__name"):
+        themes[dataset_id].append(name)
+    for row in batch:
+        yield {
+            **{c: row[_VALUES.get(c, c)] for c in EXPORT_COLUMNS if c != "themes"},
+            "themes": themes[row["id"]],
+        }
+
+
+# ==============================================================
+# 🧾 Formats
+# ==============================================================
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer écrit une ligne, on la renvoie telle quelle."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            ["|".join(row[c]) if c == "themes" else ("" if row[c] is None else row[c]) for c in EXPORT_COLUMNS]
+        )
+
+
+class _ParquetSink(io.RawIOBase):
+    """
+    Sortie en écriture seule pour ParquetWriter : accumule les octets jusqu'au
+    prochain drain(), tout en gardant la position absolue (tell) dont le pied
+    de page Parquet a besoin pour ses décalages.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.pending = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.pending)
+        self.pending.clear()
+        return data
+
+
+def parquet_chunks(rows, chunk_size=None):
+    """Un groupe de lignes Parquet par lot ; les octets sont envoyés dès qu'ils sont écrits."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("external_id", pa.string()), ("title", pa.string()),
+        ("description", pa.string()), ("url", pa.string()), ("publication_date", pa.date32()),
+        ("last_update", pa.timestamp("us", tz="UTC")), ("source", pa.string()),
+        ("organization", pa.string()), ("themes", pa.list_(pa.string())),
+        ("latitude", pa.float64()), ("longitude", pa.float64()),
+    ])
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    sink = _ParquetSink()
+
+    with pq.ParquetWriter(sink, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    # Pied de page (métadonnées) écrit à la fermeture
+    yield sink.drain()
+
+
+# ==============================================================
+# 🔀 Flux sous ASGI
+# ==============================================================
+# Morceaux de sortie produits par passage dans le fil de la requête
+ASYNC_BATCH = 64
+
+
+async def _aiter_batches(chunks):
+    """
+    Itérateur synchrone consommé par lots depuis la boucle d'événements.
+    sync_to_async (thread_sensitive) exécute chaque lot dans le fil de la
+    requête : le curseur serveur reste sur la connexion qui l'a ouvert.
+    """
+    chunks = iter(chunks)
+    next_batch = sync_to_async(lambda: list(islice(chunks, ASYNC_BATCH)))
+    while batch := await next_batch():
+        for chunk in batch:
+            yield chunk
+
+
+def streaming_content(chunks):
+    """
+    Contenu de StreamingHttpResponse : itérateur asynchrone sous ASGI
+    (settings.ASYNC_VIEWS), sinon Django lirait tout avant d'envoyer.
+    """
+    return _aiter_batches(chunks) if settings.ASYNC_VIEWS else chunks
+
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson; charset=utf-8", ndjson_lines),
+    "csv": ("text/csv; charset=utf-8", csv_lines),
+    "parquet": ("application/vnd.apache.parquet", parquet_chunks),
+}
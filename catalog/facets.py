@@ -0,0 +1,89 @@
+# catalog/facets.py
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+
+from .models import Dataset, Organization, Source, Theme
+
+# Facettes disponibles, dans l'ordre d'affichage
+FACETS = ("source", "organization", "theme", "year")
+
+
+# ==============================================================
+# 🧮 Comptes par facette, calculés en SQL en un passage
+# ==============================================================
+def facet_names(value):
+    """Facettes demandées (`?facets=source,theme` ; `all` ou vide → toutes)."""
+    names = [n.strip() for n in (value or "").split(",") if n.strip()]
+    if not names or "all" in names:
+        return list(FACETS)
+    return [n for n in FACETS if n in names]
+
+
+def _facet_selects(names):
+    """Une requête groupée par facette demandée, sur la table `matched` : (facette, valeur, libellé, effectif)."""
+    qn = connection.ops.quote_name
+    year, year_params = connection.ops.date_extract_sql("year", "m.publication_date", ())
+    year = f"CAST({year} AS integer)"
+    selects = {
+        "source": (
+            f"SELECT 'source', m.source_id, s.name, COUNT(*) FROM matched m "
+            f"JOIN {qn(Source._meta.db_table)} s ON s.id = m.source_id GROUP BY m.source_id, s.name"
+        ),
+        "organization": (
+            f"SELECT 'organization', m.organization_id, o.name, COUNT(*) FROM matched m "
+            f"JOIN {qn(Organization._meta.db_table)} o ON o.id = m.organization_id "
+            f"GROUP BY m.organization_id, o.name"
+        ),
+        "theme": (
+            f"SELECT 'theme', dt.theme_id, t.name, COUNT(*) FROM matched m "
+            f"JOIN {qn(Dataset.themes.through._meta.db_table)} dt ON dt.dataset_id = m.id "
+            f"JOIN {qn(Theme._meta.db_table)} t ON t.id = dt.theme_id GROUP BY dt.theme_id, t.name"
+        ),
+        # Libellé NULL : l'année elle-même, mise en forme à la lecture
+        "year": (
+            f"SELECT 'year', {year}, NULL, COUNT(*) FROM matched m "
+            f"WHERE m.publication_date IS NOT NULL GROUP BY {year}"
+        ),
+    }
+    params = {"year": [*year_params, *year_params]}
+    return [(selects[name], params.get(name, [])) for name in FACETS if name in names]
+
+
+def facet_counts(queryset, names=FACETS):
+    """
+    Comptes par source, organisation, thème et année des jeux de `queryset`.
+
+    Une seule requête : les jeux trouvés sont matérialisés une fois (CTE
+    `matched`, la recherche plein texte n'est donc évaluée qu'une fois),
+    puis chaque facette y est comptée par une requête groupée, réunies
+    par UNION ALL. Seules les valeurs distinctes remontent, jamais les
+    jeux eux-mêmes.
+
+    Retourne {facette: [{"value", "label", "count"}, ...]}, par effectif décroissant.
+    """
+    selects = _facet_selects(names)
+    facets = {name: [] for name in FACETS if name in names}
+    if not selects:
+        return facets
+
+    try:
+        ids, params = queryset.order_by().values("pk").query.sql_with_params()
+    except EmptyResultSet:
+        # Queryset vide par construction (none(), recherche sans terme)
+        return facets
+    sql = (
+        f"WITH matched AS MATERIALIZED ("
+        f"SELECT id, source_id, organization_id, publication_date "
+        f"FROM {connection.ops.quote_name(Dataset._meta.db_table)} WHERE id IN ({ids})) "
+        + " UNION ALL ".join(select for select, _ in selects)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, *(p for _, select_params in selects for p in select_params)])
+        rows = cursor.fetchall()
+
+    for name, value, label, count in rows:
+        facets[name].append({"value": value, "label": str(value if label is None else label), "count": count})
+    for rows in facets.values():
+        rows.sort(key=lambda row: (-row["count"], row["label"]))
+    return facets
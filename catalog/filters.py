@@ -0,0 +1,50 @@
+# catalog/filters.py
+
+import django_filters
+from django import forms
+
+from .geo import bbox_filter
+from .models import Dataset
+
+
+# ==============================================================
+# 🗺️ Filtre par emprise : ?bbox=ouest,sud,est,nord
+# ==============================================================
+class BBoxField(forms.CharField):
+    """Emprise « ouest,sud,est,nord » en degrés décimaux (ordre GeoJSON)."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        try:
+            west, south, east, north = (float(v) for v in value.split(","))
+        except ValueError:
+            raise forms.ValidationError("bbox attendu : ouest,sud,est,nord")
+        if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+            raise forms.ValidationError("bbox hors limites ou inversée")
+        return south, west, north, east
+
+
+class BBoxFilter(django_filters.Filter):
+    field_class = BBoxField
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        return bbox_filter(qs, *value)
+
+
+# ==============================================================
+# 🔖 Filtres des jeux de données (API et portail) : emprise + facettes
+# ==============================================================
+class DatasetFilter(django_filters.FilterSet):
+    bbox = BBoxFilter()
+    source = django_filters.NumberFilter(field_name="source")
+    organization = django_filters.NumberFilter(field_name="organization")
+    theme = django_filters.NumberFilter(field_name="themes")
+    year = django_filters.NumberFilter(field_name="publication_date", lookup_expr="year")
+
+    class Meta:
+        model = Dataset
+        fields = []
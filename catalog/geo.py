@@ -0,0 +1,81 @@
+# catalog/geo.py
+
+from django.db.models import Q
+
+# Bits par axe : 26 bits → cellules d'environ 0,5 m, clé sur 52 bits (BigInteger)
+GEO_BITS = 26
+# Nombre maximal de cellules utilisées pour couvrir une emprise
+MAX_COVER_CELLS = 64
+
+
+# ==============================================================
+# 🧭 Clé spatiale : code de Morton (geohash binaire) lat/lon
+# ==============================================================
+def _quantize(value, low, high, bits):
+    cell = int((value - low) / (high - low) * (1 << bits))
+    return min(max(cell, 0), (1 << bits) - 1)
+
+
+def _interleave(x, y, bits):
+    """Entrelace les bits : longitude sur les bits pairs, latitude sur les impairs."""
+    code = 0
+    for i in range(bits):
+        code |= ((x >> i) & 1) << (2 * i)
+        code |= ((y >> i) & 1) << (2 * i + 1)
+    return code
+
+
+def geo_cell(latitude, longitude):
+    """
+    Clé spatiale entière d'un point, ou None sans coordonnées.
+
+    Même découpage qu'un geohash : un préfixe de k bits par axe désigne
+    une cellule, et tous les points de cette cellule ont des clés
+    contiguës. Une emprise se traduit donc en quelques plages indexées
+    valables sur SQLite comme sur PostgreSQL (sans PostGIS).
+    """
+    if latitude is None or longitude is None:
+        return None
+    x = _quantize(longitude, -180.0, 180.0, GEO_BITS)
+    y = _quantize(latitude, -90.0, 90.0, GEO_BITS)
+    return _interleave(x, y, GEO_BITS)
+
+
+def cover_ranges(south, west, north, east):
+    """
+    Plages [début, fin] de clés couvrant l'emprise, au niveau le plus fin
+    qui reste sous MAX_COVER_CELLS cellules ; les plages contiguës sont fusionnées.
+    """
+    for level in range(GEO_BITS, 0, -1):
+        x0, x1 = (_quantize(v, -180.0, 180.0, level) for v in (west, east))
+        y0, y1 = (_quantize(v, -90.0, 90.0, level) for v in (south, north))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= MAX_COVER_CELLS:
+            break
+
+    shift = 2 * (GEO_BITS - level)
+    starts = sorted(
+        _interleave(x, y, level) << shift
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+    )
+
+    ranges = []
+    span = 1 << shift
+    for start in starts:
+        if ranges and ranges[-1][1] + 1 == start:
+            ranges[-1][1] = start + span - 1
+        else:
+            ranges.append([start, start + span - 1])
+    return [tuple(r) for r in ranges]
+
+
+def bbox_filter(queryset, south, west, north, east):
+    """Filtre un queryset de Dataset sur une emprise via l'index `geo_cell`."""
+    cells = Q()
+    for start, end in cover_ranges(south, west, north, east):
+        cells |= Q(geo_cell__range=(start, end))
+    # Les cellules débordent de l'emprise : on affine sur les coordonnées exactes
+    return queryset.filter(cells).filter(
+        latitude__gte=south, latitude__lte=north,
+        longitude__gte=west, longitude__lte=east,
+    )
@@ -0,0 +1,78 @@
+# catalog/loaders.py
+
+from collections import defaultdict
+
+from catalog.models import Dataset, Organization, Source
+
+
+# ==============================================================
+# 📦 Chargement groupé des relations (équivalent synchrone d'un DataLoader)
+# ==============================================================
+class BatchLoader:
+    """
+    Clés en attente chargées ensemble au premier `load()` : une seule requête
+    `IN` par relation et par niveau, puis mémorisées pour la durée de la requête HTTP.
+    `batch_load(keys)` retourne un dict {clé: valeur} ; une clé absente vaut `default`.
+    """
+
+    def __init__(self, batch_load, default=None):
+        self.batch_load = batch_load
+        self.default = default
+        self.cache = {}
+        self.pending = set()
+
+    def prime(self, keys):
+        """Annonce les clés d'un niveau avant la résolution de ses nœuds."""
+        self.pending.update(k for k in keys if k is not None and k not in self.cache)
+
+    def load(self, key):
+        if key is None:
+            return self.default
+        if key not in self.cache:
+            self.pending.add(key)
+            keys, self.pending = self.pending, set()
+            found = self.batch_load(list(keys))
+            for k in keys:
+                self.cache[k] = found.get(k, self.default)
+        return self.cache[key]
+
+
+def _sources(ids):
+    return Source.objects.in_bulk(ids)
+
+
+def _organizations(ids):
+    return Organization.objects.in_bulk(ids)
+
+
+def _themes(dataset_ids):
+    """Thèmes de chaque jeu (triés par nom), via la table de liaison : une requête."""
+    themes = defaultdict(list)
+    links = (
+        Dataset.themes.through.objects.filter(dataset_id__in=dataset_ids)
+        .select_related("theme")
+        .order_by("theme__name")
+    )
+    for link in links:
+        themes[link.dataset_id].append(link.theme)
+    return themes
+
+
+class CatalogLoaders:
+    def __init__(self):
+        self.sources = BatchLoader(_sources)
+        self.organizations = BatchLoader(_organizations)
+        self.themes = BatchLoader(_themes, default=())
+
+    def prime_datasets(self, datasets):
+        self.sources.prime(d.source_id for d in datasets)
+        self.organizations.prime(d.organization_id for d in datasets)
+        self.themes.prime(d.pk for d in datasets)
+
+
+def catalog_loaders(context):
+    """Chargeurs propres à une requête HTTP (portés par son contexte GraphQL)."""
+    loaders = getattr(context, "_catalog_loaders", None)
+    if loaders is None:
+        loaders = context._catalog_loaders = CatalogLoaders()
+    return loaders
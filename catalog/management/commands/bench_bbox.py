@@ -0,0 +1,76 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+
+from catalog.geo import bbox_filter, geo_cell
+from catalog.models import Dataset, Source
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Compare les requêtes par emprise : parcours complet, index lat/lon et clé geo_cell."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--size", type=float, default=1.0,
+                            help="Côté des emprises interrogées, en degrés.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(13)
+
+        # Base de test jetable : le banc d'essai ne touche jamais la vraie base
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self._populate(rng, options["rows"])
+            boxes = [self._box(rng, options["size"]) for _ in range(options["queries"])]
+
+            plain = Dataset.objects.all()
+            # Expressions calculées : aucun index utilisable → parcours de la table
+            unindexed = Dataset.objects.annotate(lat=F("latitude") * 1.0, lon=F("longitude") * 1.0)
+            strategies = [
+                ("parcours complet", lambda s, w, n, e: unindexed.filter(
+                    lat__gte=s, lat__lte=n, lon__gte=w, lon__lte=e)),
+                ("index lat/lon", lambda s, w, n, e: plain.filter(
+                    latitude__gte=s, latitude__lte=n, longitude__gte=w, longitude__lte=e)),
+                ("clé geo_cell", lambda s, w, n, e: bbox_filter(plain, s, w, n, e)),
+            ]
+            timings = {label: self._run(label, build, boxes) for label, build in strategies}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"⚡ geo_cell vs parcours : x{timings['parcours complet'] / timings['clé geo_cell']:.1f}"
+        )
+
+    def _populate(self, rng, rows):
+        source = Source.objects.create(name="Banc d'essai", base_url="https://example.org")
+        started = time.perf_counter()
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = []
+            for i in range(offset, min(offset + BATCH_SIZE, rows)):
+                lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+                batch.append(Dataset(
+                    title=f"Jeu {i}", description="", url="https://example.org", source=source,
+                    external_id=f"jeu-{i}", latitude=lat, longitude=lon, geo_cell=geo_cell(lat, lon),
+                ))
+            Dataset.objects.bulk_create(batch)
+        self.stdout.write(f"📦 {rows:,} jeux générés en {time.perf_counter() - started:.1f} s")
+
+    @staticmethod
+    def _box(rng, size):
+        south, west = rng.uniform(-80, 80 - size), rng.uniform(-180, 180 - size)
+        return south, west, south + size, west + size
+
+    def _run(self, label, build, boxes):
+        found = 0
+        started = time.perf_counter()
+        for box in boxes:
+            found += len(build(*box).values_list("id", flat=True))
+        elapsed = (time.perf_counter() - started) / len(boxes)
+        self.stdout.write(f"⏱️ {label} : {elapsed * 1000:.1f} ms/requête ({found} résultats)")
+        return elapsed
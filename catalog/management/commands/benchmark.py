@@ -0,0 +1,122 @@
+import datetime
+import json
+import os
+import platform
+import subprocess
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.generator import generate_catalog, parse_scale
+from benchmarks.scenarios import SCENARIOS, run_scenarios, selected
+
+RESULTS_DIR = Path(settings.BASE_DIR) / "benchmarks" / "results"
+
+
+def git_revision():
+    """Commit courant (suffixé « -dirty » si l'arbre est modifié), ou None hors dépôt git."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """(scénario, p50 avant, p50 après, rapport) pour les scénarios communs aux deux résultats."""
+    rows = []
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if before:
+            old, new = before["ms"]["p50"], result["ms"]["p50"]
+            rows.append((name, old, new, new / old if old else None))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un catalogue synthétique (10k, 100k, 1M jeux) dans une base jetable, "
+        "chronomètre moissonneur, API REST, tableau de bord, recherche et carte, "
+        "et écrit les résultats en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", default="10k", help="10k, 100k, 1M ou un nombre de jeux.")
+        parser.add_argument("--seed", type=int, default=13, help="Graine du catalogue synthétique.")
+        parser.add_argument("--repeat", type=int, default=5, help="Mesures par scénario HTTP.")
+        parser.add_argument("--harvest-packages", type=int, default=5000,
+                            help="Paquets servis par le faux CKAN.")
+        parser.add_argument("--only", action="append",
+                            help=f"Préfixe de scénario à exécuter (répétable) : {', '.join(SCENARIOS)}")
+        parser.add_argument("--cache", action="store_true",
+                            help="Garder le cache serveur (par défaut désactivé : on mesure les vues).")
+        parser.add_argument("--output", help="Fichier JSON (défaut : benchmarks/results/<échelle>-<commit>.json).")
+        parser.add_argument("--compare", help="Résultat JSON antérieur à comparer (p50 par scénario).")
+
+    def handle(self, *args, **options):
+        try:
+            rows = parse_scale(options["scale"])
+        except ValueError as e:
+            raise CommandError(e)
+        if options["repeat"] < 1:
+            raise CommandError("--repeat doit être au moins 1.")
+        if not selected(SCENARIOS, options["only"]):
+            raise CommandError(f"Aucun scénario ne correspond à {options['only']}.")
+
+        # Client de test hors du lanceur de tests : son hôte doit être autorisé
+        overrides = {"DEBUG": False, "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if not options["cache"]:
+            overrides["CACHES"] = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        revision = git_revision()
+        # Base de test jetable : le banc d'essai ne touche jamais la vraie base
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**overrides):
+                self.stdout.write(f"🧪 Génération de {rows:,} jeux de données (graine {options['seed']})...")
+                catalogue = generate_catalog(rows, options["seed"], self.stdout)
+                self.stdout.write(f"📦 Catalogue généré en {catalogue['seconds']:.1f} s")
+                scenarios = run_scenarios(options["repeat"], options["harvest_packages"], options["only"])
+            vendor = connection.vendor
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        result = {
+            "meta": {
+                "revision": revision,
+                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "scale": options["scale"],
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+                "cache": options["cache"],
+                "database": vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "cpus": os.cpu_count(),
+            },
+            "catalogue": catalogue,
+            "scenarios": scenarios,
+        }
+
+        output = Path(options["output"] or RESULTS_DIR / f"{options['scale'].lower()}-{revision or 'local'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+
+        self.stdout.write(f"{'scénario':38} {'p50 ms':>9} {'p95 ms':>9} {'requêtes':>9}")
+        for name, measures in scenarios.items():
+            ms = measures["ms"]
+            self.stdout.write(f"{name:38} {ms['p50']:9.1f} {ms['p95']:9.1f} {measures['queries']:9}")
+        self.stdout.write(f"💾 Résultats écrits dans {output}")
+
+        if options["compare"]:
+            previous = json.loads(Path(options["compare"]).read_text())
+            self.stdout.write(f"⚖️ Comparaison avec {previous['meta'].get('revision')} (p50) :")
+            for name, old, new, ratio in compare(previous, result):
+                trend = f"x{ratio:.2f}" if ratio is not None else "—"
+                self.stdout.write(f"  {name:36} {old:9.1f} → {new:9.1f} ms  {trend}")
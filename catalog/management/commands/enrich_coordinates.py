@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from catalog.enrich import enrich_coordinates
+
+
+class Command(BaseCommand):
+    help = "Attribue des coordonnées aux jeux de données qui n'en ont pas (à lancer après le moissonnage)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--simulate", action="store_true",
+                            help="Position aléatoire dans le Saint-Laurent si aucune position n'est connue (démo).")
+
+    def handle(self, *args, **options):
+        located, unknown = enrich_coordinates(options["batch_size"], options["simulate"])
+        self.stdout.write(f"📍 {located} jeux de données localisés, {unknown} sans position connue.")
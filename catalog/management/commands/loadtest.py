@@ -0,0 +1,84 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+# Démarrer les deux piles sur la même base, cache serveur désactivé pour
+# mesurer les vues elles-mêmes :
+#   CACHE_URL=dummy:// PORT=8000 gunicorn
+#   CACHE_URL=dummy:// SERVE_ASGI=True PORT=8001 gunicorn
+DEFAULT_PATHS = [
+    "/dashboard/data/datasets_by_source/",
+    "/dashboard/datasets-by-theme/",
+    "/dashboard/map/",
+    "/portal/search/?q=eau",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Compare requêtes/seconde et latence p99 des piles WSGI (synchrone) et ASGI (asynchrone)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sync-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--async-url", default="http://127.0.0.1:8001")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help=f"Chemin à charger (répétable). Défaut : {', '.join(DEFAULT_PATHS)}")
+        parser.add_argument("--requests", type=int, default=500, help="Requêtes par chemin et par pile.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Clients simultanés.")
+        parser.add_argument("--warmup", type=int, default=20, help="Requêtes non mesurées par chemin.")
+
+    def handle(self, *args, **options):
+        stacks = [("sync", options["sync_url"].rstrip("/")), ("async", options["async_url"].rstrip("/"))]
+        self._local = threading.local()
+
+        self.stdout.write(f"{'chemin':45} {'pile':6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+        for path in options["paths"] or DEFAULT_PATHS:
+            results = {}
+            for name, base_url in stacks:
+                url = base_url + path
+                self._load(url, options["warmup"], options["concurrency"])
+                results[name] = self._load(url, options["requests"], options["concurrency"])
+                rps, p50, p99, errors = results[name]
+                self.stdout.write(f"{path[:45]:45} {name:6} {rps:8.1f} {p50:8.1f} {p99:8.1f} {errors:8}")
+
+            (sync_rps, _, sync_p99, _), (async_rps, _, async_p99, _) = results["sync"], results["async"]
+            if sync_rps and sync_p99:
+                self.stdout.write(
+                    f"  ⚡ async / sync : débit x{async_rps / sync_rps:.2f}, p99 x{async_p99 / sync_p99:.2f}"
+                )
+
+    def _session(self):
+        # Une session (connexions gardées ouvertes) par fil client
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _get(self, url):
+        started = time.perf_counter()
+        try:
+            ok = self._session().get(url, timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    def _load(self, url, count, concurrency):
+        """(requêtes/s, p50 ms, p99 ms, erreurs) pour `count` requêtes GET."""
+        if count <= 0:
+            return 0.0, 0.0, 0.0, 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda _: self._get(url), range(count)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(ms for ms, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        return count / elapsed, percentile(latencies, 50), percentile(latencies, 99), errors
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.aggregates import rebuild_counts
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les compteurs dénormalisés de jeux de données par source et par thème."
+
+    def handle(self, *args, **options):
+        rebuild_counts()
+        self.stdout.write("✅ Compteurs par source et par thème reconstruits.")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte (après un renommage d'organisation ou de thème, par exemple)."
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(f"✅ Index de recherche reconstruit : {count} jeux de données.")
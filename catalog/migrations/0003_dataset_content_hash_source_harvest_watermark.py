@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_dataset_latitude_dataset_longitude'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='harvest_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:46
+
+from urllib.parse import urlparse
+
+from django.db import migrations, models
+
+
+def external_id_from_url(url):
+    """Déduit la clé externe d'une URL déjà moissonnée (slug CKAN/CanWin ou DOI Dataverse)."""
+    parsed = urlparse(url or "")
+    path = "/" + parsed.path.strip("/")
+    if parsed.netloc.endswith("doi.org") and path != "/":
+        return f"doi:{path[1:]}"
+    if "/dataset/" in path:
+        return path.rsplit("/dataset/", 1)[-1].split("/")[0] or None
+    return None
+
+
+def backfill_external_id(apps, schema_editor):
+    Dataset = apps.get_model("catalog", "Dataset")
+    seen = set()
+    batch = []
+    for dataset in Dataset.objects.order_by("id").only("id", "source_id", "url").iterator(chunk_size=2000):
+        key = external_id_from_url(dataset.url)
+        # En cas de doublon dans une source, seul le plus ancien reçoit la clé
+        if key is None or (dataset.source_id, key) in seen:
+            continue
+        seen.add((dataset.source_id, key))
+        dataset.external_id = key
+        batch.append(dataset)
+        if len(batch) >= 2000:
+            Dataset.objects.bulk_update(batch, ["external_id"])
+            batch = []
+    if batch:
+        Dataset.objects.bulk_update(batch, ["external_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_dataset_content_hash_source_harvest_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_external_id, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dataset',
+            constraint=models.UniqueConstraint(fields=('source', 'external_id'), name='dataset_source_external_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:54
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def compute_counts(apps, schema_editor):
+    Source = apps.get_model("catalog", "Source")
+    Theme = apps.get_model("catalog", "Theme")
+    for source in Source.objects.annotate(n=Count("datasets")):
+        Source.objects.filter(pk=source.pk).update(dataset_count=source.n)
+    for theme in Theme.objects.annotate(n=Count("dataset")):
+        Theme.objects.filter(pk=theme.pk).update(dataset_count=theme.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_dataset_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='dataset_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='theme',
+            name='dataset_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compute_counts, migrations.RunPython.noop),
+    ]
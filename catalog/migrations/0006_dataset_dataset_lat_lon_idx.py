@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_source_dataset_count_theme_dataset_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['latitude', 'longitude'], name='dataset_lat_lon_idx'),
+        ),
+    ]
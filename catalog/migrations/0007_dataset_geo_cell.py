@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+# Copie figée de catalog.geo.geo_cell au moment de la migration
+GEO_BITS = 26
+
+
+def _quantize(value, low, high, bits):
+    cell = int((value - low) / (high - low) * (1 << bits))
+    return min(max(cell, 0), (1 << bits) - 1)
+
+
+def geo_cell(latitude, longitude):
+    x = _quantize(longitude, -180.0, 180.0, GEO_BITS)
+    y = _quantize(latitude, -90.0, 90.0, GEO_BITS)
+    code = 0
+    for i in range(GEO_BITS):
+        code |= ((x >> i) & 1) << (2 * i)
+        code |= ((y >> i) & 1) << (2 * i + 1)
+    return code
+
+
+def backfill_geo_cell(apps, schema_editor):
+    Dataset = apps.get_model("catalog", "Dataset")
+    rows = Dataset.objects.exclude(latitude=None).exclude(longitude=None)
+    batch = []
+    for dataset in rows.only("id", "latitude", "longitude").iterator(chunk_size=2000):
+        dataset.geo_cell = geo_cell(dataset.latitude, dataset.longitude)
+        batch.append(dataset)
+        if len(batch) >= 2000:
+            Dataset.objects.bulk_update(batch, ["geo_cell"])
+            batch = []
+    if batch:
+        Dataset.objects.bulk_update(batch, ["geo_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_dataset_dataset_lat_lon_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='geo_cell',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+import unicodedata
+from collections import defaultdict
+
+from django.db import migrations
+
+# Copie figée du SQL de catalog.search au moment de la migration
+FTS_TABLE = "catalog_dataset_fts"
+BATCH = 500
+
+SQL = {
+    "sqlite": {
+        "create": [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, organization, themes, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        ],
+        "insert": (
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, organization, themes) "
+            "VALUES (%s, %s, %s, %s, %s)"
+        ),
+    },
+    "postgresql": {
+        "create": [
+            f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+            "dataset_id bigint PRIMARY KEY REFERENCES catalog_dataset (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_document_gin ON {FTS_TABLE} USING GIN (document)",
+        ],
+        "insert": (
+            f"INSERT INTO {FTS_TABLE} (dataset_id, document) VALUES (%s, "
+            "setweight(to_tsvector('french', %s), 'A') || "
+            "setweight(to_tsvector('french', %s), 'C') || "
+            "setweight(to_tsvector('french', %s), 'B') || "
+            "setweight(to_tsvector('french', %s), 'B'))"
+        ),
+    },
+}
+
+
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def create_search_index(apps, schema_editor):
+    sql = SQL.get(schema_editor.connection.vendor)
+    if not sql:
+        return
+    for statement in sql["create"]:
+        schema_editor.execute(statement)
+
+    Dataset = apps.get_model("catalog", "Dataset")
+    ids = list(Dataset.objects.order_by("pk").values_list("pk", flat=True))
+    for offset in range(0, len(ids), BATCH):
+        batch = ids[offset:offset + BATCH]
+        themes = defaultdict(list)
+        links = Dataset.themes.through.objects.filter(dataset_id__in=batch)
+        for dataset_id, name in links.values_list("dataset_id", "theme__name"):
+            themes[dataset_id].append(name)
+        rows = Dataset.objects.filter(pk__in=batch).values_list(
+            "id", "title", "description", "organization__name"
+        )
+        documents = [
+            (pk, fold(title), fold(description), fold(organization), fold(" ".join(themes[pk])))
+            for pk, title, description, organization in rows
+        ]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(sql["insert"], documents)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in SQL:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_dataset_geo_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_dataset_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['publication_date', 'id'], name='dataset_pubdate_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_dataset_pubdate_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['last_update', 'id'], name='dataset_last_update_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_catalogversion'),
+        # Filigranes recopiés sur HarvestCheckpoint avant la suppression du champ
+        ('harvest', '0003_checkpoint_keyset_watermark'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='source',
+            name='harvest_watermark',
+        ),
+    ]
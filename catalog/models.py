@@ -1,4 +1,25 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .geo import geo_cell
+
+
+def _merge_deleted(*results):
+    """Additionne les retours (total, {modèle: nombre}) de plusieurs delete()."""
+    per_model = {}
+    for _, counts in results:
+        for label, count in counts.items():
+            per_model[label] = per_model.get(label, 0) + count
+    return sum(total for total, _ in results), per_model
+
+
+class SourceQuerySet(models.QuerySet):
+    def delete(self):
+        # Jeux supprimés d'abord, en un lot (voir catalog.signals.delete_datasets)
+        with transaction.atomic():
+            datasets = Dataset.objects.filter(source__in=self.order_by().values("pk")).delete()
+            return _merge_deleted(datasets, super().delete())
+
 
 class Source(models.Model):
     """Plateforme de données externe (ex : OpenGouv, CanWin, etc.)"""
@@ -7,9 +28,19 @@ class Source(models.Model):
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
 
+    # Compteur dénormalisé (catalog.aggregates) lu par le tableau de bord
+    dataset_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = SourceQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            datasets = Dataset.objects.filter(source=self).delete()
+            return _merge_deleted(datasets, super().delete(*args, **kwargs))
+
 
 class Organization(models.Model):
     """Organisation ou producteur de données"""
@@ -26,13 +57,24 @@ class Theme(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
 
+    # Compteur dénormalisé (catalog.aggregates) lu par le tableau de bord
+    dataset_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
 
 
+class DatasetQuerySet(models.QuerySet):
+    def delete(self):
+        from catalog.signals import delete_datasets
+        return delete_datasets(self, super().delete)
+
+
 class Dataset(models.Model):
     """Jeu de données moissonné depuis une source CKAN"""
     title = models.CharField(max_length=255)
+    # Identifiant stable dans la source : `name` CKAN, `global_id` Dataverse, slug CanWin
+    external_id = models.CharField(max_length=255, null=True, blank=True)
     description = models.TextField()
     publication_date = models.DateField(blank=True, null=True)
     last_update = models.DateTimeField(auto_now=True)
@@ -46,8 +88,53 @@ class Dataset(models.Model):
     # 🆕 Coordonnées géographiques pour la carte Leaflet
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Clé spatiale (catalog.geo) dérivée des coordonnées, pour les requêtes par emprise
+    geo_cell = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    # Empreinte du paquet source : un paquet inchangé n'est pas réécrit
+    content_hash = models.CharField(max_length=40, blank=True, default="")
+
+    class Meta:
+        constraints = [
+            # Clé naturelle de déduplication des moissonneurs
+            models.UniqueConstraint(
+                fields=["source", "external_id"], name="dataset_source_external_id_uniq"
+            ),
+        ]
+        indexes = [
+            # Requêtes par emprise (tuiles de la carte)
+            models.Index(fields=["latitude", "longitude"], name="dataset_lat_lon_idx"),
+            # Pagination par clé (catalog.pagination)
+            models.Index(fields=["publication_date", "id"], name="dataset_pubdate_id_idx"),
+            # Exports incrémentaux `since=` (catalog.export)
+            models.Index(fields=["last_update", "id"], name="dataset_last_update_id_idx"),
+        ]
+
+    objects = DatasetQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def delete(self, *args, **kwargs):
+        # Même chemin que les suppressions groupées : pas de signal par ligne
+        deleted = Dataset.objects.filter(pk=self.pk).delete()
+        self.pk = None
+        return deleted
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geo_cell"}
+        super().save(*args, **kwargs)
 
+
+
+
+class CatalogVersion(models.Model):
+    """Version du catalogue (ligne unique), incrémentée à chaque écriture validée ; sert aux ETag"""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"v{self.version}"
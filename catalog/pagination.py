@@ -0,0 +1,180 @@
+# catalog/pagination.py
+
+import base64
+import binascii
+import datetime
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# ==============================================================
+# 🔑 Pagination par clé (publication_date, id)
+# ==============================================================
+# Ordre total : date de publication décroissante (jeux sans date à la fin),
+# puis id décroissant. Chaque page part de la clé de la précédente au lieu
+# d'un OFFSET : son coût ne dépend pas de sa profondeur et l'ajout de jeux
+# pendant un parcours ne décale ni ne duplique aucune ligne.
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def encode_cursor(direction, dataset):
+    """
+    Curseur opaque : sens (« n » suivant, « p » précédent) et clé du jeu frontière,
+    instance de Dataset ou ligne values() contenant « id » et « publication_date ».
+    """
+    if isinstance(dataset, dict):
+        date, pk = dataset["publication_date"], dataset["id"]
+    else:
+        date, pk = dataset.publication_date, dataset.pk
+    raw = f"{direction}|{date.isoformat() if date else ''}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(sens, date | None, id) ; InvalidCursor si le curseur est illisible."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        direction, date, pk = raw.split("|")
+        if direction not in ("n", "p"):
+            raise ValueError(direction)
+        return direction, datetime.date.fromisoformat(date) if date else None, int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def _phases(queryset, backward, date, pk):
+    """
+    Sous-requêtes à parcourir dans l'ordre, chacune servie par l'index
+    (publication_date, id) : d'abord les jeux datés, puis ceux sans date
+    (l'inverse en remontant). `date`/`pk` : clé exclue du curseur, ou None.
+    """
+    dated = queryset.filter(publication_date__isnull=False)
+    undated = queryset.filter(publication_date__isnull=True)
+    if not backward:
+        dated, undated = dated.order_by("-publication_date", "-id"), undated.order_by("-id")
+        if pk is None:
+            return [dated, undated]
+        if date is None:
+            return [undated.filter(id__lt=pk)]
+        # `date <= d` borne le parcours d'index ; le OU ne départage que la date d
+        return [
+            dated.filter(Q(publication_date__lt=date) | Q(id__lt=pk), publication_date__lte=date),
+            undated,
+        ]
+
+    dated, undated = dated.order_by("publication_date", "id"), undated.order_by("id")
+    if pk is None:
+        return [undated, dated]
+    if date is None:
+        return [undated.filter(id__gt=pk), dated]
+    return [dated.filter(Q(publication_date__gt=date) | Q(id__gt=pk), publication_date__gte=date)]
+
+
+def keyset_page(queryset, cursor=None, size=None, from_end=False):
+    """
+    Page de `size` jeux après (ou avant) `cursor` ; au plus une requête par phase.
+    Sans curseur, `from_end` donne les `size` derniers jeux de l'ordre.
+    """
+    size = size or settings.DATASET_PAGE_SIZE
+    backward, date, pk = from_end, None, None
+    if cursor:
+        direction, date, pk = decode_cursor(cursor)
+        backward = direction == "p"
+
+    # size + 1 lignes : la dernière indique seulement qu'il en reste
+    items = []
+    for phase in _phases(queryset, backward, date, pk):
+        items += list(phase[:size + 1 - len(items)])
+        if len(items) > size:
+            break
+    more = len(items) > size
+    items = items[:size]
+    if backward:
+        items.reverse()
+
+    # Parti d'un curseur, la page d'où l'on vient existe toujours de l'autre côté
+    has_next = bool(cursor) if backward else more
+    has_previous = more if backward else bool(cursor)
+
+    page = KeysetPage(items=items)
+    if items and has_next:
+        page.next_cursor = encode_cursor("n", items[-1])
+    if items and has_previous:
+        page.previous_cursor = encode_cursor("p", items[0])
+    return page
+
+
+def page_size_from(value, default=None):
+    """Taille de page demandée, plafonnée à DATASET_MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default or settings.DATASET_PAGE_SIZE
+    return max(1, min(size, settings.DATASET_MAX_PAGE_SIZE))
+
+
+# ==============================================================
+# 🌐 Pagination DRF : {"next", "previous", "results"}
+# ==============================================================
+class DatasetKeysetPagination(BasePagination):
+    """
+    `?cursor=` pour suivre les liens next/previous, `?page_size=` (plafonnée).
+    Pour parcourir tout le catalogue, suivre `next` jusqu'à ce qu'il soit nul.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = page_size_from(request.query_params.get(self.page_size_query_param))
+        try:
+            self.page = keyset_page(queryset, request.query_params.get(self.cursor_query_param), size)
+        except InvalidCursor:
+            raise NotFound("Curseur invalide.")
+        return self.page.items
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self._link(self.page.next_cursor),
+            "previous": self._link(self.page.previous_cursor),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,6 +1,26 @@
+from functools import partial
+
 import graphene
+from django.conf import settings
+from graphene import relay
+from graphene.relay.connection import connection_adapter, page_info_adapter
+from graphene.validation import depth_limit_validator
 from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql.language import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+)
+from graphql.validation import ValidationRule
+from graphql_relay import connection_from_array_slice
+
+from catalog.loaders import catalog_loaders
 from catalog.models import Dataset, Source, Organization, Theme
+from catalog.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
 
 
 # --- Définition des types GraphQL ---
@@ -23,6 +43,11 @@ class ThemeType(DjangoObjectType):
 
 
 class DatasetType(DjangoObjectType):
+    # Relations résolues par les chargeurs groupés : une requête IN par niveau
+    source = graphene.Field(SourceType)
+    organization = graphene.Field(OrganizationType)
+    themes = graphene.NonNull(graphene.List(graphene.NonNull(ThemeType)))
+
     class Meta:
         model = Dataset
         fields = (
@@ -37,31 +62,186 @@ class DatasetType(DjangoObjectType):
             "themes",
         )
 
+    def resolve_source(root, info):
+        return catalog_loaders(info.context).sources.load(root.source_id)
 
-# --- Définition des requêtes disponibles ---
-class Query(graphene.ObjectType):
-    all_datasets = graphene.List(DatasetType)
-    all_sources = graphene.List(SourceType)
-    all_organizations = graphene.List(OrganizationType)
-    all_themes = graphene.List(ThemeType)
+    def resolve_organization(root, info):
+        return catalog_loaders(info.context).organizations.load(root.organization_id)
+
+    def resolve_themes(root, info):
+        return catalog_loaders(info.context).themes.load(root.pk)
+
+
+# --- Connexions (pagination Relay : first/after, last/before) ---
+class DatasetConnection(relay.Connection):
+    class Meta:
+        node = DatasetType
 
-    # Requête personnalisée : filtrer les datasets par source
-    datasets_by_source = graphene.List(DatasetType, source_id=graphene.Int(required=True))
 
-    def resolve_all_datasets(root, info):
-        return Dataset.objects.all()
+class SourceConnection(relay.Connection):
+    class Meta:
+        node = SourceType
+
 
-    def resolve_all_sources(root, info):
-        return Source.objects.all()
+class OrganizationConnection(relay.Connection):
+    class Meta:
+        node = OrganizationType
 
-    def resolve_all_organizations(root, info):
-        return Organization.objects.all()
 
-    def resolve_all_themes(root, info):
-        return Theme.objects.all()
+class ThemeConnection(relay.Connection):
+    class Meta:
+        node = ThemeType
+
+
+def page_size(value):
+    """Taille demandée (first/last), plafonnée à GRAPHQL_MAX_PAGE_SIZE."""
+    if value is None:
+        return settings.DATASET_PAGE_SIZE
+    return max(1, min(value, settings.GRAPHQL_MAX_PAGE_SIZE))
+
+
+def _keyset_cursor(direction, cursor):
+    """Curseur d'arête relu dans le sens voulu (after → suivant, before → précédent)."""
+    _, date, pk = decode_cursor(cursor)
+    return encode_cursor(direction, {"publication_date": date, "id": pk})
+
+
+def dataset_connection(info, queryset, first=None, after=None, last=None, before=None):
+    """
+    Page de jeux par clé (publication_date, id), comme l'API REST : le coût ne
+    dépend pas de la profondeur. Les relations de la page sont annoncées aux
+    chargeurs avant la résolution des nœuds.
+    """
+    try:
+        if last is not None or before:
+            # Sans `before`, on remonte depuis la fin de l'ordre
+            cursor = _keyset_cursor("p", before) if before else None
+            page = keyset_page(queryset, cursor, page_size(last), from_end=True)
+        else:
+            cursor = _keyset_cursor("n", after) if after else None
+            page = keyset_page(queryset, cursor, page_size(first))
+    except InvalidCursor:
+        raise GraphQLError("Curseur invalide.")
+
+    catalog_loaders(info.context).prime_datasets(page.items)
+    edges = [DatasetConnection.Edge(node=d, cursor=encode_cursor("n", d)) for d in page.items]
+    return DatasetConnection(
+        edges=edges,
+        page_info=relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_next_page=page.has_next,
+            has_previous_page=page.has_previous,
+        ),
+    )
+
+
+def slice_connection(connection_type, queryset, **args):
+    """Tables de référence (peu volumineuses) : COUNT puis LIMIT/OFFSET."""
+    if args.get("last") is not None:
+        args["last"] = page_size(args["last"])
+    else:
+        args["first"] = page_size(args.get("first"))
+    count = queryset.count()
+    return connection_from_array_slice(
+        queryset.order_by("name", "id"),
+        args,
+        array_length=count,
+        array_slice_length=count,
+        connection_type=partial(connection_adapter, connection_type),
+        edge_type=connection_type.Edge,
+        page_info_type=page_info_adapter,
+    )
+
 
-    def resolve_datasets_by_source(root, info, source_id):
-        return Dataset.objects.filter(source_id=source_id)
+# --- Définition des requêtes disponibles ---
+class Query(graphene.ObjectType):
+    all_datasets = relay.ConnectionField(DatasetConnection)
+    all_sources = relay.ConnectionField(SourceConnection)
+    all_organizations = relay.ConnectionField(OrganizationConnection)
+    all_themes = relay.ConnectionField(ThemeConnection)
+
+    # Requête personnalisée : filtrer les datasets par source
+    datasets_by_source = relay.ConnectionField(DatasetConnection, source_id=graphene.Int(required=True))
+
+    def resolve_all_datasets(root, info, **args):
+        return dataset_connection(info, Dataset.objects.all(), **args)
+
+    def resolve_all_sources(root, info, **args):
+        return slice_connection(SourceConnection, Source.objects.all(), **args)
+
+    def resolve_all_organizations(root, info, **args):
+        return slice_connection(OrganizationConnection, Organization.objects.all(), **args)
+
+    def resolve_all_themes(root, info, **args):
+        return slice_connection(ThemeConnection, Theme.objects.all(), **args)
+
+    def resolve_datasets_by_source(root, info, source_id, **args):
+        return dataset_connection(info, Dataset.objects.filter(source_id=source_id), **args)
+
+
+# --- Limites de coût des requêtes ---
+def _requested_size(field):
+    """first/last d'un champ connexion ; une variable compte au maximum autorisé."""
+    for argument in field.arguments or ():
+        if argument.name.value in ("first", "last"):
+            if isinstance(argument.value, IntValueNode):
+                return page_size(int(argument.value.value))
+            return settings.GRAPHQL_MAX_PAGE_SIZE
+    return settings.DATASET_PAGE_SIZE
+
+
+def query_complexity(selection_set, fragments, multiplier=1, size=1, seen=frozenset()):
+    """
+    Nombre estimé de valeurs résolues : chaque champ compte une fois par nœud
+    parent, et les champs sous `edges` une fois par élément de la page demandée.
+    """
+    cost = 0
+    for selection in selection_set.selections if selection_set else ():
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if name.startswith("__"):
+                continue  # introspection (GraphiQL)
+            count = multiplier * size if name == "edges" else multiplier
+            cost += count
+            cost += query_complexity(
+                selection.selection_set, fragments, count, _requested_size(selection), seen,
+            )
+        elif isinstance(selection, InlineFragmentNode):
+            cost += query_complexity(selection.selection_set, fragments, multiplier, size, seen)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            if name in fragments and name not in seen:
+                cost += query_complexity(
+                    fragments[name].selection_set, fragments, multiplier, size, seen | {name},
+                )
+    return cost
+
+
+def complexity_limit_validator(max_complexity):
+    class ComplexityLimitValidator(ValidationRule):
+        def __init__(self, context):
+            super().__init__(context)
+            definitions = context.document.definitions
+            fragments = {d.name.value: d for d in definitions if isinstance(d, FragmentDefinitionNode)}
+            for definition in definitions:
+                if not isinstance(definition, OperationDefinitionNode):
+                    continue
+                cost = query_complexity(definition.selection_set, fragments)
+                if cost > max_complexity:
+                    self.report_error(GraphQLError(
+                        f"Requête trop coûteuse : complexité estimée {cost}, maximum {max_complexity}.",
+                        definition,
+                    ))
+
+    return ComplexityLimitValidator
+
+
+def validation_rules():
+    return (
+        depth_limit_validator(max_depth=settings.GRAPHQL_MAX_DEPTH),
+        complexity_limit_validator(settings.GRAPHQL_MAX_COMPLEXITY),
+    )
 
 
 # --- Création du schéma global ---
@@ -0,0 +1,264 @@
+# catalog/search.py
+
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from catalog.models import Dataset
+
+# Index inversé hors ORM : table virtuelle FTS5 (SQLite) ou tsvector + GIN (PostgreSQL)
+FTS_TABLE = "catalog_dataset_fts"
+INDEX_BATCH = 500
+
+# Poids des colonnes : titre, description, organisation, thèmes
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+
+
+# ==============================================================
+# 🔤 Normalisation : minuscules sans accents (« Écologie » → « ecologie »)
+# ==============================================================
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def query_terms(query):
+    """Mots de la requête, normalisés ; la ponctuation est ignorée."""
+    return re.findall(r"\w+", fold(query))
+
+
+def document(pk, title, description, organization, themes):
+    """Ligne d'index : (id, titre, description, organisation, thèmes) normalisés."""
+    return pk, fold(title), fold(description), fold(organization), fold(" ".join(themes))
+
+
+def build_documents(dataset_model, ids):
+    """Documents d'index des jeux `ids`, lus en base (deux requêtes)."""
+    themes = defaultdict(list)
+    links = dataset_model.themes.through.objects.filter(dataset_id__in=ids)
+    for dataset_id, name in links.values_list("dataset_id", "theme__name"):
+        themes[dataset_id].append(name)
+
+    rows = dataset_model.objects.filter(pk__in=ids).values_list(
+        "id", "title", "description", "organization__name"
+    )
+    return [
+        document(pk, title, description, organization, themes[pk])
+        for pk, title, description, organization in rows
+    ]
+
+
+# ==============================================================
+# 🗄️ SQL par moteur
+# ==============================================================
+def _sql(vendor):
+    if vendor == "sqlite":
+        return {
+            "create": [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "title, description, organization, themes, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            ],
+            "drop": [f"DROP TABLE IF EXISTS {FTS_TABLE}"],
+            "delete": f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({{}})",
+            "insert": (
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description, organization, themes) "
+                "VALUES (%s, %s, %s, %s, %s)"
+            ),
+            "key": "rowid",
+            # « +rowid » : le filtre IN n'est pas confié à FTS5, qui relancerait
+            # la sous-requête pour chaque correspondance ; elle est évaluée une fois
+            "filter_key": "+rowid",
+            "match": f"{FTS_TABLE} MATCH %s",
+            # bm25() est négatif : le plus petit est le plus pertinent
+            "rank": f"bm25({FTS_TABLE}, {', '.join(map(str, SQLITE_WEIGHTS))})",
+            "rank_uses_match": False,
+        }
+    if vendor == "postgresql":
+        return {
+            "create": [
+                f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+                "dataset_id bigint PRIMARY KEY REFERENCES catalog_dataset (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)",
+                f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_document_gin ON {FTS_TABLE} USING GIN (document)",
+            ],
+            "drop": [f"DROP TABLE IF EXISTS {FTS_TABLE}"],
+            "delete": f"DELETE FROM {FTS_TABLE} WHERE dataset_id IN ({{}})",
+            # Titre (A) > organisation et thèmes (B) > description (C)
+            "insert": (
+                f"INSERT INTO {FTS_TABLE} (dataset_id, document) VALUES (%s, "
+                "setweight(to_tsvector('french', %s), 'A') || "
+                "setweight(to_tsvector('french', %s), 'C') || "
+                "setweight(to_tsvector('french', %s), 'B') || "
+                "setweight(to_tsvector('french', %s), 'B'))"
+            ),
+            "key": "dataset_id",
+            "filter_key": "dataset_id",
+            "match": "document @@ to_tsquery('french', %s)",
+            # ts_rank_cd normalisé par la longueur (32), équivalent PostgreSQL de BM25
+            "rank": "ts_rank_cd(document, to_tsquery('french', %s), 32) DESC",
+            "rank_uses_match": True,
+        }
+    return None
+
+
+def _match_expression(vendor, terms):
+    """Tous les mots doivent apparaître, chacun en préfixe (pluriels, dérivés)."""
+    if vendor == "sqlite":
+        return " ".join(f'"{term}"*' for term in terms)
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+# ==============================================================
+# 🛠️ Maintenance de l'index
+# ==============================================================
+def create_index(schema_editor):
+    sql = _sql(schema_editor.connection.vendor)
+    for statement in sql["create"] if sql else []:
+        schema_editor.execute(statement)
+
+
+def drop_index(schema_editor):
+    sql = _sql(schema_editor.connection.vendor)
+    for statement in sql["drop"] if sql else []:
+        schema_editor.execute(statement)
+
+
+def write_documents(documents):
+    """Remplace les entrées d'index des documents fournis (voir document())."""
+    sql = _sql(connection.vendor)
+    if not sql or not documents:
+        return
+    ids = [doc[0] for doc in documents]
+    with connection.cursor() as cursor:
+        cursor.execute(sql["delete"].format(", ".join(["%s"] * len(ids))), ids)
+        cursor.executemany(sql["insert"], documents)
+
+
+def index_datasets(ids, dataset_model=Dataset):
+    """(Ré)indexe les jeux `ids` à partir de la base ; appelé par les signaux."""
+    ids = list(ids)
+    if not _sql(connection.vendor):
+        return
+    for offset in range(0, len(ids), INDEX_BATCH):
+        write_documents(build_documents(dataset_model, ids[offset:offset + INDEX_BATCH]))
+
+
+def unindex_queryset(queryset):
+    """Retire de l'index les jeux d'un queryset en une requête (à appeler avant de les supprimer)."""
+    sql = _sql(connection.vendor)
+    if not sql:
+        return
+    subquery, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql["delete"].format(subquery), params)
+
+
+def rebuild_index(dataset_model=Dataset):
+    """Vide puis reconstruit tout l'index ; retourne le nombre de jeux indexés."""
+    sql = _sql(connection.vendor)
+    if not sql:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    ids = list(dataset_model.objects.order_by("pk").values_list("pk", flat=True))
+    index_datasets(ids, dataset_model)
+    return len(ids)
+
+
+# ==============================================================
+# 🔍 Recherche classée
+# ==============================================================
+class SearchResults:
+    """
+    Résultats classés par pertinence pour `query`, éventuellement restreints
+    aux jeux d'un `queryset` filtré (facettes, voir catalog.facets).
+
+    Compatible avec django.core.paginator.Paginator : count() interroge
+    l'index, et une tranche charge uniquement les jeux de la page, dans
+    l'ordre du classement.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.terms = query_terms(query)
+        self.vendor = connection.vendor
+        self.sql = _sql(self.vendor)
+        # Sans filtre, inutile de restreindre l'index par une sous-requête
+        self.queryset = queryset if queryset is not None and queryset.query.has_filters() else None
+        self._count = None
+
+    def _fallback(self):
+        # Moteur sans index plein texte : recherche simple sur le titre
+        qs = Dataset.objects.all() if self.queryset is None else self.queryset
+        qs = qs.select_related("source").order_by("-publication_date", "pk")
+        for term in self.terms:
+            qs = qs.filter(title__icontains=term)
+        return qs
+
+    def _where(self):
+        """Clause WHERE sur l'index et ses paramètres."""
+        where, params = self.sql["match"], [_match_expression(self.vendor, self.terms)]
+        if self.queryset is not None:
+            subquery, sub_params = self.queryset.values("pk").query.sql_with_params()
+            where += f" AND {self.sql['filter_key']} IN ({subquery})"
+            params += list(sub_params)
+        return where, params
+
+    def matches(self):
+        """Queryset non ordonné de tous les jeux trouvés (pour les facettes)."""
+        if not self.terms:
+            return Dataset.objects.none()
+        if not self.sql:
+            return self._fallback().order_by()
+        where, params = self._where()
+        ids = RawSQL(f"SELECT {self.sql['key']} FROM {FTS_TABLE} WHERE {where}", params)
+        return Dataset.objects.filter(pk__in=ids)
+
+    def count(self):
+        if self._count is None:
+            if not self.terms:
+                self._count = 0
+            elif not self.sql:
+                self._count = self._fallback().count()
+            else:
+                where, params = self._where()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {where}", params)
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        if not self.terms:
+            return []
+        if not self.sql:
+            return list(self._fallback()[key])
+
+        where, params = self._where()
+        if self.sql["rank_uses_match"]:
+            params.append(params[0])
+        limit = -1 if stop is None and self.vendor == "sqlite" else (None if stop is None else stop - start)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {self.sql['key']} FROM {FTS_TABLE} WHERE {where} "
+                f"ORDER BY {self.sql['rank']}, {self.sql['key']} LIMIT %s OFFSET %s",
+                [*params, limit, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = Dataset.objects.select_related("source").in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+
+def search(query, queryset=None):
+    """Recherche plein texte (titre, description, organisation, thèmes)."""
+    return SearchResults(query, queryset)
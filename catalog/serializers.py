@@ -27,4 +27,71 @@ class DatasetSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Dataset
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# ==============================================================
+# ⚡ Représentation compacte des listes (chemin rapide values())
+# ==============================================================
+class DatasetListSerializer(serializers.Serializer):
+    """
+    Jeu de données en liste, sérialisé depuis des lignes `values()` : aucune
+    instance de modèle n'est créée. `fields` restreint les champs rendus,
+    `expand` remplace les ids de source, d'organisation et de thèmes par
+    {"id", "name"}. Les thèmes sont joints aux lignes par la vue (une requête).
+    """
+    DEFAULT_FIELDS = ("id", "title", "url", "publication_date", "source", "organization", "themes")
+    EXPANDABLE = ("source", "organization", "themes")
+
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    url = serializers.URLField()
+    publication_date = serializers.DateField()
+    source = serializers.SerializerMethodField()
+    organization = serializers.SerializerMethodField()
+    themes = serializers.SerializerMethodField()
+    # Champs facultatifs, rendus seulement s'ils sont demandés par `fields`
+    description = serializers.CharField()
+    external_id = serializers.CharField()
+    last_update = serializers.DateTimeField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expand = set(expand)
+        for name in set(self.fields) - set(fields or self.DEFAULT_FIELDS):
+            self.fields.pop(name)
+
+    @classmethod
+    def available_fields(cls):
+        return list(cls._declared_fields)
+
+    @classmethod
+    def columns(cls, fields=None, expand=()):
+        """Colonnes values() nécessaires ; id et publication_date servent aussi au curseur."""
+        columns = {"id", "publication_date"}
+        for name in fields or cls.DEFAULT_FIELDS:
+            if name in ("source", "organization"):
+                columns.add(f"{name}_id")
+                if name in expand:
+                    columns.add(f"{name}__name")
+            elif name != "themes":
+                columns.add(name)
+        return sorted(columns)
+
+    def _related(self, row, name):
+        pk = row[f"{name}_id"]
+        if name in self.expand and pk is not None:
+            return {"id": pk, "name": row[f"{name}__name"]}
+        return pk
+
+    def get_source(self, row):
+        return self._related(row, "source")
+
+    def get_organization(self, row):
+        return self._related(row, "organization")
+
+    def get_themes(self, row):
+        if "themes" in self.expand:
+            return [{"id": pk, "name": name} for pk, name in row["themes"]]
+        return [pk for pk, _ in row["themes"]]
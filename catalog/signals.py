@@ -0,0 +1,115 @@
+# catalog/signals.py
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.aggregates import refresh_source_counts, refresh_theme_counts
+from catalog.cache import CATALOG_TAG, DATASETS_TAG, invalidate_tags, source_tag
+from catalog.models import Dataset, Organization, Source, Theme
+from catalog.search import index_datasets, unindex_queryset
+from catalog.versioning import bump_catalog_version
+
+
+# ==============================================================
+# 🔔 Maintien des compteurs lors des écritures ORM unitaires
+# (les écritures groupées de harvest.ingest les rafraîchissent elles-mêmes)
+# ==============================================================
+@receiver(pre_save, sender=Dataset)
+def remember_previous_source(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_source_id = (
+        Dataset.objects.filter(pk=instance.pk).values_list("source_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Dataset)
+def dataset_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_source_id", None)
+    if created or (previous is not None and previous != instance.source_id):
+        refresh_source_counts([instance.source_id, previous] if previous else [instance.source_id])
+
+
+@receiver(m2m_changed, sender=Dataset.themes.through)
+def dataset_themes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        instance._cleared_theme_ids = list(instance.themes.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        refresh_theme_counts([instance.pk] if reverse else pk_set)
+    elif action == "post_clear":
+        refresh_theme_counts([instance.pk] if reverse else getattr(instance, "_cleared_theme_ids", []))
+
+
+# ==============================================================
+# 🔍 Index plein texte (catalog.search) pour les écritures unitaires
+# ==============================================================
+@receiver(post_save, sender=Dataset)
+def reindex_saved_dataset(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_datasets([instance.pk])
+
+
+@receiver(m2m_changed, sender=Dataset.themes.through)
+def reindex_dataset_themes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_dataset_ids = list(instance.dataset_set.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        index_datasets(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        index_datasets(getattr(instance, "_cleared_dataset_ids", []) if reverse else [instance.pk])
+
+
+# ==============================================================
+# 🏷️ Version du catalogue (ETag) et étiquettes du cache serveur :
+# toute écriture ORM unitaire les fait avancer
+# ==============================================================
+def catalog_changed(sender, instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    bump_catalog_version()
+    if isinstance(instance, Dataset):
+        previous = getattr(instance, "_previous_source_id", None)
+        sources = {instance.source_id, previous} - {None}
+        invalidate_tags(DATASETS_TAG, *(source_tag(s) for s in sources))
+    else:
+        # Source, organisation ou thème : noms repris par toutes les entrées
+        invalidate_tags(CATALOG_TAG)
+
+
+for model in (Dataset, Source, Organization, Theme):
+    post_save.connect(catalog_changed, sender=model, dispatch_uid=f"catalog_version_save_{model.__name__}")
+    # Suppressions de jeux : voir delete_datasets
+    if model is not Dataset:
+        post_delete.connect(catalog_changed, sender=model, dispatch_uid=f"catalog_version_delete_{model.__name__}")
+m2m_changed.connect(catalog_changed, sender=Dataset.themes.through, dispatch_uid="catalog_version_themes")
+
+
+# ==============================================================
+# 🗑️ Suppressions de jeux de données : une mise à jour par lot
+# ==============================================================
+# Aucun récepteur pre/post_delete sur Dataset : Django peut alors supprimer
+# les lignes et leurs liens de thèmes par lots (y compris en cascade depuis
+# une source) au lieu de les traiter une à une.
+def delete_datasets(queryset, delete):
+    """
+    Supprime les jeux de `queryset` avec `delete` (QuerySet.delete d'origine),
+    puis recalcule compteurs, index et version une seule fois pour le lot.
+    Appelé par Dataset.delete(), les querysets de jeux et les suppressions de sources.
+    """
+    with transaction.atomic():
+        source_ids = set(queryset.order_by().values_list("source_id", flat=True).distinct())
+        theme_ids = set(
+            Dataset.themes.through.objects.filter(dataset__in=queryset.order_by().values("pk"))
+            .values_list("theme_id", flat=True).distinct()
+        )
+        unindex_queryset(queryset)
+        deleted = delete()
+        if deleted[0]:
+            refresh_source_counts(source_ids)
+            refresh_theme_counts(theme_ids)
+            bump_catalog_version()
+            invalidate_tags(DATASETS_TAG, *(source_tag(s) for s in source_ids))
+    return deleted
@@ -1,3 +1,875 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import random
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import parse, validate
+from rest_framework.test import APIClient
+
+from benchmarks.generator import generate_catalog, parse_scale
+from benchmarks.scenarios import HARVEST_SOURCE, run_scenarios
+from catalog.aggregates import catalog_stats
+from catalog.cache import cache_stats, cache_view, cached, invalidate_tags, reset_cache_stats, source_tag
+from catalog.enrich import enrich_coordinates
+from catalog.export import PARQUET_AVAILABLE
+from catalog.facets import FACETS, facet_counts
+from catalog.geo import cover_ranges, geo_cell
+from catalog.management.commands.benchmark import compare
+from catalog.models import Dataset, Organization, Source, Theme
+from catalog.pagination import keyset_page
+from catalog.schema import schema, validation_rules
+from catalog.search import search
+from catalog.serializers import DatasetListSerializer
+from catalog.versioning import catalog_version
+from harvest.ingest import BulkIngestor
+from ogsl_core import profiling
+from ogsl_core.middleware import ProfilingMiddleware
+
+
+class DatasetCountTests(TestCase):
+    def setUp(self):
+        self.opengouv = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.canwin = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        self.climat = Theme.objects.create(name="Climat")
+        self.eau = Theme.objects.create(name="Eau")
+
+    def _dataset(self, source, title="Jeu"):
+        return Dataset.objects.create(title=title, description="", url="https://x", source=source)
+
+    def _counts(self):
+        return (
+            dict(Source.objects.values_list("name", "dataset_count")),
+            dict(Theme.objects.values_list("name", "dataset_count")),
+        )
+
+    def test_signals_keep_counts_in_sync(self):
+        dataset = self._dataset(self.opengouv)
+        dataset.themes.add(self.climat, self.eau)
+        self.eau.dataset_set.add(self._dataset(self.opengouv, "Autre"))
+        self.assertEqual(self._counts(), ({"OpenGouv": 2, "CanWin": 0}, {"Climat": 1, "Eau": 2}))
+
+        dataset.source = self.canwin
+        dataset.save()
+        dataset.themes.remove(self.climat)
+        self.assertEqual(self._counts(), ({"OpenGouv": 1, "CanWin": 1}, {"Climat": 0, "Eau": 2}))
+
+        dataset.delete()
+        self.assertEqual(self._counts(), ({"OpenGouv": 1, "CanWin": 0}, {"Climat": 0, "Eau": 1}))
+
+    def test_rebuild_command_recomputes_from_scratch(self):
+        self._dataset(self.opengouv).themes.add(self.eau)
+        Source.objects.update(dataset_count=99)
+        Theme.objects.update(dataset_count=99)
+
+        call_command("rebuild_counts", stdout=open("/dev/null", "w"))
+
+        self.assertEqual(self._counts(), ({"OpenGouv": 1, "CanWin": 0}, {"Climat": 0, "Eau": 1}))
+
+
+    def test_source_delete_does_not_cost_queries_per_dataset(self):
+        for source, count in ((self.opengouv, 20), (self.canwin, 500)):
+            BulkIngestor(source).write_page([
+                {"external_id": f"{source.name}-{i}", "title": f"Jeu {source.name} {i}", "description": "",
+                 "url": "https://x", "publication_date": None, "themes": ["Climat", "Eau"]}
+                for i in range(count)
+            ])
+
+        with CaptureQueriesContext(connection) as small:
+            self.opengouv.delete()
+        self.assertEqual(self._counts(), ({"CanWin": 500}, {"Climat": 500, "Eau": 500}))
+        with CaptureQueriesContext(connection) as large:
+            Source.objects.filter(pk=self.canwin.pk).delete()
+
+        # Lignes supprimées par lots de 100 : ni requête par jeu, ni entrée d'index orpheline
+        self.assertLess(len(small), 20)
+        self.assertLessEqual(len(large), len(small) + 500 // 100)
+        self.assertEqual(self._counts(), ({}, {"Climat": 0, "Eau": 0}))
+        self.assertEqual(search("jeu").count(), 0)
+
+
+class GeoCellTests(SimpleTestCase):
+    def test_cover_ranges_contain_every_point_of_the_bbox(self):
+        rng = random.Random(13)
+        for _ in range(50):
+            south, north = sorted(rng.uniform(-90, 90) for _ in range(2))
+            west, east = sorted(rng.uniform(-180, 180) for _ in range(2))
+            ranges = cover_ranges(south, west, north, east)
+            for _ in range(20):
+                cell = geo_cell(rng.uniform(south, north), rng.uniform(west, east))
+                self.assertTrue(any(lo <= cell <= hi for lo, hi in ranges))
+
+    def test_small_bbox_uses_few_ranges(self):
+        # Golfe du Saint-Laurent
+        self.assertLessEqual(len(cover_ranges(45.0, -70.0, 52.0, -56.0)), 64)
+
+    def test_missing_coordinates_have_no_cell(self):
+        self.assertIsNone(geo_cell(None, -68.5))
+
+
+class BBoxFilterTests(TestCase):
+    def setUp(self):
+        source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        for title, lat, lon in [
+            ("Rimouski", 48.45, -68.52),
+            ("Gaspé", 48.83, -64.48),
+            ("Halifax", 44.65, -63.57),
+            ("Sans position", None, None),
+        ]:
+            Dataset.objects.create(title=title, description="", url="https://x", source=source,
+                                   latitude=lat, longitude=lon)
+        self.client = APIClient()
+
+    def _titles(self, bbox):
+        response = self.client.get("/api/datasets/", {"bbox": bbox})
+        self.assertEqual(response.status_code, 200)
+        return sorted(d["title"] for d in response.json()["results"])
+
+    def test_save_maintains_spatial_key(self):
+        dataset = Dataset.objects.get(title="Rimouski")
+        self.assertEqual(dataset.geo_cell, geo_cell(48.45, -68.52))
+
+        dataset.latitude, dataset.longitude = 44.65, -63.57
+        dataset.save(update_fields=["latitude", "longitude"])
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.geo_cell, geo_cell(44.65, -63.57))
+
+    def test_bbox_returns_only_datasets_inside(self):
+        self.assertEqual(self._titles("-70,48,-64,49"), ["Gaspé", "Rimouski"])
+        self.assertEqual(self._titles("-64,44,-63,45"), ["Halifax"])
+        self.assertEqual(len(self._titles("")), 4)
+
+    def test_invalid_bbox_is_rejected(self):
+        for bbox in ["1,2,3", "a,b,c,d", "-60,48,-70,49"]:
+            self.assertEqual(self.client.get("/api/datasets/", {"bbox": bbox}).status_code, 400)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.uqar = Organization.objects.create(name="Université du Québec à Rimouski")
+        self.climat = Theme.objects.create(name="Changements climatiques")
+
+    def _dataset(self, title, description="", **kwargs):
+        return Dataset.objects.create(title=title, description=description, url="https://x",
+                                      source=self.source, **kwargs)
+
+    def _titles(self, query):
+        return [d.title for d in search(query)[:50]]
+
+    def test_accents_and_case_are_folded(self):
+        self._dataset("Écologie des marées")
+        self.assertEqual(self._titles("ECOLOGIE maree"), ["Écologie des marées"])
+
+    def test_title_matches_rank_above_description_matches(self):
+        self._dataset("Courants de surface", "Mesures de température de l'eau du golfe")
+        self._dataset("Température de l'eau", "Relevés horaires")
+        self.assertEqual(self._titles("température"), ["Température de l'eau", "Courants de surface"])
+
+    def test_organization_and_theme_names_are_searchable(self):
+        dataset = self._dataset("Bouées océanographiques", organization=self.uqar)
+        self.assertEqual(self._titles("rimouski"), ["Bouées océanographiques"])
+
+        self.assertEqual(self._titles("climatiques"), [])
+        dataset.themes.add(self.climat)
+        self.assertEqual(self._titles("climatiques"), ["Bouées océanographiques"])
+
+        dataset.delete()
+        self.assertEqual(self._titles("bouees"), [])
+
+    def test_results_paginate_with_a_total_count(self):
+        for i in range(25):
+            self._dataset(f"Glaces de mer {i}")
+        page = Paginator(search("glaces"), 10).get_page(3)
+        self.assertEqual((page.paginator.count, len(page.object_list)), (25, 5))
+        self.assertEqual(search("").count(), 0)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "compteur d'instructions propre à SQLite")
+class FilteredSearchScalingTests(TestCase):
+    def _vm_steps(self, results):
+        """Travail de SQLite (centaines d'instructions de sa VM) pour compter et paginer : indépendant de l'horloge."""
+        steps = 0
+
+        def tick():
+            nonlocal steps
+            steps += 1
+
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(tick, 100)
+        try:
+            results.count()
+            results[:12]
+        finally:
+            connection.connection.set_progress_handler(None, 100)
+        return steps
+
+    def test_filtered_search_is_not_quadratic(self):
+        generate_catalog(5000)
+        source = Source.objects.order_by("pk").first()
+        filtered = Dataset.objects.filter(source=source)
+
+        # Sous-requête relancée par correspondance : environ six fois plus d'instructions ici
+        self.assertLess(self._vm_steps(search("eau", filtered)), 2 * self._vm_steps(search("eau")))
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        self.opengouv = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.canwin = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        self.uqar = Organization.objects.create(name="UQAR")
+        self.climat = Theme.objects.create(name="Climat")
+        self.eau = Theme.objects.create(name="Eau")
+        for title, source, year, themes in [
+            ("Glaces du golfe", self.opengouv, 2021, [self.climat, self.eau]),
+            ("Glaces de l'estuaire", self.opengouv, 2023, [self.eau]),
+            ("Glaces arctiques", self.canwin, 2023, []),
+            ("Courants", self.canwin, None, [self.climat]),
+        ]:
+            Dataset.objects.create(
+                title=title, description="", url="https://x", source=source, organization=self.uqar,
+                publication_date=datetime.date(year, 1, 1) if year else None,
+            ).themes.set(themes)
+        self.client = APIClient()
+
+    @staticmethod
+    def _pairs(facet):
+        return [(f["label"], f["count"]) for f in facet]
+
+    def test_all_facets_are_counted_in_one_query(self):
+        for names in (["source"], FACETS):
+            with CaptureQueriesContext(connection) as ctx:
+                facets = facet_counts(Dataset.objects.all(), names)
+            self.assertEqual(len(ctx), 1)
+            self.assertEqual(ctx.captured_queries[0]["sql"].count("GROUP BY"), len(names))
+
+        self.assertEqual(self._pairs(facets["source"]), [("CanWin", 2), ("OpenGouv", 2)])
+        self.assertEqual(self._pairs(facets["organization"]), [("UQAR", 4)])
+        self.assertEqual(self._pairs(facets["theme"]), [("Climat", 2), ("Eau", 2)])
+        self.assertEqual(self._pairs(facets["year"]), [("2023", 2), ("2021", 1)])
+
+    def test_facets_follow_the_search_and_its_filters(self):
+        results = search("glaces", Dataset.objects.filter(source=self.opengouv))
+        self.assertEqual(results.count(), 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            facets = facet_counts(results.matches())
+        # Recherche plein texte évaluée une seule fois pour toutes les facettes
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(ctx.captured_queries[0]["sql"].count("MATCH"), 1)
+        self.assertEqual(self._pairs(facets["source"]), [("OpenGouv", 2)])
+        self.assertEqual(self._pairs(facets["theme"]), [("Eau", 2), ("Climat", 1)])
+
+    def test_empty_search_has_empty_facets_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(facet_counts(search("").matches()), {name: [] for name in FACETS})
+
+    def test_api_returns_hits_and_requested_facets(self):
+        response = self.client.get("/api/datasets/", {"facets": "theme,year", "year": 2023})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertEqual(set(data["facets"]), {"theme", "year"})
+        self.assertEqual(self._pairs(data["facets"]["theme"]), [("Eau", 1)])
+
+
+class EnrichmentTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="Boréalis", base_url="https://borealisdata.ca")
+        self.uqar = Organization.objects.create(name="Université du Québec à Rimouski (UQAR)")
+        self.other = Source.objects.create(name="Inconnue", base_url="https://example.org")
+
+    def _dataset(self, source, organization=None):
+        return Dataset.objects.create(title="Jeu", description="", url="https://x",
+                                      source=source, organization=organization)
+
+    def test_positions_come_from_organization_then_source(self):
+        at_uqar = self._dataset(self.source, self.uqar)
+        at_borealis = self._dataset(self.source)
+        unknown = self._dataset(self.other)
+
+        self.assertEqual(enrich_coordinates(batch_size=2), (2, 1))
+
+        at_uqar.refresh_from_db()
+        at_borealis.refresh_from_db()
+        self.assertAlmostEqual(at_uqar.latitude, 48.45, delta=0.1)
+        self.assertAlmostEqual(at_borealis.longitude, -79.40, delta=0.1)
+        self.assertEqual(at_uqar.geo_cell, geo_cell(at_uqar.latitude, at_uqar.longitude))
+        self.assertIsNone(Dataset.objects.get(pk=unknown.pk).latitude)
+
+        # Simulation explicite pour la démo ; rien ne reste sans position
+        self.assertEqual(enrich_coordinates(simulate=True), (1, 0))
+
+    def test_enrichment_touches_last_update(self):
+        dataset = self._dataset(self.source, self.uqar)
+        before = timezone.now()
+        Dataset.objects.filter(pk=dataset.pk).update(last_update=before - datetime.timedelta(days=30))
+
+        enrich_coordinates()
+        dataset.refresh_from_db()
+        # L'export incrémental `since=` voit le jeu localisé
+        self.assertGreaterEqual(dataset.last_update, before)
+
+
+class CatalogStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def test_stats_are_cached_until_counts_change(self):
+        Dataset.objects.create(title="Jeu", description="", url="https://x", source=self.source)
+        self.assertEqual(catalog_stats()["datasets_count"], 1)
+        with self.assertNumQueries(0):
+            catalog_stats()
+
+        Dataset.objects.create(title="Autre", description="", url="https://x", source=self.source)
+        self.assertEqual(catalog_stats()["datasets_count"], 2)
+
+
+@override_settings(DATASET_PAGE_SIZE=4, DATASET_MAX_PAGE_SIZE=6)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        # Dates répétées et jeux sans date : l'id départage
+        dates = [datetime.date(2020 + i % 3, 1, 1) if i % 4 else None for i in range(15)]
+        for i, date in enumerate(dates):
+            Dataset.objects.create(title=f"Jeu {i}", description="", url="https://x",
+                                   source=source, publication_date=date)
+        self.expected = [
+            d.pk for d in sorted(
+                Dataset.objects.all(),
+                key=lambda d: (d.publication_date is None, -(d.publication_date or datetime.date.min).toordinal(), -d.pk),
+            )
+        ]
+        self.client = APIClient()
+
+    def _walk(self, url, link="next"):
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen += [d["id"] for d in data["results"]]
+            url = data[link]
+        return seen
+
+    def test_following_next_streams_the_whole_catalogue_in_order(self):
+        self.assertEqual(self._walk("/api/datasets/"), self.expected)
+
+    def test_previous_links_walk_back(self):
+        last = keyset_page(Dataset.objects.all(), None, 100).items[-1]
+        page = keyset_page(Dataset.objects.all(), None, 4)
+        while page.has_next:
+            page = keyset_page(Dataset.objects.all(), page.next_cursor, 4)
+        self.assertEqual(page.items[-1], last)
+
+        back = []
+        while page.has_previous:
+            page = keyset_page(Dataset.objects.all(), page.previous_cursor, 4)
+            back = [d.pk for d in page.items] + back
+        self.assertEqual(back, self.expected[:len(back)])
+        self.assertEqual(len(back), 12)
+
+    def test_page_size_is_capped_and_deep_pages_cost_the_same(self):
+        data = self.client.get("/api/datasets/", {"page_size": 1000}).json()
+        self.assertEqual(len(data["results"]), 6)
+
+        # Au plus une requête par phase (jeux datés, puis sans date), à toute profondeur
+        cursor = None
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                page = keyset_page(Dataset.objects.all(), cursor, 2)
+            self.assertLessEqual(len(ctx), 2)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/api/datasets/", {"cursor": "pas-un-curseur"}).status_code, 404)
+
+
+class DatasetListTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.uqar = Organization.objects.create(name="UQAR")
+        themes = [Theme.objects.create(name=name) for name in ("Climat", "Eau", "Glace")]
+        for i in range(30):
+            dataset = Dataset.objects.create(
+                title=f"Jeu {i}", description="Description", url="https://x", source=self.source,
+                organization=self.uqar if i % 2 else None, publication_date=datetime.date(2024, 1, 1),
+            )
+            dataset.themes.set(themes[:i % 4])
+        self.client = APIClient()
+
+    def _queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/datasets/", params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.json()
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        small, _ = self._queries(page_size=2, expand="source,organization,themes")
+        large, data = self._queries(page_size=25, expand="source,organization,themes")
+        self.assertEqual(small, large)
+        self.assertEqual(len(data["results"]), 25)
+
+    def test_compact_representation_and_expansion(self):
+        _, data = self._queries(page_size=30)
+        row = next(r for r in data["results"] if r["title"] == "Jeu 3")
+        self.assertEqual(set(row), set(DatasetListSerializer.DEFAULT_FIELDS))
+        self.assertEqual((row["source"], row["organization"], len(row["themes"])), (self.source.pk, self.uqar.pk, 3))
+
+        _, data = self._queries(page_size=30, expand="source,themes")
+        row = next(r for r in data["results"] if r["title"] == "Jeu 3")
+        self.assertEqual(row["source"], {"id": self.source.pk, "name": "OpenGouv"})
+        self.assertEqual([t["name"] for t in row["themes"]], ["Climat", "Eau", "Glace"])
+
+    def test_sparse_fieldsets(self):
+        _, data = self._queries(fields="id,title,description")
+        self.assertEqual(set(data["results"][0]), {"id", "title", "description"})
+        self.assertEqual(self.client.get("/api/datasets/", {"fields": "id,secret"}).status_code, 400)
+
+    def test_detail_keeps_the_full_serializer(self):
+        dataset = Dataset.objects.get(title="Jeu 3")
+        with self.assertNumQueries(2):  # jeu + relations jointes, thèmes préchargés
+            data = self.client.get(f"/api/datasets/{dataset.pk}/").json()
+        self.assertEqual(len(data["themes"]), 3)
+        self.assertEqual(data["content_hash"], "")
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        eau = Theme.objects.create(name="Eau")
+        for i in range(7):
+            Dataset.objects.create(title=f"Jeu {i}", description="Ligne 1\nLigne 2, « citée »",
+                                   url="https://x", source=source).themes.add(eau)
+        Dataset.objects.filter(title="Jeu 6").update(
+            last_update=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+
+    def _body(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_streams_one_object_per_line(self):
+        lines = self._body("/api/export/datasets.ndjson").splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual((rows[0]["source"], rows[0]["themes"]), ("OpenGouv", ["Eau"]))
+        self.assertEqual(rows[-1]["title"], "Jeu 6")  # trié par last_update
+
+    def test_csv_quotes_multiline_descriptions(self):
+        rows = list(csv.DictReader(io.StringIO(self._body("/api/export/datasets.csv"))))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]["description"], "Ligne 1\nLigne 2, « citée »")
+
+    def test_since_keeps_recent_changes_only(self):
+        lines = self._body("/api/export/datasets.ndjson", since="2029-12-31").splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["Jeu 6"])
+        self.assertEqual(self.client.get("/api/export/datasets.csv", {"since": "hier"}).status_code, 400)
+
+    def test_rows_are_read_in_chunks(self):
+        with mock.patch("catalog.export.EXPORT_CHUNK_SIZE", 3), CaptureQueriesContext(connection) as ctx:
+            self._body("/api/export/datasets.ndjson")
+        # Lecture des jeux + une requête de thèmes par lot de 3 (7 jeux → 3 lots)
+        self.assertEqual(len(ctx), 1 + 3)
+
+    @override_settings(ASYNC_VIEWS=True)
+    async def test_asgi_streams_without_buffering(self):
+        response = await self.async_client.get("/api/export/datasets.ndjson")
+        # Itérateur asynchrone : Django n'a pas à tout lire avant l'envoi
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 7)
+
+    @unittest.skipUnless(PARQUET_AVAILABLE, "pyarrow non installé")
+    def test_parquet_round_trip(self):
+        import pyarrow.parquet as pq
+
+        with mock.patch("catalog.export.EXPORT_CHUNK_SIZE", 3):
+            response = self.client.get("/api/export/datasets.parquet")
+            body = b"".join(response.streaming_content)
+        table = pq.read_table(io.BytesIO(body))
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(pq.ParquetFile(io.BytesIO(body)).num_row_groups, 3)
+        self.assertEqual(table.column("themes").to_pylist()[0], ["Eau"])
+
+    @unittest.skipIf(PARQUET_AVAILABLE, "pyarrow installé")
+    def test_parquet_requires_pyarrow(self):
+        self.assertEqual(self.client.get("/api/export/datasets.parquet").status_code, 501)
+
+
+class CatalogVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def test_list_carries_validators(self):
+        response = self.client.get("/api/datasets/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'W/"catalog-{catalog_version()[0]}"')
+        self.assertIn("Last-Modified", response)
+        self.assertIn("Accept", response["Vary"])
+
+    def test_if_none_match_answers_304_without_queries(self):
+        etag = self.client.get("/api/datasets/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/sources/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since_answers_304(self):
+        last_modified = self.client.get("/api/themes/")["Last-Modified"]
+        response = self.client.get("/api/themes/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_orm_write_bumps_version(self):
+        version = catalog_version()[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset = Dataset.objects.create(title="Jeu", description="", url="https://x", source=self.source)
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset.delete()
+        self.assertGreater(catalog_version()[0], version)
+
+    def test_ingested_page_bumps_version_once(self):
+        version = catalog_version()[0]
+        records = [
+            {"external_id": f"id-{i}", "title": f"Jeu {i}", "description": "", "url": "https://x", "publication_date": None}
+            for i in range(5)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkIngestor(self.source).write_page(records)
+        self.assertEqual(catalog_version()[0], version + 1)
+
+    def test_stale_etag_gets_fresh_response(self):
+        etag = self.client.get("/api/datasets/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Dataset.objects.create(title="Nouveau", description="", url="https://x", source=self.source)
+        response = self.client.get("/api/datasets/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d["title"] for d in response.json()["results"]], ["Nouveau"])
+
+
+class GraphQLTests(TestCase):
+    QUERY = """
+        query ($first: Int, $after: String) {
+          allDatasets(first: $first, after: $after) {
+            edges { cursor node { title source { name } organization { name } themes { name } } }
+            pageInfo { hasNextPage hasPreviousPage endCursor }
+          }
+        }
+    """
+
+    def setUp(self):
+        self.opengouv = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.canwin = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        self.org = Organization.objects.create(name="ISMER")
+        self.climat = Theme.objects.create(name="Climat")
+        self.eau = Theme.objects.create(name="Eau")
+
+    def _populate(self, count):
+        start = datetime.date(2020, 1, 1)
+        datasets = Dataset.objects.bulk_create([
+            Dataset(
+                title=f"Jeu {i}", description="", url="https://x",
+                source=self.opengouv if i % 2 else self.canwin,
+                organization=self.org if i % 3 else None,
+                publication_date=start + datetime.timedelta(days=i),
+            )
+            for i in range(count)
+        ])
+        Dataset.themes.through.objects.bulk_create(
+            [Dataset.themes.through(dataset=d, theme=self.climat) for d in datasets]
+            + [Dataset.themes.through(dataset=d, theme=self.eau) for d in datasets[::2]]
+        )
+
+    def _post(self, query, **variables):
+        response = self.client.post(
+            "/graphql/", json.dumps({"query": query, "variables": variables}), content_type="application/json",
+        )
+        return response.json()
+
+    def test_nested_query_costs_constant_queries(self):
+        self._populate(10)
+        with self.assertNumQueries(5):
+            self._post(self.QUERY, first=10)
+
+        Dataset.objects.all().delete()
+        self._populate(1000)
+        with self.assertNumQueries(5):
+            result = self._post(self.QUERY, first=1000)
+
+        edges = result["data"]["allDatasets"]["edges"]
+        self.assertEqual(len(edges), 1000)
+        newest = edges[0]["node"]
+        self.assertEqual(newest["title"], "Jeu 999")
+        self.assertEqual(newest["source"], {"name": "OpenGouv"})
+        self.assertIsNone(newest["organization"])
+        self.assertEqual(newest["themes"], [{"name": "Climat"}])
+        self.assertEqual(edges[1]["node"]["themes"], [{"name": "Climat"}, {"name": "Eau"}])
+
+    def test_connection_walks_pages_with_cursors(self):
+        self._populate(25)
+        titles, after = [], None
+        while True:
+            connection = self._post(self.QUERY, first=10, after=after)["data"]["allDatasets"]
+            titles += [e["node"]["title"] for e in connection["edges"]]
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            after = connection["pageInfo"]["endCursor"]
+        self.assertEqual(titles, [f"Jeu {i}" for i in reversed(range(25))])
+
+    BACKWARD_QUERY = """
+        query ($last: Int, $before: String) {
+          allDatasets(last: $last, before: $before) {
+            edges { node { title } }
+            pageInfo { hasNextPage hasPreviousPage startCursor }
+          }
+        }
+    """
+
+    def _backward(self, **variables):
+        connection = self._post(self.BACKWARD_QUERY, **variables)["data"]["allDatasets"]
+        return [e["node"]["title"] for e in connection["edges"]], connection["pageInfo"]
+
+    def test_last_alone_returns_the_end_of_the_ordering(self):
+        self._populate(5)
+        Dataset.objects.create(title="Sans date", description="", url="https://x", source=self.canwin)
+
+        titles, page_info = self._backward(last=2)
+        self.assertEqual(titles, ["Jeu 0", "Sans date"])
+        self.assertTrue(page_info["hasPreviousPage"])
+        self.assertFalse(page_info["hasNextPage"])
+
+    def test_last_with_before_walks_backward(self):
+        self._populate(5)
+        titles, page_info = self._backward(last=2)
+        self.assertEqual(titles, ["Jeu 1", "Jeu 0"])
+
+        titles, page_info = self._backward(last=2, before=page_info["startCursor"])
+        self.assertEqual(titles, ["Jeu 3", "Jeu 2"])
+        self.assertTrue(page_info["hasPreviousPage"])
+        self.assertTrue(page_info["hasNextPage"])
+
+        titles, page_info = self._backward(last=2, before=page_info["startCursor"])
+        self.assertEqual(titles, ["Jeu 4"])
+        self.assertFalse(page_info["hasPreviousPage"])
+
+    def test_reference_tables_are_paginated(self):
+        query = "{ allThemes(first: 1) { edges { node { name } } pageInfo { hasNextPage } } }"
+        connection = self._post(query)["data"]["allThemes"]
+        self.assertEqual([e["node"]["name"] for e in connection["edges"]], ["Climat"])
+        self.assertTrue(connection["pageInfo"]["hasNextPage"])
+
+    def test_datasets_by_source(self):
+        self._populate(6)
+        query = "{ datasetsBySource(sourceId: %d) { edges { node { source { name } } } } }" % self.canwin.pk
+        edges = self._post(query)["data"]["datasetsBySource"]["edges"]
+        self.assertEqual(len(edges), 3)
+        self.assertEqual({e["node"]["source"]["name"] for e in edges}, {"CanWin"})
+
+    def test_invalid_cursor(self):
+        result = self._post(self.QUERY, after="pas-un-curseur")
+        self.assertEqual(result["errors"][0]["message"], "Curseur invalide.")
+
+    def test_too_costly_query_is_rejected_before_execution(self):
+        fields = " ".join(f"f{i}: title" for i in range(30))
+        with self.assertNumQueries(0):
+            result = self._post("{ allDatasets(first: 1000) { edges { node { %s } } } }" % fields)
+        self.assertIn("trop coûteuse", result["errors"][0]["message"])
+        self.assertNotIn("data", result)
+
+    def test_depth_limit(self):
+        deep = parse("{ allDatasets { edges { node { source { name } } } } }")
+        self.assertEqual(validate(schema.graphql_schema, deep, validation_rules()), [])
+        with self.settings(GRAPHQL_MAX_DEPTH=3):
+            errors = validate(schema.graphql_schema, deep, validation_rules())
+        self.assertIn("exceeds maximum operation depth", errors[0].message)
+
+
+class CacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+
+    def test_tags_invalidate_entries(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cached("n", compute, (source_tag(1),)), 1)
+        self.assertEqual(cached("n", compute, (source_tag(1),)), 1)
+        invalidate_tags(source_tag(2))
+        self.assertEqual(cached("n", compute, (source_tag(1),)), 1)
+        invalidate_tags(source_tag(1))
+        self.assertEqual(cached("n", compute, (source_tag(1),)), 2)
+
+        stats = cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+        self.assertEqual(stats["entries"]["n"], {"hits": 2, "misses": 2})
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_harvested_source_only_invalidates_its_entries(self):
+        opengouv = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        canwin = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        cached("a", lambda: "opengouv", (source_tag(opengouv.pk),))
+        cached("b", lambda: "canwin", (source_tag(canwin.pk),))
+
+        BulkIngestor(opengouv).write_page([
+            {"external_id": "x", "title": "Jeu", "description": "", "url": "https://x", "publication_date": None},
+        ])
+        self.assertEqual(cached("a", lambda: "recalculé", (source_tag(opengouv.pk),)), "recalculé")
+        self.assertEqual(cached("b", lambda: "recalculé", (source_tag(canwin.pk),)), "canwin")
+
+    def test_view_errors_are_not_cached(self):
+        responses = iter([HttpResponse(status=503), HttpResponse(b"ok"), HttpResponse(b"autre")])
+        view = cache_view("vue")(lambda request: next(responses))
+        request = RequestFactory().get("/vue/?a=1")
+
+        self.assertEqual(view(request).status_code, 503)
+        self.assertEqual(view(request).content, b"ok")
+        self.assertEqual(view(request).content, b"ok")
+
+    def test_view_statistics_are_counted_per_view_not_per_url(self):
+        view = cache_view("vue")(lambda request: HttpResponse(b"ok"))
+        for i in range(5):
+            view(RequestFactory().get(f"/vue/?x={i}"))
+        view(RequestFactory().get("/vue/?x=0"))
+
+        self.assertEqual(cache_stats()["entries"], {"vue": {"misses": 5, "hits": 1}})
+
+    def test_statistics_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get("/api/cache/stats/").status_code, 403)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        cached("n", lambda: 1)
+        self.assertEqual(self.client.get("/api/cache/stats/").json()["misses"], 1)
+
+
+class SingleFlightTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "valeur"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cached("lent", slow))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["valeur"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache_stats()["entries"]["lent"], {"misses": 1, "waits": 4})
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SERVER_TIMING=True)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        profiling.reset()
+        Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def test_disabled_middleware_leaves_the_chain(self):
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_records_queries_time_and_size_per_route(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/sources/")
+        expected = len(queries)
+        self.client.get("/api/sources/")
+
+        [entry] = profiling.report()["routes"]
+        self.assertEqual(entry["route"], "GET /api/sources/$")
+        self.assertEqual(entry["samples"], 2)
+        self.assertEqual(entry["queries"]["max"], expected)
+        self.assertEqual(entry["bytes"]["p50"], len(response.content))
+        self.assertLessEqual(entry["db_ms"]["max"], entry["total_ms"]["max"])
+        self.assertRegex(response["Server-Timing"], rf'^db;desc="{expected} SQL";dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(PROFILING_SAMPLES=3)
+    def test_ring_buffer_keeps_latest_samples(self):
+        for total_ms in range(1, 6):
+            profiling.record("GET /x/", 1, 0.5, total_ms, None)
+
+        [entry] = profiling.report()["routes"]
+        self.assertEqual(entry["samples"], 3)
+        self.assertEqual(entry["total_ms"], {"p50": 4, "p95": 5, "p99": 5, "max": 5})
+        self.assertIsNone(entry["bytes"])
+
+    def test_endpoint_is_admin_only_and_resets(self):
+        self.assertEqual(self.client.get("/api/profiling/").status_code, 403)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        self.client.get("/api/sources/")
+
+        routes = [r["route"] for r in self.client.get("/api/profiling/").json()["routes"]]
+        self.assertIn("GET /api/sources/$", routes)
+        self.assertEqual(self.client.delete("/api/profiling/").status_code, 204)
+        self.assertEqual([r["route"] for r in profiling.report()["routes"]], ["DELETE /api/profiling/"])
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_scales(self):
+        self.assertEqual(parse_scale("10k"), 10_000)
+        self.assertEqual(parse_scale("1M"), 1_000_000)
+        self.assertEqual(parse_scale("2500"), 2500)
+        with self.assertRaises(ValueError):
+            parse_scale("beaucoup")
+
+    def test_generated_catalogue_is_complete_and_consistent(self):
+        stats = generate_catalog(300)
+
+        self.assertEqual(Dataset.objects.count(), 300)
+        self.assertEqual(stats["theme_links"], Dataset.themes.through.objects.count())
+        self.assertGreater(stats["located"], 0)
+        self.assertEqual(Dataset.objects.filter(latitude__isnull=False, geo_cell__isnull=True).count(), 0)
+        # Compteurs et index reconstruits après les insertions groupées
+        self.assertEqual(catalog_stats()["datasets_count"], 300)
+        self.assertTrue(search("eau").count())
+
+    def test_scenarios_report_timings_and_queries(self):
+        generate_catalog(200)
+        with mock.patch("benchmarks.scenarios.HTTP_SCENARIOS", [("rest:sources", "/api/sources/")]):
+            results = run_scenarios(repeat=2, harvest_packages=120)
+
+        self.assertEqual(set(results), {"rest:sources", "harvest:fake_ckan", "harvest:fake_ckan:unchanged"})
+        self.assertEqual(results["rest:sources"]["runs"], 2)
+        self.assertGreater(results["rest:sources"]["queries"], 0)
+        self.assertEqual(results["harvest:fake_ckan"]["stats"]["written"], 120)
+        self.assertEqual(results["harvest:fake_ckan:unchanged"]["stats"]["written"], 0)
+        self.assertFalse(Source.objects.filter(name=HARVEST_SOURCE).exists())
+
+    def test_compare_reports_p50_ratios(self):
+        before = {"scenarios": {"a": {"ms": {"p50": 10.0}}, "b": {"ms": {"p50": 5.0}}}}
+        after = {"scenarios": {"a": {"ms": {"p50": 15.0}}, "c": {"ms": {"p50": 1.0}}}}
+        self.assertEqual(compare(before, after), [("a", 10.0, 15.0, 1.5)])
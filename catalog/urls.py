@@ -1,6 +1,6 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import SourceViewSet, OrganizationViewSet, ThemeViewSet, DatasetViewSet
+from .views import SourceViewSet, OrganizationViewSet, ThemeViewSet, DatasetViewSet, export_datasets, cache_statistics, profiling_statistics
 
 router = DefaultRouter()
 router.register(r'sources', SourceViewSet)
@@ -10,4 +10,7 @@ router.register(r'datasets', DatasetViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('cache/stats/', cache_statistics, name='cache_statistics'),
+    path('profiling/', profiling_statistics, name='profiling_statistics'),
+    re_path(r'^export/datasets\.(?P<fmt>ndjson|csv|parquet)$', export_datasets, name='export_datasets'),
 ]
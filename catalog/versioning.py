@@ -0,0 +1,103 @@
+# catalog/versioning.py
+
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from catalog.models import CatalogVersion
+
+# Copie en cache de la version : les requêtes conditionnelles n'interrogent pas la base.
+# Avec un cache local au processus, un autre processus voit la nouvelle version
+# au plus tard après VERSION_CACHE_SECONDS ; un cache partagé la voit aussitôt.
+VERSION_CACHE_KEY = "catalog:version"
+VERSION_CACHE_SECONDS = 5
+
+
+# ==============================================================
+# 🏷️ Version du catalogue
+# ==============================================================
+def catalog_version():
+    """(numéro, date de modification) de la version courante du catalogue."""
+    stamp = cache.get(VERSION_CACHE_KEY)
+    if stamp is None:
+        row, _ = CatalogVersion.objects.get_or_create(pk=1)
+        stamp = (row.version, row.updated_at)
+        cache.set(VERSION_CACHE_KEY, stamp, VERSION_CACHE_SECONDS)
+    return stamp
+
+
+async def acatalog_version():
+    """catalog_version() pour les vues asynchrones : cache puis base en un seul passage par fil."""
+    return await sync_to_async(catalog_version)()
+
+
+def _bump():
+    now = timezone.now()
+    if not CatalogVersion.objects.filter(pk=1).update(version=F("version") + 1, updated_at=now):
+        CatalogVersion.objects.create(pk=1, version=1, updated_at=now)
+    cache.delete(VERSION_CACHE_KEY)
+
+
+def bump_catalog_version():
+    """Nouvelle version une fois la transaction en cours validée (aussitôt hors transaction)."""
+    transaction.on_commit(_bump)
+
+
+# ==============================================================
+# 🔁 Requêtes conditionnelles (ETag / Last-Modified → 304)
+# ==============================================================
+# Version lue une fois par requête, avant la vue (condition() appelle ces
+# fonctions de façon synchrone, y compris autour d'une vue asynchrone)
+def _etag(request, *args, **kwargs):
+    return f'W/"catalog-{request._catalog_version[0]}"'
+
+
+def _last_modified(request, *args, **kwargs):
+    return request._catalog_version[1]
+
+
+def _patch_headers(request, response):
+    if request.method in ("GET", "HEAD"):
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def catalog_conditional(view):
+    """
+    ETag et Last-Modified dérivés de la version du catalogue. Un
+    If-None-Match / If-Modified-Since à jour répond 304 avant d'exécuter
+    la vue, donc sans aucune requête SQL (version lue dans le cache).
+    Les clients revalident à chaque appel (Cache-Control: no-cache).
+    Accepte aussi les vues asynchrones.
+    """
+    conditional_view = condition(etag_func=_etag, last_modified_func=_last_modified)(view)
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def awrapped(request, *args, **kwargs):
+            request._catalog_version = await acatalog_version()
+            return _patch_headers(request, await conditional_view(request, *args, **kwargs))
+
+        return awrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request._catalog_version = catalog_version()
+        return _patch_headers(request, conditional_view(request, *args, **kwargs))
+
+    return wrapped
+
+
+class CatalogConditionalMixin:
+    """Applique catalog_conditional aux vues DRF (viewsets du catalogue)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        return catalog_conditional(super().dispatch)(request, *args, **kwargs)
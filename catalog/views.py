@@ -1,24 +1,158 @@
+import datetime
+from collections import defaultdict
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from ogsl_core import profiling
+
+from .cache import cache_stats
+from .export import FORMATS, PARQUET_AVAILABLE, iter_rows, streaming_content
+from .facets import facet_names, facet_counts
+from .filters import DatasetFilter
+from .pagination import DatasetKeysetPagination
 from .models import Source, Organization, Theme, Dataset
-from .serializers import SourceSerializer, OrganizationSerializer, ThemeSerializer, DatasetSerializer
+from .versioning import CatalogConditionalMixin
+from .serializers import (
+    SourceSerializer, OrganizationSerializer, ThemeSerializer, DatasetSerializer, DatasetListSerializer,
+)
 
 
-class SourceViewSet(viewsets.ModelViewSet):
+class SourceViewSet(CatalogConditionalMixin, viewsets.ModelViewSet):
     queryset = Source.objects.all()
     serializer_class = SourceSerializer
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(CatalogConditionalMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
 
 
-class ThemeViewSet(viewsets.ModelViewSet):
+class ThemeViewSet(CatalogConditionalMixin, viewsets.ModelViewSet):
     queryset = Theme.objects.all()
     serializer_class = ThemeSerializer
 
 
-class DatasetViewSet(viewsets.ModelViewSet):
+def _names(value, allowed, param):
+    """Liste « a,b,c » d'un paramètre ; 400 si un nom est inconnu."""
+    names = [n.strip() for n in (value or "").split(",") if n.strip()]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValidationError({param: f"Inconnu(s) : {', '.join(unknown)}"})
+    return names
+
+
+def _attach_themes(rows):
+    """Ajoute à chaque ligne ses thèmes [(id, nom)], en une requête pour toute la page."""
+    themes = defaultdict(list)
+    links = Dataset.themes.through.objects.filter(dataset_id__in=[r["id"] for r in rows])
+    for dataset_id, theme_id, name in links.values_list("dataset_id", "theme_id", "theme__name").order_by("theme_id"):
+        themes[dataset_id].append((theme_id, name))
+    for row in rows:
+        row["themes"] = themes[row["id"]]
+
+
+class DatasetViewSet(CatalogConditionalMixin, viewsets.ModelViewSet):
+    """
+    Liste : représentation compacte lue par values(), un nombre constant de
+    requêtes quelle que soit la taille de page.
+    `?fields=id,title` (champs rendus), `?expand=source,organization,themes` (noms),
+    `?facets=source,theme` ou `all` (comptes par facette).
+    """
     queryset = Dataset.objects.all()
     serializer_class = DatasetSerializer
+    filterset_class = DatasetFilter
+    pagination_class = DatasetKeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return queryset  # relations lues par values() dans list()
+        return queryset.select_related("source", "organization").prefetch_related("themes")
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return DatasetListSerializer
+        return DatasetSerializer
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        fields = _names(params.get("fields"), DatasetListSerializer.available_fields(), "fields") or None
+        expand = _names(params.get("expand"), DatasetListSerializer.EXPANDABLE, "expand")
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*DatasetListSerializer.columns(fields, expand))
+        page = self.paginate_queryset(rows)
+        rows = list(rows) if page is None else page
+        if "themes" in (fields or DatasetListSerializer.DEFAULT_FIELDS):
+            _attach_themes(rows)
+
+        data = DatasetListSerializer(rows, many=True, fields=fields, expand=expand).data
+        response = Response(data) if page is None else self.get_paginated_response(data)
+        if "facets" in params:
+            response.data["facets"] = facet_counts(queryset, facet_names(params["facets"]))
+        return response
+
+
+# ==============================================================
+# 📤 Export en flux du catalogue
+# ==============================================================
+def _parse_since(value):
+    """Date ou date-heure ISO 8601 (fuseau du projet si absent), None si illisible."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        parsed = datetime.datetime.combine(day, datetime.time.min) if day else None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_datasets(request, fmt):
+    """
+    Catalogue complet en NDJSON, CSV ou Parquet, envoyé au fil de la lecture
+    (mémoire constante). Mêmes filtres que l'API ; `since=` ne garde que les
+    jeux modifiés depuis cette date (bornes incluses), triés par last_update.
+    """
+    if fmt == "parquet" and not PARQUET_AVAILABLE:
+        return JsonResponse({"error": "Export Parquet indisponible (pyarrow non installé)"}, status=501)
+
+    queryset = DatasetFilter(request.GET, queryset=Dataset.objects.all()).qs
+    if request.GET.get("since"):
+        since = _parse_since(request.GET["since"])
+        if since is None:
+            return JsonResponse({"error": "since attendu : date ou date-heure ISO 8601"}, status=400)
+        queryset = queryset.filter(last_update__gte=since)
+
+    content_type, render = FORMATS[fmt]
+    response = StreamingHttpResponse(streaming_content(render(iter_rows(queryset))), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="ogsl-datasets.{fmt}"'
+    return response
+
+
+# ==============================================================
+# 🧊 Compteurs du cache serveur (administrateurs)
+# ==============================================================
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_statistics(request):
+    """Succès, défauts et attentes du cache (catalog.cache), pour ce processus."""
+    return Response(cache_stats())
+
 
+# ==============================================================
+# ⏱️ Mesures par route (administrateurs)
+# ==============================================================
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def profiling_statistics(request):
+    """Percentiles par route (ogsl_core.profiling) pour ce processus ; DELETE les remet à zéro."""
+    if request.method == "DELETE":
+        profiling.reset()
+        return Response(status=204)
+    return Response(profiling.report())
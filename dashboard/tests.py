@@ -1,3 +1,265 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from unittest import mock
+
+from django.core.cache import cache
+from asgiref.sync import sync_to_async
+from django.test import RequestFactory, TestCase
+
+from catalog.geo import geo_cell
+from catalog.models import Dataset, Source, Theme
+from catalog.versioning import catalog_version
+from dashboard import views
+
+
+class DatasetCountEndpointTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.source = Source.objects.create(name="Open Gouv", base_url="https://ouvert.canada.ca")
+        # Version du catalogue (ETag) déjà en cache : on ne compte que les requêtes de la vue
+        cache.clear()
+        catalog_version()
+
+    def _add_themes(self, count):
+        start = Theme.objects.count()
+        themes = [Theme.objects.create(name=f"Thème {i}") for i in range(start, start + count)]
+        for theme in themes:
+            dataset = Dataset.objects.create(
+                title=f"Jeu {theme.pk}", description="", url="https://x", source=self.source,
+            )
+            dataset.themes.add(theme)
+
+    def test_datasets_by_theme_uses_constant_queries(self):
+        self._add_themes(3)
+        with self.assertNumQueries(1):
+            views.datasets_by_theme(self.factory.get("/"))
+
+        self._add_themes(30)
+        with self.assertNumQueries(1):
+            response = views.datasets_by_theme(self.factory.get("/"))
+
+        data = json.loads(response.content)
+        self.assertEqual(len(data), 33)
+        self.assertEqual(data[0], {"theme": "Thème 0", "count": 1})
+
+    def test_datasets_by_source_reads_denormalized_counts(self):
+        self._add_themes(5)
+        Source.objects.create(name="Borealis", base_url="https://borealisdata.ca")
+
+        with self.assertNumQueries(1):
+            response = views.datasets_by_source(self.factory.get("/"))
+
+        self.assertEqual(json.loads(response.content), {
+            "labels": ["OpenGouv", "Boréalis"],
+            "counts": [5, 0],
+        })
+
+
+class DatasetsByThemeFilteredTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_version()
+        self.factory = RequestFactory()
+        self.source = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        other = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        eau = Theme.objects.create(name="Eau")
+        climat = Theme.objects.create(name="Climat")
+        for i in range(3):
+            Dataset.objects.create(title=f"Eau {i}", description="", url="https://x", source=self.source).themes.add(eau)
+        Dataset.objects.create(title="Mixte", description="", url="https://x", source=self.source).themes.add(eau, climat)
+        for i in range(2):
+            Dataset.objects.create(title=f"Brut {i}", description="", url="https://x", source=self.source)
+        Dataset.objects.create(title="Ailleurs", description="", url="https://x", source=other).themes.add(climat)
+
+    def test_histogram_in_two_queries_with_virtual_bucket(self):
+        with self.assertNumQueries(2):
+            response = views.datasets_by_theme_filtered(self.factory.get("/"), self.source.pk)
+
+        self.assertEqual(json.loads(response.content), [
+            {"theme": "Eau", "count": 4},
+            {"theme": "Non classé", "count": 2},
+            {"theme": "Climat", "count": 1},
+        ])
+
+    def test_themes_without_datasets_are_listed_with_zero(self):
+        Theme.objects.create(name="Air")
+        other = Source.objects.get(name="OpenGouv")
+
+        response = views.datasets_by_theme_filtered(self.factory.get("/"), other.pk)
+
+        self.assertEqual(json.loads(response.content), [
+            {"theme": "Climat", "count": 1},
+            {"theme": "Non classé", "count": 0},
+            {"theme": "Air", "count": 0},
+            {"theme": "Eau", "count": 0},
+        ])
+
+    def test_get_does_not_write(self):
+        views.datasets_by_theme_filtered(self.factory.get("/"), self.source.pk)
+
+        self.assertFalse(Theme.objects.filter(name="Non classé").exists())
+        self.assertEqual(Dataset.themes.through.objects.count(), 6)
+
+
+class MapTileTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def _geolocate(self, count, latitude=48.5, longitude=-68.5):
+        points = [(latitude + i * 1e-4, longitude + i * 1e-4) for i in range(count)]
+        Dataset.objects.bulk_create([
+            Dataset(title=f"Jeu {i}", description="Golfe " * 100, url="https://x", source=self.source,
+                    latitude=lat, longitude=lon, geo_cell=geo_cell(lat, lon))
+            for i, (lat, lon) in enumerate(points)
+        ])
+
+    def test_tile_bounds(self):
+        south, west, north, east = views.tile_bounds(0, 0, 0)
+        self.assertAlmostEqual(north, 85.0511, places=3)
+        self.assertEqual((west, east), (-180.0, 180.0))
+
+    def test_sparse_tile_returns_points_without_n_plus_one(self):
+        self._geolocate(20)
+        self._geolocate(5, latitude=-30.0, longitude=20.0)  # hors de la tuile
+
+        with self.assertNumQueries(2):
+            response = views.map_tile(self.factory.get("/"), 4, 4, 5)
+
+        data = json.loads(response.content)
+        self.assertEqual((len(data["points"]), data["clusters"]), (20, []))
+        self.assertEqual(data["points"][0]["source_name"], "OpenGouv")
+        self.assertEqual(len(data["points"][0]["summary"]), 200)
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+    def test_dense_tile_returns_clusters(self):
+        self._geolocate(views.TILE_POINT_LIMIT + 50)
+
+        response = views.map_tile(self.factory.get("/"), 2, 1, 1)
+
+        data = json.loads(response.content)
+        self.assertEqual(data["points"], [])
+        self.assertEqual(sum(c["count"] for c in data["clusters"]), views.TILE_POINT_LIMIT + 50)
+
+    def test_invalid_tile(self):
+        response = views.map_tile(self.factory.get("/"), 2, 4, 0)
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.source = Source.objects.create(name="Open Gouv", base_url="https://ouvert.canada.ca")
+
+    def test_etag_revalidation_answers_304_without_queries(self):
+        response = views.datasets_by_theme(self.factory.get("/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = views.datasets_by_source(self.factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        etag = views.datasets_by_theme(self.factory.get("/"))["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Theme.objects.create(name="Climat")
+
+        response = views.datasets_by_theme(self.factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(json.loads(response.content), [{"theme": "Climat", "count": 0}])
+
+
+class ServerCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.opengouv = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        self.canwin = Source.objects.create(name="CanWin", base_url="https://canwin-datahub.ad.umanitoba.ca")
+        self.climat = Theme.objects.create(name="Climat")
+        catalog_version()
+
+    def _filtered(self, source):
+        return json.loads(views.datasets_by_theme_filtered(self.factory.get("/"), source.pk).content)
+
+    def test_charts_are_served_from_cache_until_data_changes(self):
+        views.datasets_by_theme(self.factory.get("/"))
+        with self.assertNumQueries(0):
+            response = views.datasets_by_theme(self.factory.get("/"))
+        self.assertEqual(json.loads(response.content), [{"theme": "Climat", "count": 0}])
+
+        dataset = Dataset.objects.create(title="Jeu", description="", url="https://x", source=self.opengouv)
+        dataset.themes.add(self.climat)
+        response = views.datasets_by_theme(self.factory.get("/"))
+        self.assertEqual(json.loads(response.content), [{"theme": "Climat", "count": 1}])
+
+    def test_source_write_keeps_other_sources_cached(self):
+        self._filtered(self.opengouv)
+        self._filtered(self.canwin)
+
+        Dataset.objects.create(title="Jeu", description="", url="https://x", source=self.opengouv)
+        with self.assertNumQueries(0):
+            self._filtered(self.canwin)
+        self.assertEqual(self._filtered(self.opengouv), [
+            {"theme": "Non classé", "count": 1},
+            {"theme": "Climat", "count": 0},
+        ])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        opengouv = Source.objects.create(name="Open Gouv", base_url="https://ouvert.canada.ca")
+        Source.objects.create(name="Borealis", base_url="https://borealisdata.ca")
+        climat = Theme.objects.create(name="Climat")
+        for i in range(3):
+            dataset = Dataset.objects.create(
+                title=f"Jeu {i}", description="", url="https://x", source=opengouv,
+                latitude=48.45 if i else None, longitude=-68.52 if i else None,
+            )
+            dataset.themes.add(climat)
+
+    async def test_async_charts_match_sync_versions(self):
+        pairs = [
+            (views.adatasets_by_source, views.datasets_by_source),
+            (views.adatasets_by_theme, views.datasets_by_theme),
+        ]
+        for async_view, sync_view in pairs:
+            await cache.aclear()
+            expected = await async_view(self.factory.get("/"))
+            await cache.aclear()
+            response = await sync_to_async(sync_view)(self.factory.get("/"))
+            self.assertEqual(expected.status_code, 200)
+            self.assertEqual(expected.content, response.content)
+        self.assertEqual(json.loads(expected.content), [{"theme": "Climat", "count": 3}])
+
+    async def test_async_views_answer_conditional_requests(self):
+        etag = (await views.adatasets_by_source(self.factory.get("/")))["ETag"]
+        response = await views.adatasets_by_source(self.factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+    @mock.patch("dashboard.views.render")
+    def test_map_count_matches_tile_points(self, render):
+        # Latitude 0 : ni comptée ni servie par les tuiles
+        Dataset.objects.create(title="Sans position", description="", url="https://x",
+                               source=Source.objects.get(name="Open Gouv"), latitude=0, longitude=0)
+        views.map_view(self.factory.get("/"))
+        context = render.call_args.args[2]
+        tile = json.loads(views.map_tile(self.factory.get("/"), 0, 0, 0).content)
+
+        self.assertEqual(context["located_count"], 2)
+        self.assertEqual(len(tile["points"]), context["located_count"])
+
+    @mock.patch("dashboard.views.render")
+    async def test_async_map_view(self, render):
+        await views.amap_view(self.factory.get("/"))
+        context = render.call_args.args[2]
+        self.assertEqual(context["located_count"], 2)
+        self.assertEqual(
+            [(s["name"], s["dataset_count"]) for s in context["sources"]],
+            [("Open Gouv", 3), ("Borealis", 0)],
+        )
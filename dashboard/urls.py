@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Serveur ASGI (settings.ASYNC_VIEWS) : versions asynchrones des vues de lecture
+ASYNC = settings.ASYNC_VIEWS
+
 urlpatterns = [
     path("", views.index, name="dashboard_index"),
-    path("data/datasets_by_source/", views.datasets_by_source, name="datasets_by_source"),
-    path("datasets-by-theme/", views.datasets_by_theme, name="datasets_by_theme"),
+    path("data/datasets_by_source/", views.adatasets_by_source if ASYNC else views.datasets_by_source, name="datasets_by_source"),
+    path("datasets-by-theme/", views.adatasets_by_theme if ASYNC else views.datasets_by_theme, name="datasets_by_theme"),
     path("data/datasets_by_theme_filtered/<int:source_id>/", views.datasets_by_theme_filtered, name="datasets_by_theme_filtered"),
-    path('map/', views.map_view, name='dashboard_map'),
+    path('map/', views.amap_view if ASYNC else views.map_view, name='dashboard_map'),
+    path('map/tiles/<int:z>/<int:x>/<int:y>.json', views.map_tile, name='dashboard_map_tile'),
 ]
@@ -1,122 +1,226 @@
 from django.shortcuts import render
 from django.http import JsonResponse
-from catalog.models import Dataset, Source, Organization, Theme
-import json
-from django.core.serializers.json import DjangoJSONEncoder
+from catalog.models import Dataset, Source, Theme
+from catalog.aggregates import catalog_stats
+from catalog.cache import DATASETS_TAG, cache_view, source_tag
+from catalog.geo import bbox_filter
+from catalog.versioning import catalog_conditional
+import asyncio
+import math
+from django.db.models import Avg, Count, F
+from django.db.models.functions import Floor, Substr
+from django.utils.cache import patch_cache_control
+
+# Catégorie virtuelle des jeux de données sans thème
+UNCLASSIFIED = "Non classé"
+
+# 🗺️ Tuiles de la carte : grille de regroupement, seuil de points bruts, cache HTTP
+TILE_GRID = 8
+TILE_POINT_LIMIT = 200
+TILE_MAX_AGE = 300
 
 
 
 
 def index(request):
     """Vue principale du tableau de bord"""
-    sources_count = Source.objects.count()
-    organizations_count = Organization.objects.count()
-    themes_count = Theme.objects.count()
-    datasets_count = Dataset.objects.count()
     sources = Source.objects.all()
 
     context = {
-        "sources_count": sources_count,
-        "organizations_count": organizations_count,
-        "themes_count": themes_count,
-        "datasets_count": datasets_count,
+        **catalog_stats(),
         "sources": sources,
     }
     return render(request, "dashboard/index.html", context)
 
 
-def datasets_by_source(request):
-    """📊 Données pour le graphique : nombre de jeux de données par source (normalisées)"""
-    rename_map = {
-        "Open Gouv": "OpenGouv",
-        "open gouv": "OpenGouv",
-        "OpenGouv": "OpenGouv",
-        "CanWin": "CanWin",
-        "Données Québec": "Données Québec",
-        "Donnees Quebec": "Données Québec",
-        "Boréalis": "Boréalis",
-        "Borealis": "Boréalis",
-    }
+# Noms de sources normalisés pour les graphiques
+SOURCE_NAMES = {
+    "Open Gouv": "OpenGouv",
+    "open gouv": "OpenGouv",
+    "OpenGouv": "OpenGouv",
+    "CanWin": "CanWin",
+    "Données Québec": "Données Québec",
+    "Donnees Quebec": "Données Québec",
+    "Boréalis": "Boréalis",
+    "Borealis": "Boréalis",
+}
 
-    sources = Source.objects.all()
 
+async def _alist(queryset):
+    # `async for` sur le queryset (et non aiterator()) : sous Django 5.2,
+    # aiterator() exécute les values_list() de façon synchrone
+    return [row async for row in queryset]
+
+
+def _source_counts():
+    # Compteurs dénormalisés (catalog.aggregates) : une seule requête
+    return Source.objects.order_by("id").values_list("name", "dataset_count")
+
+
+def _source_chart(rows):
     labels = []
     counts = []
 
-    for s in sources:
-        name = rename_map.get(s.name, s.name)  # normalisation du nom
-        count = Dataset.objects.filter(source=s).count()
+    for source_name, count in rows:
+        name = SOURCE_NAMES.get(source_name, source_name)  # normalisation du nom
         labels.append(name)
         counts.append(count)
 
-    data = {
+    return {
         "labels": labels,
         "counts": counts,
     }
 
-    return JsonResponse(data)
+
+def _theme_counts():
+    return Theme.objects.order_by("id").values_list("name", "dataset_count")
+
+
+def _theme_chart(rows):
+    return [{"theme": name, "count": count} for name, count in rows]
 
 
+@catalog_conditional
+@cache_view("dashboard:datasets_by_source", tags=(DATASETS_TAG,))
+def datasets_by_source(request):
+    """📊 Données pour le graphique : nombre de jeux de données par source (normalisées)"""
+    return JsonResponse(_source_chart(_source_counts()))
+
+
+@catalog_conditional
+@cache_view("dashboard:datasets_by_source", tags=(DATASETS_TAG,))
+async def adatasets_by_source(request):
+    """Version asynchrone de datasets_by_source (serveur ASGI)"""
+    return JsonResponse(_source_chart(await _alist(_source_counts())))
 
+
+@catalog_conditional
+@cache_view("dashboard:datasets_by_theme", tags=(DATASETS_TAG,))
 def datasets_by_theme(request):
     """📊 Données globales : nombre de jeux de données par thème (toutes sources confondues)"""
-    data = []
-    for theme in Theme.objects.all():
-        count = Dataset.objects.filter(themes=theme).count()
-        data.append({
-            "theme": theme.name,
-            "count": count
-        })
-    return JsonResponse(data, safe=False)
+    return JsonResponse(_theme_chart(_theme_counts()), safe=False)
+
 
+@catalog_conditional
+@cache_view("dashboard:datasets_by_theme", tags=(DATASETS_TAG,))
+async def adatasets_by_theme(request):
+    """Version asynchrone de datasets_by_theme (serveur ASGI)"""
+    return JsonResponse(_theme_chart(await _alist(_theme_counts())), safe=False)
 
+
+@catalog_conditional
+@cache_view("dashboard:datasets_by_theme_filtered", tags=lambda request, source_id: (source_tag(source_id),))
 def datasets_by_theme_filtered(request, source_id):
     """🎯 Données filtrées : nombre de jeux de données par thème selon la source choisie"""
-    data = []
-    source_datasets = Dataset.objects.filter(source_id=source_id)
-
-    # ✅ Si la source n'a pas de thème, on attribue "Non classé"
-    if not Theme.objects.filter(name="Non classé").exists():
-        Theme.objects.create(name="Non classé")
+    # Une requête groupée (LEFT JOIN sur la table de liaison) :
+    # les jeux sans thème ressortent avec un nom NULL → catégorie virtuelle
+    rows = (
+        Dataset.objects.filter(source_id=source_id)
+        .values("themes__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "themes__name")
+    )
+
+    histogram = {}
+    for row in rows:
+        name = row["themes__name"] or UNCLASSIFIED
+        histogram[name] = histogram.get(name, 0) + row["count"]
+
+    # Thèmes absents de la source : listés à 0, comme dans la vue d'origine
+    histogram.setdefault(UNCLASSIFIED, 0)
+    for name in Theme.objects.order_by("name").values_list("name", flat=True):
+        histogram.setdefault(name, 0)
+
+    data = [{"theme": name, "count": count} for name, count in histogram.items()]
+    return JsonResponse(data, safe=False)
 
-    default_theme = Theme.objects.get(name="Non classé")
 
-    for dataset in source_datasets:
-        if dataset.themes.count() == 0:
-            dataset.themes.add(default_theme)
+def _located_datasets():
+    """Jeux placés sur la carte : coordonnées connues, latitude 0 traitée comme absente (compteur et tuiles)."""
+    return Dataset.objects.filter(latitude__isnull=False).exclude(latitude=0)
 
-    # 🔁 Maintenant on recompte normalement
-    for theme in Theme.objects.all():
-        count = Dataset.objects.filter(themes=theme, source_id=source_id).count()
-        data.append({
-            "theme": theme.name,
-            "count": count
-        })
 
-    return JsonResponse(data, safe=False)
+def _map_queries():
+    """Deux requêtes indépendantes : jeux géolocalisés et effectifs par source."""
+    return (
+        _located_datasets(),
+        Source.objects.order_by("id").values("name", "dataset_count"),
+    )
 
 
 def map_view(request):
-    """Affiche la carte interactive Leaflet avec les jeux de données géolocalisés"""
-    datasets = Dataset.objects.exclude(latitude__isnull=True).exclude(latitude=0)
-
-    data = [
-        {
-            "title": d.title,
-            "description": d.description,
-            "latitude": d.latitude,
-            "longitude": d.longitude,
-            "source": d.source.name if d.source else "Inconnue",
-            "url": d.url,
+    """Affiche la carte interactive Leaflet ; les points sont chargés par tuile (map_tile)"""
+    located, sources = _map_queries()
+    return render(request, "dashboard/map.html", {
+        "located_count": located.count(),
+        "sources": list(sources),
+    })
+
+
+async def amap_view(request):
+    """Version asynchrone de map_view : les deux requêtes sont lancées ensemble"""
+    located, sources = _map_queries()
+    located_count, sources = await asyncio.gather(located.acount(), _alist(sources))
+    return render(request, "dashboard/map.html", {
+        "located_count": located_count,
+        "sources": sources,
+    })
+
+
+def tile_bounds(z, x, y):
+    """Emprise (sud, ouest, nord, est) en degrés d'une tuile XYZ Web Mercator."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+@cache_view("dashboard:map_tile", tags=(DATASETS_TAG,))
+def map_tile(request, z, x, y):
+    """
+    🧩 Points d'une tuile XYZ, regroupés sur une grille TILE_GRID × TILE_GRID.
+
+    Au-delà de TILE_POINT_LIMIT jeux dans la tuile, on renvoie des grappes
+    (centre moyen + effectif) calculées en SQL ; sinon les points eux-mêmes,
+    avec le nom de la source joint dans la même requête.
+    """
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return JsonResponse({"error": "Tuile invalide"}, status=400)
+
+    south, west, north, east = tile_bounds(z, x, y)
+    # Bornes nord/est exclues : un point en bordure n'appartient qu'à une tuile
+    datasets = (
+        bbox_filter(_located_datasets(), south, west, north, east)
+        .filter(latitude__lt=north, longitude__lt=east)
+    )
+
+    cells = list(
+        datasets.annotate(
+            row=Floor((F("latitude") - south) / ((north - south) / TILE_GRID)),
+            col=Floor((F("longitude") - west) / ((east - west) / TILE_GRID)),
+        )
+        .values("row", "col")
+        .annotate(count=Count("id"), latitude=Avg("latitude"), longitude=Avg("longitude"))
+        .order_by()
+    )
+    total = sum(c["count"] for c in cells)
+
+    if total <= TILE_POINT_LIMIT:
+        points = datasets.annotate(
+            source_name=F("source__name"), summary=Substr("description", 1, 200),
+        ).values("id", "title", "summary", "latitude", "longitude", "url", "source_name")
+        payload = {"points": list(points), "clusters": []}
+    else:
+        payload = {
+            "points": [],
+            "clusters": [
+                {"latitude": c["latitude"], "longitude": c["longitude"], "count": c["count"]}
+                for c in cells
+            ],
         }
-        for d in datasets
-    ]
-
-    # ✅ On convertit en vrai JSON ici
-    return render(
-    request,
-    "dashboard/map.html",
-    {
-        "datasets_json": json.dumps(data, cls=DjangoJSONEncoder)
-    },
-)
+
+    response = JsonResponse(payload)
+    patch_cache_control(response, public=True, max_age=TILE_MAX_AGE)
+    return response
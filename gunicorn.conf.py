@@ -0,0 +1,31 @@
+# gunicorn.conf.py — lu automatiquement par gunicorn depuis la racine du projet
+
+import os
+
+# =====================================================
+# 🚀 Pile de service
+# =====================================================
+# WSGI (défaut)        : workers synchrones, connexions PostgreSQL persistantes
+# ASGI (SERVE_ASGI=True) : workers uvicorn, vues de lecture asynchrones ; à n'activer
+# qu'après une mesure favorable sur PostgreSQL (`manage.py loadtest`)
+SERVE_ASGI = os.getenv("SERVE_ASGI", "False") == "True"
+wsgi_app = "ogsl_core.asgi:application" if SERVE_ASGI else "ogsl_core.wsgi:application"
+worker_class = "uvicorn_worker.UvicornWorker" if SERVE_ASGI else "sync"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Un seul worker par défaut, comme avant ce fichier : le plan gratuit de Render
+# n'a que 512 Mo. WEB_CONCURRENCY l'ajuste quand la mémoire le permet (ordre de
+# grandeur : un par cœur en ASGI, 2 × cœurs + 1 en workers synchrones)
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Les exports en flux et les grosses tuiles dépassent les 30 s par défaut
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recyclage périodique des workers (mémoire), décalé pour ne pas tous redémarrer ensemble
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
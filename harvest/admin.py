@@ -1 +1,31 @@
+from django.contrib import admin
+from .models import HarvestCheckpoint, HarvestRun
 
+
+# === HARVEST RUN ===
+@admin.register(HarvestRun)
+class HarvestRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "source", "status", "started_at", "duration_display",
+        "records_fetched", "records_created", "records_updated", "records_skipped",
+        "http_seconds", "parse_seconds", "db_seconds", "error_count",
+    )
+    list_filter = ("status", "source")
+    ordering = ("-started_at",)
+    date_hierarchy = "started_at"
+    readonly_fields = [f.name for f in HarvestRun._meta.fields]
+
+    @admin.display(description="Durée (s)")
+    def duration_display(self, obj):
+        return None if obj.duration is None else round(obj.duration, 1)
+
+    def has_add_permission(self, request):
+        return False
+
+
+# === HARVEST CHECKPOINT ===
+@admin.register(HarvestCheckpoint)
+class HarvestCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("source", "query", "watermark", "resume_id", "updated_at")
+    list_filter = ("source",)
+    ordering = ("-updated_at",)
@@ -0,0 +1,169 @@
+# harvest/canwin.py
+
+import asyncio
+import importlib.util
+import math
+import re
+from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse
+
+from bs4 import BeautifulSoup
+
+BASE_URL = "https://canwin-datahub.ad.umanitoba.ca"
+LIST_URL = f"{BASE_URL}/data/dataset"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/118.0 Safari/537.36"
+)
+
+# ——— Sélecteurs assez larges pour différents templates CKAN ———
+CARD_SELECTORS = ["div.dataset-item", "div.dataset", "div.card"]
+TITLE_SELECTORS = ["h3 a", "h2 a", "a.dataset-heading", "a[href*='/data/dataset/']"]
+DESC_SELECTORS = [".notes", ".dataset-description", "p"]
+
+# lxml est nettement plus rapide que html.parser quand il est installé
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+# ==============================================================
+# 🔎 Analyse HTML (sans navigateur)
+# ==============================================================
+def extract_cards(html, base_url=BASE_URL):
+    """Extrait les cartes de jeux de données d'une page liste CKAN."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    # trouver des “cards”
+    cards = []
+    for sel in CARD_SELECTORS:
+        found = soup.select(sel)
+        if found:
+            cards = found
+            break
+
+    scraped = []
+    for c in cards:
+        # titre + lien
+        a = None
+        for sel in TITLE_SELECTORS:
+            a = c.select_one(sel)
+            if a:
+                break
+        if not a:
+            continue
+
+        title = a.get_text(strip=True)
+        href = a.get("href", "").strip()
+        if not href:
+            continue
+        link = href if href.startswith("http") else (base_url + href)
+
+        # description (facultative)
+        desc = ""
+        for sel in DESC_SELECTORS:
+            d = c.select_one(sel)
+            if d:
+                desc = d.get_text(strip=True)
+                break
+
+        scraped.append({
+            "slug": link.rstrip("/").rsplit("/", 1)[-1],
+            "title": title,
+            "url": link,
+            "description": desc or "Aucune description disponible."
+        })
+    return scraped
+
+
+def discover_page_urls(html, list_url):
+    """URLs des pages 2..N, d'après le plus grand `page=` des liens de pagination."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    numbers = [
+        int(m.group(1))
+        for a in soup.select("a[href*='page=']")
+        if (m := re.search(r"[?&]page=(\d+)", a.get("href", "")))
+    ]
+    last = max(numbers, default=1)
+
+    parts = urlparse(list_url)
+    query = dict(parse_qsl(parts.query))
+    return [
+        urlunparse(parts._replace(query=urlencode({**query, "page": n})))
+        for n in range(2, last + 1)
+    ]
+
+
+# ==============================================================
+# 🌊 Rendu JS : un Chromium partagé, plusieurs pages en parallèle
+# ==============================================================
+class BrowserPool:
+    """
+    Un seul Chromium pour tout le moissonnage ; chaque rendu ouvre son
+    propre contexte (cookies et cache isolés) et au plus `size` pages
+    sont rendues en même temps. S'utilise avec `async with`.
+    """
+
+    def __init__(self, size=4, timeout=60000):
+        self.size = size
+        self.timeout = timeout
+        self.browser = None
+        self._playwright = None
+        self._slots = None
+
+    async def __aenter__(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=True)
+        self._slots = asyncio.Semaphore(self.size)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.browser.close()
+        await self._playwright.stop()
+
+    async def render(self, url):
+        """Retourne le HTML de `url` une fois les cartes présentes dans le DOM."""
+        from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+        async with self._slots:
+            context = await self.browser.new_context(user_agent=USER_AGENT)
+            try:
+                page = await context.new_page()
+                await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+                try:
+                    # Attente d'un signal réel du DOM plutôt qu'un délai fixe
+                    await page.wait_for_selector(", ".join(CARD_SELECTORS), timeout=self.timeout // 4)
+                except PlaywrightTimeout:
+                    pass  # page sans résultat : on rend ce qui est là
+                return await page.content()
+            finally:
+                await context.close()
+
+    async def render_all(self, urls):
+        """
+        (HTML rendus dans l'ordre, [(url, exception)]) : une page en échec
+        (délai dépassé…) n'interrompt pas le rendu des autres.
+        """
+        results = await asyncio.gather(*(self.render(url) for url in urls), return_exceptions=True)
+        pages = [r for r in results if not isinstance(r, BaseException)]
+        failures = [(url, r) for url, r in zip(urls, results) if isinstance(r, BaseException)]
+        return pages, failures
+
+
+async def render_listing(list_url=LIST_URL, max_results=100, concurrency=4):
+    """
+    Rend la page 1, en déduit les URLs de pagination nécessaires pour
+    atteindre `max_results`, puis rend ces pages en parallèle.
+    Retourne (HTML dans l'ordre des pages, [(url, exception)] des pages en
+    échec) ; seul un échec de la page 1 est fatal.
+    """
+    base_url = "{0.scheme}://{0.netloc}".format(urlparse(list_url))
+    async with BrowserPool(size=concurrency) as pool:
+        first = await pool.render(list_url)
+        per_page = len(extract_cards(first, base_url))
+        if not per_page or per_page >= max_results:
+            return [first], []
+
+        needed = math.ceil((max_results - per_page) / per_page)
+        urls = discover_page_urls(first, list_url)[:needed]
+        pages, failures = await pool.render_all(urls)
+        return [first, *pages], failures
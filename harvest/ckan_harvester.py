@@ -1,15 +1,27 @@
 # harvest/ckan_harvester.py
 
+import asyncio
+import hashlib
+import importlib.util
+import json
 import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 from datetime import datetime
-from catalog.models import Dataset, Source, Organization, Theme
-from asgiref.sync import sync_to_async
+from catalog.models import Source
+from django.conf import settings
+from django.db import transaction
+from harvest.canwin import LIST_URL, extract_cards, render_listing
+from harvest.fetch import (
+    ROWS_PER_PAGE, iter_ckan_pages, iter_dataverse_pages, make_session, package_key, parse_ckan_datetime,
+)
+from harvest.ingest import BulkIngestor
+from harvest.models import HarvestCheckpoint
+from harvest.timing import harvest_run
 
 # ==============================================================
 # 🔄 Routeur intelligent (choisit automatiquement la bonne méthode)
 # ==============================================================
-def harvest_ckan(source_id, query="", max_results=100):
+def harvest_ckan(source_id, query="", max_results=100, concurrency=None, full=False, resume=False):
     """Détermine automatiquement le type de source à moissonner"""
     try:
         source = Source.objects.get(id=source_id)
@@ -24,259 +36,259 @@ def harvest_ckan(source_id, query="", max_results=100):
     elif "boréalis" in name or "borealis" in name:
         return harvest_dataverse(source, query=query)
     else:
-        return harvest_standard_ckan(source, query, max_results)
+        return harvest_standard_ckan(source, query, max_results, concurrency, full, resume)
 
 
 # ==============================================================
 # 1️⃣ Moissonneur CKAN standard (OpenGouv, Données Québec)
 # ==============================================================
-def harvest_standard_ckan(source, query, max_results):
+def harvest_standard_ckan(source, query, max_results, concurrency=None, full=False, resume=False):
+    """
+    Moissonne `package_search` dans l'ordre (metadata_modified, id), par clé
+    plutôt que par offset (voir iter_ckan_pages).
+
+    L'état de chaque couple (source, requête) est tenu par HarvestCheckpoint :
+    - `watermark` : début de la dernière collecte complète ; sauf `full`,
+      seuls les paquets modifiés depuis sont demandés. Il n'avance qu'à la
+      fin d'une collecte complète : un paquet modifié pendant la collecte
+      sera relu la fois suivante ;
+    - `resume_modified` / `resume_id` : clé du dernier paquet validé, écrite
+      dans la même transaction que chaque page ; avec `resume`, une collecte
+      interrompue repart juste après.
+    """
     api_url = f"{source.base_url}/api/3/action/package_search"
-    total_imported = 0
-    start = 0
-    rows_per_page = 100
-
-    print(f"🌐 Début de la collecte depuis {api_url} (thème='{query}') ...")
+    concurrency = concurrency or settings.HARVEST_CONCURRENCY
+    checkpoint, _ = HarvestCheckpoint.objects.get_or_create(source=source, query=query)
+    since = None if full else checkpoint.watermark
+    after = None
+
+    if resume and checkpoint.resume_id:
+        after = (checkpoint.resume_modified, checkpoint.resume_id)
+        print(f"⏯️ Reprise après le paquet {checkpoint.resume_id}")
+    elif since:
+        print(f"🕒 Moissonnage incrémental depuis {since:%Y-%m-%d %H:%M:%S} UTC")
+
+    print(f"🌐 Début de la collecte depuis {api_url} (thème='{query}', {concurrency} requêtes parallèles) ...")
+
+    with harvest_run(source, query) as run:
+        ingestor = BulkIngestor(source)
+        try:
+            with make_session(pool_size=concurrency) as session:
+                pages = iter_ckan_pages(session, api_url, query, max_results, concurrency,
+                                        after=after, since=since)
+                while True:
+                    # Temps d'attente de la page suivante = temps réseau
+                    with run.timed("http"):
+                        results = next(pages, None)
+                    if results is None:
+                        break
 
-    try:
-        while total_imported < max_results:
-            params = {"q": query, "rows": rows_per_page, "start": start}
-            response = requests.get(api_url, params=params, timeout=40)
-
-            if response.status_code != 200:
-                print(f"❌ Erreur HTTP {response.status_code} à l’appel de {api_url}")
-                break
-
-            data = response.json()
-            results = data.get("result", {}).get("results", [])
-            if not results:
-                break
-
-            for item in results:
-                title = item.get("title", "Sans titre")
-                description = item.get("notes", "")
-                url = f"{source.base_url}/dataset/{item.get('name', '')}"
-                publication_date = item.get("metadata_created", None)
-
-                if publication_date:
-                    try:
-                        publication_date = datetime.strptime(publication_date[:10], "%Y-%m-%d").date()
-                    except Exception:
-                        publication_date = datetime.now().date()
-                else:
-                    publication_date = datetime.now().date()
-
-                org_data = item.get("organization")
-                organization = None
-                if org_data:
-                    organization, _ = Organization.objects.get_or_create(
-                        name=org_data.get("title", "Inconnue"),
-                        defaults={
-                            "description": org_data.get("description", ""),
-                            "website": f"{source.base_url}/organization/{org_data.get('name', '')}"
-                        }
-                    )
-
-                dataset, _ = Dataset.objects.get_or_create(
-                    title=title,
-                    defaults={
-                        "description": description,
-                        "url": url,
-                        "publication_date": publication_date,
-                        "source": source,
-                        "organization": organization,
-                    },
+                    with run.timed("parse"):
+                        records = [ckan_record(source, item) for item in results]
+                    modified, package_id = package_key(results[-1])
+                    # 📥 Une page = une transaction groupée (page + point de reprise)
+                    with run.timed("db"), transaction.atomic():
+                        ingestor.write_page(records)
+                        HarvestCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                            resume_modified=modified, resume_id=package_id,
+                        )
+
+                    run.records_fetched += len(results)
+                    _sync_counts(run, ingestor)
+                    run.save()
+                    print(f"📦 {run.records_fetched} jeux de données lus, "
+                          f"{ingestor.created + ingestor.updated} importés jusqu’ici depuis {source.name}...")
+
+            # Catalogue lu jusqu'au bout (pas seulement jusqu'au plafond) :
+            # le filigrane avance au début de la collecte, plus rien à reprendre
+            if run.records_fetched < max_results:
+                HarvestCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                    watermark=run.started_at, resume_modified=None, resume_id="",
                 )
 
-                for tag in item.get("tags", []):
-                    theme_name = tag.get("display_name", "Autre")
-                    theme, _ = Theme.objects.get_or_create(name=theme_name)
-                    dataset.themes.add(theme)
+        except requests.exceptions.HTTPError as e:
+            run.record_error(f"HTTP {e.response.status_code}")
+            print(f"❌ Erreur HTTP {e.response.status_code} à l’appel de {api_url}")
+        except requests.exceptions.RequestException as e:
+            run.record_error(e)
+            print(f"❌ Erreur de connexion à {api_url} : {e}")
 
-                total_imported += 1
-                if total_imported >= max_results:
-                    break
+        if ingestor.skipped:
+            print(f"⏭️ {ingestor.skipped} jeux de données inchangés ignorés.")
+        print(f"✅ Collecte terminée : {ingestor.created + ingestor.updated} jeux de données importés depuis {source.name}.")
 
-            print(f"📦 {total_imported} jeux de données importés jusqu’ici depuis {source.name}...")
-            start += rows_per_page
+    return run.as_stats()
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erreur de connexion à {api_url} : {e}")
 
-    print(f"✅ Collecte terminée : {total_imported} jeux de données importés depuis {source.name}.")
+def _sync_counts(run, ingestor):
+    """Reporte les compteurs de BulkIngestor sur le HarvestRun."""
+    run.records_created = ingestor.created
+    run.records_updated = ingestor.updated
+    run.records_skipped = ingestor.skipped
+
+
+def package_hash(item):
+    """Empreinte stable d'un paquet CKAN (toute modification la change)."""
+    payload = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def ckan_record(source, item):
+    """Convertit un paquet CKAN en enregistrement normalisé pour BulkIngestor."""
+    publication_date = item.get("metadata_created", None)
+    if publication_date:
+        try:
+            publication_date = datetime.strptime(publication_date[:10], "%Y-%m-%d").date()
+        except Exception:
+            publication_date = datetime.now().date()
+    else:
+        publication_date = datetime.now().date()
+
+    org_data = item.get("organization")
+    organization = None
+    if org_data:
+        organization = {
+            "name": org_data.get("title", "Inconnue"),
+            "description": org_data.get("description", ""),
+            "website": f"{source.base_url}/organization/{org_data.get('name', '')}",
+        }
+
+    return {
+        "external_id": item.get("name") or item.get("id"),
+        "title": item.get("title", "Sans titre"),
+        "description": item.get("notes") or "",
+        "url": f"{source.base_url}/dataset/{item.get('name', '')}",
+        "publication_date": publication_date,
+        "organization": organization,
+        "themes": [tag.get("display_name", "Autre") for tag in item.get("tags", [])],
+        "content_hash": package_hash(item),
+    }
 
 
 # ==============================================================
 # 2️⃣ Moissonneur Dataverse (Boréalis)
 # ==============================================================
-def harvest_dataverse(source, query=""):
+def harvest_dataverse(source, query="", max_results=None):
+    """
+    Parcourt toutes les pages de `/api/search` (start / total_count) et
+    écrit chaque page par lots via BulkIngestor : la mémoire reste bornée
+    à une page, quel que soit le nombre de jeux du Dataverse.
+    """
     print(f"🌐 Moissonnage Dataverse depuis {source.base_url} (thème='{query}') ...")
     api_url = f"{source.base_url}/api/search"
-    params = {"q": query, "type": "dataset", "per_page": 100}
 
-    try:
-        response = requests.get(api_url, params=params, timeout=40)
-        if response.status_code != 200:
-            print(f"❌ Erreur HTTP {response.status_code} à l’appel de {api_url}")
-            return
-
-        results = response.json().get("data", {}).get("items", [])
-        total_imported = 0
-
-        org, _ = Organization.objects.get_or_create(
-            name="Université du Québec à Rimouski (UQAR)",
-            defaults={"description": "Institut des sciences de la mer (ISMER)"}
-        )
-        theme, _ = Theme.objects.get_or_create(name="Écophysiologie marine")
-
-        for r in results:
-            Dataset.objects.get_or_create(
-                title=r.get("name", "Sans titre"),
-                defaults={
-                    "description": r.get("description", "Aucune description"),
-                    "url": r.get("url", source.base_url),
-                    "publication_date": datetime.now().date(),
-                    "source": source,
-                    "organization": org,
-                },
-            )
-            total_imported += 1
-
-        print(f"✅ {total_imported} jeux de données importés depuis {source.name} (Dataverse).")
-
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erreur de connexion à {api_url} : {e}")
+    with harvest_run(source, query) as run:
+        ingestor = BulkIngestor(source)
+        try:
+            with make_session(pool_size=1) as session:
+                pages = iter_dataverse_pages(session, api_url, query, max_results=max_results)
+                while True:
+                    with run.timed("http"):
+                        page = next(pages, None)
+                    if page is None:
+                        break
+                    start, items = page
+
+                    with run.timed("parse"):
+                        records = [dataverse_record(source, item) for item in items]
+                    with run.timed("db"):
+                        ingestor.write_page(records)
+
+                    run.records_fetched += len(items)
+                    _sync_counts(run, ingestor)
+                    run.save()
+                    print(f"📦 {run.records_fetched} jeux de données lus depuis {source.name} (Dataverse)...")
+
+        except requests.exceptions.HTTPError as e:
+            run.record_error(f"HTTP {e.response.status_code}")
+            print(f"❌ Erreur HTTP {e.response.status_code} à l’appel de {api_url}")
+        except requests.exceptions.RequestException as e:
+            run.record_error(e)
+            print(f"❌ Erreur de connexion à {api_url} : {e}")
+
+        print(f"✅ {ingestor.created + ingestor.updated} jeux de données importés depuis {source.name} (Dataverse).")
+
+    return run.as_stats()
+
+
+def dataverse_record(source, item):
+    """Convertit un résultat de recherche Dataverse en enregistrement pour BulkIngestor."""
+    published = parse_ckan_datetime((item.get("published_at") or "").replace("Z", "+00:00"))
+    return {
+        "external_id": item.get("global_id") or item.get("url"),
+        "title": item.get("name", "Sans titre"),
+        "description": item.get("description") or "Aucune description",
+        "url": item.get("url", source.base_url),
+        "publication_date": published.date() if published else datetime.now().date(),
+        "organization": {
+            "name": "Université du Québec à Rimouski (UQAR)",
+            "description": "Institut des sciences de la mer (ISMER)",
+            "website": None,
+        },
+        "themes": ["Écophysiologie marine"],
+        "content_hash": package_hash(item),
+    }
 
 
 # ==============================================================
 # 3️⃣ Moissonneur CanWin (Playwright — rendu JS) [VERSION SÛRE ORM]
 # ==============================================================
-def harvest_canwin_js(source, max_results=100):
+def harvest_canwin_js(source, max_results=100, concurrency=None, list_url=LIST_URL):
     """
-    Rend la page CanWin avec Playwright (headless), scrape les cartes,
-    puis **ferme le navigateur avant** d'écrire en base.
+    Rend les pages liste CanWin avec un Chromium partagé (plusieurs pages
+    en parallèle), analyse les cartes, puis **ferme le navigateur avant**
+    d'écrire en base.
     """
     print("🌊 Début de la collecte CanWin (rendu JS avec Playwright)...")
 
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
+    if importlib.util.find_spec("playwright") is None:
         print("❌ Playwright n'est pas installé. Fais: pip install playwright && python -m playwright install")
         return
 
-    base_url = "https://canwin-datahub.ad.umanitoba.ca"
-    list_url = f"{base_url}/data/dataset"
-    scraped = []  # <- on accumule ici les résultats (pas d'ORM pendant le scraping)
-
-    # ——— Sélecteurs assez larges pour différents templates CKAN ———
-    CARD_SELECTORS = ["div.dataset-item", "div.dataset", "div.card"]
-    TITLE_SELECTORS = ["h3 a", "h2 a", "a.dataset-heading", "a[href*='/data/dataset/']"]
-    DESC_SELECTORS = [".notes", ".dataset-description", "p"]
-
-    def extract_from_html(html):
-        soup = BeautifulSoup(html, "html.parser")
-        # trouver des “cards”
-        cards = []
-        for sel in CARD_SELECTORS:
-            found = soup.select(sel)
-            if found:
-                cards = found
-                break
-
-        for c in cards:
-            # titre + lien
-            a = None
-            for sel in TITLE_SELECTORS:
-                a = c.select_one(sel)
-                if a:
-                    break
-            if not a:
-                continue
-
-            title = a.get_text(strip=True)
-            href = a.get("href", "").strip()
-            if not href:
-                continue
-            link = href if href.startswith("http") else (base_url + href)
-
-            # description (facultative)
-            desc = ""
-            for sel in DESC_SELECTORS:
-                d = c.select_one(sel)
-                if d:
-                    desc = d.get_text(strip=True)
-                    break
-
-            scraped.append({
-                "title": title,
-                "url": link,
-                "description": desc or "Aucune description disponible."
-            })
-            if len(scraped) >= max_results:
-                break
-
-    # ——— Navigation Playwright ———
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/118.0 Safari/537.36"
-            )
-        )
-        page = context.new_page()
-
-        # 1) Page liste
-        page.goto(list_url, wait_until="domcontentloaded", timeout=60000)
-        page.wait_for_timeout(2000)
-        extract_from_html(page.content())
-
-        # 2) Pagination (si dispo)
-        while len(scraped) < max_results:
-            next_found = False
-            for sel in ["a[rel='next']", "li.next a", "a.next", "a:has-text('Next')", "a:has-text('Suivant')"]:
-                try:
-                    loc = page.locator(sel)
-                    if loc and loc.count() > 0:
-                        loc.first.click()
-                        page.wait_for_load_state("domcontentloaded", timeout=60000)
-                        page.wait_for_timeout(1200)
-                        extract_from_html(page.content())
-                        next_found = True
-                        break
-                except Exception:
-                    continue
-            if not next_found:
-                break
-
-        browser.close()
-
-    # ——— Écritures ORM **après** la fermeture du navigateur ———
-    if not scraped:
-        print("⚠️ Aucun jeu détecté sur CanWin (possible protection ou structure HTML différente).")
-        return
-
-    org, _ = Organization.objects.get_or_create(
-        name="University of Manitoba - CanWin Data Hub",
-        defaults={"description": "Plateforme canadienne des données sur le climat et l’eau."},
-    )
-    theme, _ = Theme.objects.get_or_create(name="Eau et climat")
-
-    created_count = 0
-    for item in scraped[:max_results]:
-        dataset, created = Dataset.objects.get_or_create(
-            title=item["title"],
-            defaults={
-                "description": item["description"],
-                "url": item["url"],
-                "publication_date": datetime.now().date(),
-                "source": source,
-                "organization": org,
-            },
-        )
-        if created:
-            dataset.themes.add(theme)
-            created_count += 1
-
-    print(f"✅ {created_count} jeux de données importés depuis CanWin (Playwright).")
+    concurrency = concurrency or settings.HARVEST_CONCURRENCY
+    base_url = "{0.scheme}://{0.netloc}".format(urlparse(list_url))
+
+    with harvest_run(source) as run:
+        # ——— Navigation Playwright ———
+        with run.timed("http"):
+            pages, failures = asyncio.run(render_listing(list_url, max_results, concurrency))
+        # Pages en échec journalisées ; celles rendues sont conservées
+        for url, error in failures:
+            run.record_error(f"{url} : {type(error).__name__}: {error}")
+            print(f"⚠️ Page CanWin non rendue ({url}) : {type(error).__name__}")
+
+        with run.timed("parse"):
+            scraped = [card for html in pages for card in extract_cards(html, base_url)]
+        scraped = scraped[:max_results]
+        run.records_fetched = len(scraped)
+
+        # ——— Écritures ORM **après** la fermeture du navigateur ———
+        if not scraped:
+            print("⚠️ Aucun jeu détecté sur CanWin (possible protection ou structure HTML différente).")
+            return run.as_stats()
+
+        ingestor = BulkIngestor(source)
+        with run.timed("db"):
+            for i in range(0, len(scraped), ROWS_PER_PAGE):
+                ingestor.write_page([canwin_record(item) for item in scraped[i:i + ROWS_PER_PAGE]])
+        _sync_counts(run, ingestor)
+
+        print(f"✅ {ingestor.created + ingestor.updated} jeux de données importés depuis CanWin (Playwright).")
+    return run.as_stats()
+
+
+def canwin_record(item):
+    """Convertit une carte CanWin en enregistrement pour BulkIngestor."""
+    return {
+        "external_id": item["slug"],
+        "title": item["title"],
+        "description": item["description"],
+        "url": item["url"],
+        "publication_date": datetime.now().date(),
+        "organization": {
+            "name": "University of Manitoba - CanWin Data Hub",
+            "description": "Plateforme canadienne des données sur le climat et l’eau.",
+            "website": None,
+        },
+        "themes": ["Eau et climat"],
+    }
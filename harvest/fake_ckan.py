@@ -0,0 +1,239 @@
+# harvest/fake_ckan.py
+
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Filtres `fq` produits par harvest.fetch.keyset_filter
+SINCE_FQ = re.compile(r"metadata_modified:\[(\S+)Z TO \*\]")
+AFTER_FQ = re.compile(r'metadata_modified:\{(\S+)Z TO \*\] OR \(metadata_modified:"(\S+)Z" AND id:\{"(\S+)" TO \*\]\)')
+
+
+# ==============================================================
+# 🧪 Faux serveurs CKAN / Dataverse / CanWin locaux (tests et bancs d'essai)
+# ==============================================================
+def make_packages(count, themes_per_package=3, organizations=20):
+    """Génère `count` paquets CKAN synthétiques et déterministes."""
+    packages = []
+    for i in range(count):
+        org = i % organizations
+        packages.append({
+            "id": f"pkg-{i:07d}",
+            "name": f"jeu-{i:07d}",
+            "title": f"Jeu de données {i}",
+            "notes": f"Description synthétique du jeu {i}.",
+            "metadata_created": "2024-01-15T10:00:00.000000",
+            "metadata_modified": "2024-06-01T12:00:00.000000",
+            "organization": {
+                "name": f"org-{org}",
+                "title": f"Organisation {org}",
+                "description": f"Producteur synthétique {org}",
+            },
+            "tags": [
+                {"display_name": f"Thème {(i + t) % 50}"}
+                for t in range(themes_per_package)
+            ],
+        })
+    return packages
+
+
+class FakeCKAN:
+    """
+    Sert `package_search` sur un port local à partir d'une liste de paquets.
+
+        with FakeCKAN(make_packages(1000)) as ckan:
+            Source.objects.create(name="Fake", base_url=ckan.base_url)
+    """
+
+    endpoint = "/api/3/action/package_search"
+    content_type = "application/json"
+
+    def __init__(self, packages, latency=0.0):
+        self.packages = packages
+        self.latency = latency  # délai simulé par requête (secondes)
+        self.failures = {}  # id de la clé `fq` ("" sans clé) -> nombre de réponses 503 à renvoyer
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0  # requêtes servies simultanément, au plus
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, comme un vrai CKAN
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != fake.endpoint:
+                    self.send_error(404)
+                    return
+
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                fake.requests.append(params)
+                with fake._lock:
+                    fake.in_flight += 1
+                    fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                try:
+                    self.respond_to(params)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def respond_to(self, params):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                after = fake.after(params)
+                if fake.failures.get(after, 0) > 0:
+                    fake.failures[after] -= 1
+                    self.send_error(503)
+                    return
+                body = fake.encode(fake.respond(params))
+
+                self.send_response(200)
+                self.send_header("Content-Type", fake.content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def encode(self, payload):
+        return json.dumps(payload).encode()
+
+    @staticmethod
+    def key(package):
+        """(date à la milliseconde, id) : l'ordre `metadata_modified asc, id asc` de Solr."""
+        modified = datetime.fromisoformat(package["metadata_modified"])
+        return modified.isoformat(timespec="milliseconds"), package["id"]
+
+    @staticmethod
+    def after(params):
+        match = AFTER_FQ.fullmatch(params.get("fq", ""))
+        return match.group(3) if match else ""
+
+    def respond(self, params):
+        start = int(params.get("start", 0))
+        rows = int(params.get("rows", 10))
+        packages = self.packages
+
+        # Sous-ensemble de la syntaxe Solr utilisée par le moissonneur
+        fq = params.get("fq", "")
+        since, after = SINCE_FQ.fullmatch(fq), AFTER_FQ.fullmatch(fq)
+        if since:
+            packages = [p for p in packages if self.key(p)[0] >= since.group(1)]
+        if after:
+            packages = [p for p in packages if self.key(p) > (after.group(1), after.group(3))]
+        if params.get("sort") == "metadata_modified asc, id asc":
+            packages = sorted(packages, key=self.key)
+
+        return {
+            "success": True,
+            "result": {
+                "count": len(packages),
+                "results": packages[start:start + rows],
+            },
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_dataverse_items(count):
+    """Génère `count` résultats synthétiques de l'API de recherche Dataverse."""
+    return [
+        {
+            "type": "dataset",
+            "name": f"Jeu Dataverse {i}",
+            "global_id": f"doi:10.5683/SP3/FAKE{i:06d}",
+            "url": f"https://doi.org/10.5683/SP3/FAKE{i:06d}",
+            "description": f"Description Dataverse {i}.",
+            "published_at": "2023-03-04T15:22:11Z",
+        }
+        for i in range(count)
+    ]
+
+
+class FakeDataverse(FakeCKAN):
+    """Sert `/api/search` (type=dataset) paginé par `start` / `per_page`."""
+
+    endpoint = "/api/search"
+
+    def respond(self, params):
+        start = int(params.get("start", 0))
+        per_page = int(params.get("per_page", 10))
+        items = self.packages[start:start + per_page]
+        return {
+            "status": "OK",
+            "data": {
+                "total_count": len(self.packages),
+                "start": start,
+                "count_in_response": len(items),
+                "items": items,
+            },
+        }
+
+
+def make_canwin_pages(count, per_page=20):
+    """Pages HTML statiques imitant la liste `/data/dataset` de CanWin (gabarit CKAN)."""
+    pages = []
+    total_pages = max(1, -(-count // per_page))
+    for number in range(1, total_pages + 1):
+        cards = "".join(
+            f'''<div class="dataset-item">
+                 <h3 class="dataset-heading"><a href="/data/dataset/canwin-{i:05d}">Jeu CanWin {i}</a></h3>
+                 <div class="notes">Description CanWin {i}.</div>
+               </div>'''
+            for i in range((number - 1) * per_page, min(number * per_page, count))
+        )
+        links = "".join(
+            f'<li><a href="/data/dataset?page={n}">{n}</a></li>'
+            for n in range(1, total_pages + 1)
+        )
+        pages.append(
+            f"<html><body><ul class=\"dataset-list\">{cards}</ul>"
+            f"<div class=\"pagination\"><ul>{links}</ul></div></body></html>"
+        )
+    return pages
+
+
+class FakeCanWin(FakeCKAN):
+    """Sert des pages HTML statiques sur `/data/dataset?page=N`."""
+
+    endpoint = "/data/dataset"
+    content_type = "text/html; charset=utf-8"
+
+    def encode(self, payload):
+        return payload.encode("utf-8")
+
+    def respond(self, params):
+        number = int(params.get("page", 1))
+        if 1 <= number <= len(self.packages):
+            return self.packages[number - 1]
+        return "<html><body></body></html>"
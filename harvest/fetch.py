@@ -0,0 +1,222 @@
+# harvest/fetch.py
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ROWS_PER_PAGE = 100
+
+
+# ==============================================================
+# 🌐 Session HTTP partagée (réutilisation des connexions TLS)
+# ==============================================================
+def make_session(pool_size=10, retries=None, backoff=None):
+    """
+    Session requests avec un pool de connexions dimensionné pour `pool_size`
+    fils. Les erreurs transitoires (connexion, 429, 5xx) sont réessayées
+    `retries` fois avec un délai exponentiel : backoff, 2×backoff, 4×backoff…
+    """
+    retry = Retry(
+        total=settings.HARVEST_MAX_RETRIES if retries is None else retries,
+        backoff_factor=settings.HARVEST_RETRY_BACKOFF if backoff is None else backoff,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_ckan_page(session, api_url, query, start, rows=ROWS_PER_PAGE, filters=None):
+    """Récupère une page de `package_search` et retourne le bloc `result`."""
+    params = {"q": query, "rows": rows, "start": start, **(filters or {})}
+    response = session.get(api_url, params=params, timeout=40)
+    response.raise_for_status()
+    return response.json().get("result", {})
+
+
+# ==============================================================
+# 🔑 Clé de parcours CKAN : (metadata_modified, id)
+# ==============================================================
+CKAN_SORT = "metadata_modified asc, id asc"
+
+
+def parse_ckan_datetime(value):
+    """Convertit un `metadata_modified` CKAN (UTC sans fuseau) en datetime aware."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def solr_date(value):
+    """Formate un datetime pour Solr (UTC, à la milliseconde comme les dates indexées)."""
+    value = value.astimezone(dt_timezone.utc)
+    return f"{value:%Y-%m-%dT%H:%M:%S}.{value.microsecond // 1000:03d}Z"
+
+
+def package_key(item):
+    """Position d'un paquet dans l'ordre CKAN_SORT."""
+    return parse_ckan_datetime(item.get("metadata_modified")), item.get("id")
+
+
+def keyset_filter(after=None, since=None):
+    """
+    `fq` Solr : paquets strictement après la clé `after` (date, id), sinon
+    modifiés depuis `since`, sinon aucun filtre.
+    """
+    if after:
+        modified, package_id = solr_date(after[0]), after[1]
+        return (f'metadata_modified:{{{modified} TO *] OR '
+                f'(metadata_modified:"{modified}" AND id:{{"{package_id}" TO *])')
+    if since:
+        return f"metadata_modified:[{solr_date(since)} TO *]"
+    return None
+
+
+# ==============================================================
+# ⚡ Pages CKAN en parallèle, livrées dans l'ordre
+# ==============================================================
+def _submit_window(pool, session, api_url, query, after, pages, rows):
+    """
+    Planifie `pages` requêtes après la clé `after`. La page 0 part du début
+    du filtre ; chaque page suivante recouvre d'un paquet la précédente pour
+    vérifier que rien n'a glissé entre les deux lectures.
+    """
+    filters = {"sort": CKAN_SORT}
+    fq = keyset_filter(after)
+    if fq:
+        filters["fq"] = fq
+    return [
+        pool.submit(fetch_ckan_page, session, api_url, query,
+                    max(0, k * rows - 1), rows + (1 if k else 0), filters)
+        for k in range(pages)
+    ]
+
+
+def _collect_window(window, rows):
+    """
+    Pages vérifiées d'une fenêtre, dans l'ordre, et un booléen « fin atteinte ».
+
+    La fenêtre est coupée à la première page dont le paquet de recouvrement
+    ne correspond pas (paquet modifié ou supprimé entre deux lectures) :
+    la fenêtre suivante repartira de la clé de la dernière page vérifiée.
+    """
+    pages = []
+    for k, future in enumerate(window):
+        results = future.result().get("results", [])
+        if k:
+            if not results or package_key(results[0]) != package_key(pages[-1][-1]):
+                for rest in window[k:]:
+                    rest.cancel()
+                return pages, False
+            results = results[1:]
+        if results:
+            pages.append(results)
+        if len(results) < rows:
+            for rest in window[k + 1:]:
+                rest.cancel()
+            return pages, True
+    return pages, False
+
+
+def iter_ckan_pages(session, api_url, query="", max_results=100, concurrency=4,
+                    rows=ROWS_PER_PAGE, after=None, since=None):
+    """
+    Génère les pages de `package_search` (listes de paquets) dans l'ordre
+    (metadata_modified, id), après la clé `after` ou depuis la date `since`.
+
+    La première page est lue seule pour connaître le `count` annoncé par
+    CKAN, qui borne la collecte avec `max_results`. Les pages suivantes
+    sont lues par fenêtres de `concurrency` requêtes en vol, chaque fenêtre
+    filtrée (`fq`) à partir de la clé du dernier paquet lu : un paquet
+    modifié pendant la collecte passe en fin d'ordre sans décaler les
+    suivants, contrairement à une pagination par `start=`. La fenêtre
+    suivante est demandée pendant que le consommateur écrit celle-ci :
+    au plus deux fenêtres de pages en mémoire.
+    """
+    concurrency = max(1, concurrency)
+    filters = {"sort": CKAN_SORT}
+    fq = keyset_filter(after, since)
+    if fq:
+        filters["fq"] = fq
+    first = fetch_ckan_page(session, api_url, query, 0, rows, filters)
+    remaining = min(first.get("count", 0), max_results)
+    page = first.get("results", [])[:remaining]
+    if not page:
+        return
+    remaining -= len(page)
+    done = remaining <= 0 or len(first.get("results", [])) < rows
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pages = [page]
+        while True:
+            window = None
+            if not done:
+                needed = min(concurrency, math.ceil(remaining / rows))
+                window = _submit_window(pool, session, api_url, query, package_key(pages[-1][-1]), needed, rows)
+            try:
+                yield from pages
+            except GeneratorExit:
+                for future in window or []:
+                    future.cancel()
+                raise
+            if window is None:
+                return
+
+            pages, done = _collect_window(window, rows)
+            pages = _cap(pages, remaining)
+            remaining -= sum(len(p) for p in pages)
+            if not pages:
+                return
+            done = done or remaining <= 0
+
+
+def _cap(pages, remaining):
+    """Tronque les pages pour ne pas dépasser `remaining` paquets."""
+    capped = []
+    for page in pages:
+        if remaining <= 0:
+            break
+        capped.append(page[:remaining])
+        remaining -= len(capped[-1])
+    return capped
+
+
+# ==============================================================
+# 📚 Pages Dataverse (recherche paginée par start / total_count)
+# ==============================================================
+def iter_dataverse_pages(session, api_url, query="", per_page=ROWS_PER_PAGE, max_results=None):
+    """
+    Génère `(start, items)` page par page jusqu'à `total_count`.
+
+    Une seule page est en mémoire à la fois : le consommateur l'écrit
+    avant que la suivante ne soit demandée.
+    """
+    start = 0
+    while max_results is None or start < max_results:
+        params = {"q": query or "*", "type": "dataset", "per_page": per_page, "start": start}
+        response = session.get(api_url, params=params, timeout=40)
+        response.raise_for_status()
+        data = response.json().get("data", {})
+
+        items = data.get("items", [])
+        if max_results is not None:
+            items = items[:max_results - start]
+        if not items:
+            return
+        yield start, items
+
+        start += len(items)
+        if start >= data.get("total_count", 0):
+            return
@@ -0,0 +1,230 @@
+# harvest/ingest.py
+
+from django.db import transaction
+from catalog.aggregates import refresh_source_counts, refresh_theme_counts
+from catalog.cache import DATASETS_TAG, invalidate_tags, source_tag
+from catalog.geo import geo_cell
+from catalog.search import document, write_documents
+from catalog.versioning import bump_catalog_version
+from catalog.models import Dataset, Organization, Theme
+
+# Champs mis à jour lorsqu'un jeu de données existe déjà (upsert)
+DATASET_UPDATE_FIELDS = [
+    "title",
+    "description",
+    "url",
+    "publication_date",
+    "source",
+    "organization",
+    "content_hash",
+    "last_update",
+]
+# Ajoutés à l'upsert quand la page porte des coordonnées
+GEO_UPDATE_FIELDS = ["latitude", "longitude", "geo_cell"]
+
+
+# ==============================================================
+# 📥 Étape d'écriture par lots (une transaction par page)
+# ==============================================================
+class BulkIngestor:
+    """
+    Écrit une page d'enregistrements normalisés en base avec quelques
+    requêtes groupées au lieu d'un get_or_create par ligne.
+
+    Chaque enregistrement est un dict :
+        {"external_id", "title", "description", "url", "publication_date",
+         "organization": {"name", "description", "website"} | None,
+         "themes": [noms de thèmes],
+         "content_hash": empreinte du paquet (facultative),
+         "latitude", "longitude": coordonnées (facultatives)}
+
+    Les jeux de données sont identifiés par la clé naturelle
+    (source, external_id). Les organisations et les thèmes sont résolus
+    à partir de dictionnaires en mémoire chargés une seule fois par
+    moissonnage. Les empreintes, elles, sont lues page par page (une
+    requête sur les clés de la page) puis oubliées : la mémoire ne croît
+    pas avec la taille de la source.
+    Un enregistrement dont l'empreinte n'a pas changé est ignoré sans
+    écriture. La clé spatiale `geo_cell` est calculée ici, les
+    bulk_create ne passant pas par Dataset.save().
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.organizations = dict(Organization.objects.values_list("name", "id"))
+        self.themes = dict(Theme.objects.values_list("name", "id"))
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+
+    def write_page(self, records):
+        """Écrit une page et retourne le nombre de jeux de données écrits."""
+        records = self._dedupe(records)
+        if not records:
+            return 0
+        # Clés de la page déjà présentes pour la source → empreinte ("" si inconnue)
+        hashes = dict(
+            Dataset.objects.filter(source=self.source, external_id__in=[r["external_id"] for r in records])
+            .values_list("external_id", "content_hash")
+        )
+        changed = [r for r in records if not self._unchanged(r, hashes)]
+        self.skipped += len(records) - len(changed)
+        records = changed
+        if not records:
+            return 0
+
+        with transaction.atomic():
+            self._create_missing_organizations(records)
+            self._create_missing_themes(records)
+            datasets = self._upsert_datasets(records)
+            dropped = self._unlink_dropped_themes(datasets, records, hashes)
+            self._link_themes(datasets, records)
+            # Les bulk_create n'émettent pas de signaux : index et compteurs à la main
+            self._index(datasets, records)
+            refresh_source_counts([self.source.pk])
+            refresh_theme_counts({self.themes[n] for r in records for n in r.get("themes", [])} | dropped)
+            # Nouvelle version (ETag) et cache serveur périmé pour cette source
+            bump_catalog_version()
+            invalidate_tags(DATASETS_TAG, source_tag(self.source.pk))
+
+        updated = sum(1 for r in records if r["external_id"] in hashes)
+        self.updated += updated
+        self.created += len(records) - updated
+        return len(datasets)
+
+    # ----------------------------------------------------------
+    # Étapes internes
+    # ----------------------------------------------------------
+    @staticmethod
+    def _dedupe(records):
+        """Garde le premier enregistrement pour chaque clé externe de la page."""
+        seen = {}
+        for record in records:
+            seen.setdefault(record["external_id"], record)
+        return list(seen.values())
+
+    @staticmethod
+    def _unchanged(record, hashes):
+        digest = record.get("content_hash")
+        return bool(digest) and hashes.get(record["external_id"]) == digest
+
+    def _create_missing_organizations(self, records):
+        missing = {}
+        for record in records:
+            org = record.get("organization")
+            if org and org["name"] not in self.organizations:
+                missing.setdefault(org["name"], org)
+        if not missing:
+            return
+
+        created = Organization.objects.bulk_create(
+            [
+                Organization(
+                    name=name,
+                    description=org.get("description", ""),
+                    website=org.get("website"),
+                )
+                for name, org in missing.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["name"],
+        )
+        self.organizations.update({o.name: o.id for o in created})
+
+    def _create_missing_themes(self, records):
+        missing = {
+            name
+            for record in records
+            for name in record.get("themes", [])
+            if name not in self.themes
+        }
+        if not missing:
+            return
+
+        created = Theme.objects.bulk_create(
+            [Theme(name=name) for name in sorted(missing)],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["name"],
+        )
+        self.themes.update({t.name: t.id for t in created})
+
+    def _upsert_datasets(self, records):
+        datasets = []
+        for record in records:
+            org = record.get("organization")
+            lat, lon = record.get("latitude"), record.get("longitude")
+            datasets.append(Dataset(
+                external_id=record["external_id"],
+                title=record["title"],
+                description=record["description"],
+                url=record["url"],
+                publication_date=record["publication_date"],
+                source=self.source,
+                organization_id=self.organizations[org["name"]] if org else None,
+                content_hash=record.get("content_hash", ""),
+                latitude=lat,
+                longitude=lon,
+                geo_cell=geo_cell(lat, lon),
+            ))
+
+        # Une page sans coordonnées ne doit pas effacer celles déjà en base
+        update_fields = DATASET_UPDATE_FIELDS
+        if any("latitude" in r or "longitude" in r for r in records):
+            update_fields = DATASET_UPDATE_FIELDS + GEO_UPDATE_FIELDS
+
+        return Dataset.objects.bulk_create(
+            datasets,
+            update_conflicts=True,
+            unique_fields=["source", "external_id"],
+            update_fields=update_fields,
+        )
+
+    def _index(self, datasets, records):
+        # Documents construits depuis la page : aucune relecture en base
+        write_documents([
+            document(
+                dataset.id, record["title"], record["description"],
+                (record.get("organization") or {}).get("name"), set(record.get("themes", [])),
+            )
+            for dataset, record in zip(datasets, records)
+        ])
+
+    def _unlink_dropped_themes(self, datasets, records, hashes):
+        """
+        Jeux déjà en base : retire les liens vers les thèmes que le paquet
+        ne porte plus. Retourne les thèmes concernés (compteurs à recalculer).
+        """
+        Through = Dataset.themes.through
+        updated = [
+            (dataset.id, record) for dataset, record in zip(datasets, records)
+            if record["external_id"] in hashes
+        ]
+        if not updated:
+            return set()
+        wanted = {
+            (dataset_id, self.themes[name])
+            for dataset_id, record in updated
+            for name in record.get("themes", [])
+        }
+        stale = [
+            (pk, theme_id)
+            for pk, dataset_id, theme_id in Through.objects.filter(
+                dataset_id__in=[dataset_id for dataset_id, _ in updated]
+            ).values_list("id", "dataset_id", "theme_id")
+            if (dataset_id, theme_id) not in wanted
+        ]
+        if stale:
+            Through.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+        return {theme_id for _, theme_id in stale}
+
+    def _link_themes(self, datasets, records):
+        Through = Dataset.themes.through
+        links = [
+            Through(dataset_id=dataset.id, theme_id=self.themes[name])
+            for dataset, record in zip(datasets, records)
+            for name in set(record.get("themes", []))
+        ]
+        if links:
+            Through.objects.bulk_create(links, ignore_conflicts=True)
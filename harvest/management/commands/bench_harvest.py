@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+
+import requests
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from catalog.models import Dataset, Source, Organization, Theme
+from harvest.ckan_harvester import ckan_record, harvest_standard_ckan
+from harvest.fake_ckan import FakeCKAN, make_packages
+
+
+@contextmanager
+def signals_muted():
+    """
+    Récepteurs ORM débranchés le temps du bloc : le chemin de référence
+    s'exécute comme avant l'ajout des signaux du catalogue (compteurs,
+    index plein texte, version), qui le ralentiraient à chaque ligne.
+    """
+    signals = (pre_save, post_save, m2m_changed, post_delete)
+    saved = [signal.receivers for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in zip(signals, saved):
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def harvest_rowwise(source, max_results):
+    """Chemin de référence : un get_or_create par ligne (comportement historique)."""
+    api_url = f"{source.base_url}/api/3/action/package_search"
+    packages = []
+    for start in range(0, max_results, 100):
+        response = requests.get(api_url, params={"q": "", "rows": 100, "start": start}, timeout=40)
+        packages.extend(response.json()["result"]["results"])
+
+    for item in packages:
+        record = ckan_record(source, item)
+        organization = None
+        if record["organization"]:
+            org = record["organization"]
+            organization, _ = Organization.objects.get_or_create(
+                name=org["name"],
+                defaults={"description": org["description"], "website": org["website"]},
+            )
+        dataset, _ = Dataset.objects.get_or_create(
+            title=record["title"],
+            defaults={
+                "description": record["description"],
+                "url": record["url"],
+                "publication_date": record["publication_date"],
+                "source": source,
+                "organization": organization,
+            },
+        )
+        for name in record["themes"]:
+            theme, _ = Theme.objects.get_or_create(name=name)
+            dataset.themes.add(theme)
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit (lignes/s) du moissonneur CKAN contre un faux CKAN local."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--packages", type=int, default=2000)
+        parser.add_argument("--themes-per-package", type=int, default=3)
+
+    def handle(self, *args, **options):
+        packages = make_packages(options["packages"], options["themes_per_package"])
+
+        # Base de test jetable : le banc d'essai ne touche jamais la vraie base
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with FakeCKAN(packages) as ckan:
+                with signals_muted():
+                    before = self._run("avant (get_or_create, sans signaux)", ckan,
+                                       lambda s: harvest_rowwise(s, len(packages)))
+                after = self._run("après (bulk upsert)", ckan, lambda s: harvest_standard_ckan(s, "", len(packages)))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"⚡ Gain du traitement par lots : x{after / before:.1f}")
+
+    def _run(self, label, ckan, harvest):
+        Dataset.objects.all().delete()
+        Organization.objects.all().delete()
+        Theme.objects.all().delete()
+        Source.objects.all().delete()
+        source = Source.objects.create(name="Fake CKAN", base_url=ckan.base_url)
+
+        started = time.perf_counter()
+        harvest(source)
+        elapsed = time.perf_counter() - started
+
+        rows = Dataset.objects.count()
+        rate = rows / elapsed if elapsed else 0.0
+        self.stdout.write(f"⏱️ {label} : {rows} lignes en {elapsed:.2f} s → {rate:,.0f} lignes/s")
+        return rate
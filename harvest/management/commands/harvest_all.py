@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from catalog.models import Source
+from harvest.orchestrator import harvest_all
+
+
+class Command(BaseCommand):
+    help = "Moissonne toutes les sources actives en parallèle (un processus par source)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--query", default="")
+        parser.add_argument("--max-results", type=int, default=100)
+        parser.add_argument("--timeout", type=float, default=settings.HARVEST_SOURCE_TIMEOUT,
+                            help="Délai maximal par source, en secondes.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Nombre de sources moissonnées simultanément (toutes par défaut).")
+        parser.add_argument("--resume", action="store_true",
+                            help="Reprendre les collectes CKAN au dernier point de reprise.")
+
+    def handle(self, *args, **options):
+        sources = list(Source.objects.filter(is_active=True).order_by("name"))
+        if not sources:
+            self.stdout.write("⚠️ Aucune source active.")
+            return
+
+        started = time.monotonic()
+        results = harvest_all(
+            sources,
+            query=options["query"],
+            max_results=options["max_results"],
+            timeout=options["timeout"],
+            workers=options["workers"],
+            options={"resume": True} if options["resume"] else None,
+        )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'Source':<25} {'Statut':<8} {'Durée (s)':>10} {'Lus':>8} {'Écrits':>8} {'Erreurs':>8}")
+        self.stdout.write("-" * 72)
+        for r in results:
+            self.stdout.write(
+                f"{r['source'][:25]:<25} {r['status']:<8} {r['duration']:>10.1f} "
+                f"{r['fetched']:>8} {r['written']:>8} {r['errors']:>8}"
+            )
+        for r in results:
+            if r["error"]:
+                self.stdout.write(self.style.ERROR(f"❌ {r['source']} : {r['error']}"))
+
+        self.stdout.write(f"⏱️ Durée totale : {time.monotonic() - started:.1f} s")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalog', '0004_dataset_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('success', 'Réussi'), ('partial', 'Terminé avec erreurs'), ('failed', 'Échoué')], default='running', max_length=10)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('records_fetched', models.PositiveIntegerField(default=0)),
+                ('records_created', models.PositiveIntegerField(default=0)),
+                ('records_updated', models.PositiveIntegerField(default=0)),
+                ('records_skipped', models.PositiveIntegerField(default=0)),
+                ('http_seconds', models.FloatField(default=0.0)),
+                ('parse_seconds', models.FloatField(default=0.0)),
+                ('db_seconds', models.FloatField(default=0.0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='harvest_runs', to='catalog.source')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['source', '-started_at'], name='harvest_har_source__da8939_idx')],
+            },
+        ),
+    ]
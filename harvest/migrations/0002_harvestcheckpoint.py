@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_dataset_external_id'),
+        ('harvest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, max_length=255)),
+                ('start', models.PositiveIntegerField(default=0)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='harvest_checkpoints', to='catalog.source')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'query'), name='checkpoint_source_query_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+def move_source_watermarks(apps, schema_editor):
+    """Le filigrane par source devient celui de la requête vide de chaque source."""
+    Source = apps.get_model("catalog", "Source")
+    HarvestCheckpoint = apps.get_model("harvest", "HarvestCheckpoint")
+    for source_id, watermark in Source.objects.exclude(harvest_watermark=None).values_list("id", "harvest_watermark"):
+        HarvestCheckpoint.objects.update_or_create(
+            source_id=source_id, query="", defaults={"watermark": watermark},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_catalogversion'),
+        ('harvest', '0002_harvestcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='harvestcheckpoint',
+            name='start',
+        ),
+        migrations.AddField(
+            model_name='harvestcheckpoint',
+            name='resume_id',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='harvestcheckpoint',
+            name='resume_modified',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_source_watermarks, migrations.RunPython.noop),
+    ]
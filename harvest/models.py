@@ -1,3 +1,96 @@
+import time
+from contextlib import contextmanager
+
 from django.db import models
+from catalog.models import Source
+
+
+class HarvestRun(models.Model):
+    """Exécution d'un moissonnage : volumes traités et temps passé par étape"""
+    STATUS_CHOICES = [
+        ("running", "En cours"),
+        ("success", "Réussi"),
+        ("partial", "Terminé avec erreurs"),
+        ("failed", "Échoué"),
+    ]
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="harvest_runs")
+    query = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="running")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Volumes
+    records_fetched = models.PositiveIntegerField(default=0)
+    records_created = models.PositiveIntegerField(default=0)
+    records_updated = models.PositiveIntegerField(default=0)
+    records_skipped = models.PositiveIntegerField(default=0)
+
+    # Temps cumulés par étape (secondes)
+    http_seconds = models.FloatField(default=0.0)
+    parse_seconds = models.FloatField(default=0.0)
+    db_seconds = models.FloatField(default=0.0)
+
+    error_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [models.Index(fields=["source", "-started_at"])]
+
+    def __str__(self):
+        return f"{self.source} — {self.started_at:%Y-%m-%d %H:%M}"
+
+    @property
+    def duration(self):
+        if not self.finished_at:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def records_per_second(self):
+        if not self.duration:
+            return None
+        return self.records_fetched / self.duration
+
+    @contextmanager
+    def timed(self, stage):
+        """Ajoute la durée du bloc au compteur `<stage>_seconds` (http, parse, db)."""
+        field = f"{stage}_seconds"
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, field, getattr(self, field) + time.perf_counter() - started)
+
+    def record_error(self, message):
+        self.error_count += 1
+        self.last_error = str(message)
+
+    def as_stats(self):
+        """Résumé retourné par les moissonneurs (utilisé par `harvest_all`)."""
+        return {
+            "fetched": self.records_fetched,
+            "written": self.records_created + self.records_updated,
+            "errors": self.error_count,
+        }
+
+
+class HarvestCheckpoint(models.Model):
+    """État de moissonnage d'une (source, requête) : filigrane et point de reprise"""
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="harvest_checkpoints")
+    query = models.CharField(max_length=255, blank=True)
+    # Début de la dernière collecte complète : seuls les paquets modifiés depuis sont redemandés
+    watermark = models.DateTimeField(null=True, blank=True)
+    # Clé (metadata_modified, id) du dernier paquet validé d'une collecte inachevée
+    resume_modified = models.DateTimeField(null=True, blank=True)
+    resume_id = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "query"], name="checkpoint_source_query_uniq"),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.source} — après {self.resume_id or '∅'}"
@@ -0,0 +1,112 @@
+# harvest/orchestrator.py
+
+import multiprocessing
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+
+# ==============================================================
+# 🚀 Moissonnage de plusieurs sources en parallèle
+# ==============================================================
+def harvest_source(source_id, query, max_results, **options):
+    """Cible par défaut d'un processus : moissonne une seule source."""
+    from harvest.ckan_harvester import harvest_ckan
+
+    return harvest_ckan(source_id, query=query, max_results=max_results, **options)
+
+
+def _child(target, source_id, query, max_results, options, conn):
+    """Point d'entrée du processus enfant : le résultat repart par le tube."""
+    try:
+        stats = target(source_id, query, max_results, **options) or {}
+        conn.send({"status": "ok", **stats})
+    except BaseException as e:
+        traceback.print_exc()
+        conn.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+        connections.close_all()
+
+
+def _close_killed_run(source, error):
+    """
+    Un enfant tué ne clôt pas son HarvestRun : celui resté « running » pour
+    la source (une seule exécution par source ici) est marqué échoué.
+    """
+    from harvest.models import HarvestRun
+
+    HarvestRun.objects.filter(source_id=source.id, status="running").update(
+        status="failed", finished_at=timezone.now(), last_error=error, error_count=F("error_count") + 1,
+    )
+
+
+def harvest_all(sources, query="", max_results=100, timeout=3600, workers=None,
+                target=harvest_source, options=None):
+    """
+    Lance une source par processus, `workers` à la fois (toutes par défaut).
+
+    Chaque source est isolée : une exception ou un dépassement de
+    `timeout` (secondes, processus tué) n'affecte que sa propre ligne.
+    `options` est transmis tel quel à `target` (ex. {"resume": True}).
+    Retourne une liste de dicts : source, status, duration, fetched,
+    written, errors, error.
+    """
+    sources = list(sources)
+    workers = workers or len(sources) or 1
+    # Les connexions ouvertes ne doivent pas être partagées avec les enfants
+    connections.close_all()
+
+    ctx = multiprocessing.get_context("fork")
+    pending = list(sources)
+    running = {}  # tube parent -> (source, processus, début)
+    results = {}
+
+    def finish(source, started, **result):
+        results[source.id] = {
+            "source": source.name,
+            "duration": time.monotonic() - started,
+            "fetched": result.pop("fetched", 0),
+            "written": result.pop("written", 0),
+            "errors": result.pop("errors", 0),
+            "error": result.pop("error", ""),
+            "status": result.pop("status"),
+        }
+
+    while pending or running:
+        while pending and len(running) < workers:
+            source = pending.pop(0)
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=_child,
+                args=(target, source.id, query, max_results, options or {}, child_conn),
+                name=f"harvest-{source.name}",
+            )
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (source, process, time.monotonic())
+
+        for conn in wait(list(running), timeout=0.1):
+            source, process, started = running.pop(conn)
+            try:
+                message = conn.recv()
+            except EOFError:
+                message = {"status": "error", "error": "processus terminé sans résultat"}
+            process.join()
+            finish(source, started, **message)
+
+        now = time.monotonic()
+        for conn, (source, process, started) in list(running.items()):
+            if now - started > timeout:
+                process.terminate()
+                process.join()
+                del running[conn]
+                error = f"délai de {timeout} s dépassé"
+                _close_killed_run(source, error)
+                finish(source, started, status="timeout", error=error)
+
+    return [results[s.id] for s in sources]
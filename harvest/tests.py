@@ -1,3 +1,481 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.geo import geo_cell
+from catalog.models import Dataset, Source, Organization, Theme
+from catalog.search import search
+from harvest.ckan_harvester import ckan_record, harvest_canwin_js, harvest_dataverse, harvest_standard_ckan
+from harvest.canwin import BrowserPool, discover_page_urls, extract_cards
+from harvest.fake_ckan import (
+    FakeCKAN, FakeCanWin, FakeDataverse, make_canwin_pages, make_dataverse_items, make_packages,
+)
+from harvest.fetch import iter_ckan_pages, make_session, solr_date
+from harvest.ingest import BulkIngestor
+from harvest.models import HarvestCheckpoint, HarvestRun
+from harvest.orchestrator import harvest_all
+
+
+class BulkIngestorTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def test_page_is_written_with_a_bounded_number_of_queries(self):
+        records = [ckan_record(self.source, p) for p in make_packages(100)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            BulkIngestor(self.source).write_page(records)
+
+        # Quelques requêtes groupées par page, quel que soit le nombre de lignes
+        self.assertLess(len(ctx), 15)
+        self.assertEqual(Dataset.objects.count(), 100)
+        self.assertEqual(Dataset.themes.through.objects.count(), 300)
+
+    def test_rewrite_updates_instead_of_duplicating(self):
+        packages = make_packages(20)
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in packages])
+
+        packages[0]["notes"] = "Nouvelle description"
+        records = [ckan_record(self.source, p) for p in packages]
+        BulkIngestor(self.source).write_page(records)
+
+        self.assertEqual(Dataset.objects.count(), 20)
+        self.assertEqual(Organization.objects.count(), 20)
+        self.assertEqual(
+            Dataset.objects.get(title=records[0]["title"]).description,
+            "Nouvelle description",
+        )
+
+    def test_dropped_tags_are_unlinked_on_rewrite(self):
+        packages = make_packages(2, themes_per_package=3)
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in packages])
+        kept, dropped = packages[0]["tags"][0]["display_name"], packages[0]["tags"][1]["display_name"]
+
+        packages[0]["tags"] = packages[0]["tags"][:1]
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in packages])
+
+        dataset = Dataset.objects.get(external_id=packages[0]["name"])
+        self.assertEqual([t.name for t in dataset.themes.all()], [kept])
+        self.assertEqual(Theme.objects.get(name=dropped).dataset_count, 1)  # encore porté par packages[1]
+        self.assertEqual(Dataset.themes.through.objects.count(), 4)
+
+    def test_coordinates_set_spatial_key_and_are_kept_when_absent(self):
+        packages = make_packages(2)
+        located = [{**ckan_record(self.source, p), "latitude": 48.45, "longitude": -68.52} for p in packages]
+        BulkIngestor(self.source).write_page(located)
+
+        packages[0]["notes"] = "Sans coordonnées"
+        BulkIngestor(self.source).write_page([ckan_record(self.source, packages[0])])
+
+        dataset = Dataset.objects.get(external_id=located[0]["external_id"])
+        self.assertEqual((dataset.latitude, dataset.longitude), (48.45, -68.52))
+        self.assertEqual(dataset.geo_cell, geo_cell(48.45, -68.52))
+
+    def test_written_pages_are_searchable(self):
+        packages = make_packages(3)
+        packages[1]["title"] = "Salinité de l'estuaire"
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in packages])
+
+        self.assertEqual([d.title for d in search("salinite")[:10]], ["Salinité de l'estuaire"])
+
+
+class HarvestStandardCkanTests(TestCase):
+    def test_harvest_from_fake_ckan_respects_max_results(self):
+        with FakeCKAN(make_packages(250)) as ckan:
+            source = Source.objects.create(name="Fake", base_url=ckan.base_url)
+            stats = harvest_standard_ckan(source, "", 230)
+
+        self.assertEqual(stats, {"fetched": 230, "written": 230, "errors": 0})
+        self.assertEqual(Dataset.objects.filter(source=source).count(), 230)
+        source.refresh_from_db()
+        self.assertEqual(source.dataset_count, 230)
+
+
+class ConcurrentFetchTests(TestCase):
+    def _pages(self, ckan, max_results, concurrency):
+        api_url = f"{ckan.base_url}/api/3/action/package_search"
+        with make_session(concurrency) as session:
+            return list(iter_ckan_pages(session, api_url, "", max_results, concurrency))
+
+    def test_pages_arrive_in_order_and_respect_cap(self):
+        with FakeCKAN(make_packages(1050)) as ckan:
+            pages = self._pages(ckan, max_results=730, concurrency=4)
+
+        self.assertEqual([len(page) for page in pages], [100] * 7 + [30])
+        ids = [item["id"] for page in pages for item in page]
+        self.assertEqual(ids, [f"pkg-{i:07d}" for i in range(730)])
+
+    def test_plans_requests_from_count(self):
+        with FakeCKAN(make_packages(250)) as ckan:
+            self._pages(ckan, max_results=10_000, concurrency=4)
+            requests = list(ckan.requests)
+
+        # Page 1 seule (count), puis une fenêtre de deux pages après la clé du 100e paquet
+        self.assertEqual(len(requests), 3)
+        self.assertNotIn("fq", requests[0])
+        self.assertEqual([ckan.after(r) for r in requests[1:]], ["pkg-0000099"] * 2)
+
+    def test_package_modified_mid_window_is_not_skipped(self):
+        class ShiftingCKAN(FakeCKAN):
+            def respond(self, params):
+                # Un paquet de la 1re page de la fenêtre passe en fin d'ordre
+                if params.get("start") == "99":
+                    self.packages[150]["metadata_modified"] = "2024-07-01T08:00:00.000000"
+                return super().respond(params)
+
+        with ShiftingCKAN(make_packages(250)) as ckan:
+            pages = self._pages(ckan, max_results=10_000, concurrency=4)
+
+        ids = {item["id"] for page in pages for item in page}
+        self.assertEqual(ids, {f"pkg-{i:07d}" for i in range(250)})
+
+    def test_requests_stay_in_flight_up_to_concurrency(self):
+        with FakeCKAN(make_packages(900)) as ckan:
+            self._pages(ckan, max_results=900, concurrency=1)
+        self.assertEqual(ckan.peak_in_flight, 1)
+
+        # Latence simulée : les requêtes d'une fenêtre se chevauchent côté serveur
+        with FakeCKAN(make_packages(900), latency=0.3) as ckan:
+            self._pages(ckan, max_results=900, concurrency=8)
+        self.assertEqual(ckan.peak_in_flight, 8)
+
+
+class IncrementalHarvestTests(TestCase):
+    def setUp(self):
+        self.packages = make_packages(250)
+        self.ckan = FakeCKAN(self.packages).start()
+        self.addCleanup(self.ckan.stop)
+        self.source = Source.objects.create(name="Fake", base_url=self.ckan.base_url)
+
+    def _checkpoint(self, query=""):
+        return HarvestCheckpoint.objects.get(source=self.source, query=query)
+
+    def test_watermark_is_the_start_of_the_last_complete_run(self):
+        harvest_standard_ckan(self.source, "", 1000)
+
+        run = HarvestRun.objects.get(source=self.source)
+        self.assertEqual(self._checkpoint().watermark, run.started_at)
+
+    def test_capped_run_does_not_advance_the_watermark(self):
+        harvest_standard_ckan(self.source, "", 200)
+        self.assertIsNone(self._checkpoint().watermark)
+
+    def test_second_run_only_fetches_modified_packages(self):
+        harvest_standard_ckan(self.source, "", 1000)
+        watermark = self._checkpoint().watermark
+        for item in self.packages[:3]:
+            item["metadata_modified"] = timezone.now().replace(tzinfo=None).isoformat()
+            item["notes"] = "Mise à jour"
+        self.ckan.requests.clear()
+
+        stats = harvest_standard_ckan(self.source, "", 1000)
+
+        self.assertEqual(stats["written"], 3)
+        self.assertEqual(self.ckan.requests[0]["fq"], f"metadata_modified:[{solr_date(watermark)} TO *]")
+        self.assertEqual(Dataset.objects.filter(description="Mise à jour").count(), 3)
+        self.assertGreater(self._checkpoint().watermark, watermark)
+
+    def test_package_modified_during_the_run_is_read(self):
+        packages = self.packages
+
+        class ShiftingCKAN(FakeCKAN):
+            def respond(self, params):
+                # Après la première page, un paquet déjà lu passe en fin d'ordre
+                if len(self.requests) == 2:
+                    packages[10]["metadata_modified"] = timezone.now().replace(tzinfo=None).isoformat()
+                return super().respond(params)
+
+        with ShiftingCKAN(packages) as ckan, override_settings(HARVEST_CONCURRENCY=1):
+            self.source.base_url = ckan.base_url
+            stats = harvest_standard_ckan(self.source, "", 1000)
+
+        # Par offset, le paquet 100 glisserait sur la page déjà lue et serait sauté
+        self.assertEqual(stats["fetched"], 250)
+        self.assertEqual(Dataset.objects.filter(source=self.source).count(), 250)
+
+    def test_watermark_is_kept_per_query(self):
+        harvest_standard_ckan(self.source, "climat", 1000)
+        self.ckan.requests.clear()
+
+        harvest_standard_ckan(self.source, "", 1000)
+
+        self.assertNotIn("fq", self.ckan.requests[0])
+        self.assertIsNotNone(self._checkpoint("climat").watermark)
+
+    def test_unchanged_packages_are_skipped_with_one_lookup(self):
+        harvest_standard_ckan(self.source, "", 1000)
+        ingestor = BulkIngestor(self.source)
+        records = [ckan_record(self.source, p) for p in self.packages[:100]]
+
+        # Empreintes des seules clés de la page, aucune écriture
+        with self.assertNumQueries(1):
+            written = ingestor.write_page(records)
+
+        self.assertEqual(written, 0)
+        self.assertEqual(ingestor.skipped, 100)
+
+
+    def test_hashes_are_read_per_page_from_the_database(self):
+        ingestor = BulkIngestor(self.source)
+        ingestor.write_page([ckan_record(self.source, p) for p in self.packages[:100]])
+        ingestor.write_page([ckan_record(self.source, p) for p in self.packages[:100]])
+
+        self.assertEqual((ingestor.created, ingestor.skipped), (100, 100))
+
+
+class ExternalIdKeyTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+
+    def test_same_title_different_packages_do_not_collide(self):
+        packages = make_packages(2)
+        packages[1]["title"] = packages[0]["title"]
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in packages])
+
+        self.assertEqual(Dataset.objects.filter(title=packages[0]["title"]).count(), 2)
+
+    def test_lookup_by_natural_key_is_an_index_hit(self):
+        BulkIngestor(self.source).write_page([ckan_record(self.source, p) for p in make_packages(500)])
+        lookup = Dataset.objects.filter(source=self.source, external_id="jeu-0000042")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(lookup.get().title, "Jeu de données 42")
+        # SQLite : « USING INDEX », PostgreSQL : « Index Scan »
+        self.assertRegex(lookup.explain(), r"USING INDEX|Index (Only )?Scan")
+
+
+class HarvestRunTests(TestCase):
+    def test_run_records_volumes_and_stage_timings(self):
+        packages = make_packages(150)
+        with FakeCKAN(packages) as ckan:
+            source = Source.objects.create(name="Fake", base_url=ckan.base_url)
+            harvest_standard_ckan(source, "", 1000)
+            packages[0]["notes"] = "Modifié"
+            harvest_standard_ckan(source, "", 1000, full=True)
+
+        first, second = HarvestRun.objects.order_by("started_at")
+        self.assertEqual(first.status, "success")
+        self.assertEqual((first.records_fetched, first.records_created), (150, 150))
+        self.assertEqual((second.records_updated, second.records_skipped), (1, 149))
+        self.assertGreater(first.http_seconds, 0)
+        self.assertGreater(first.db_seconds, 0)
+        self.assertIsNotNone(first.duration)
+
+    @override_settings(HARVEST_MAX_RETRIES=0)
+    def test_connection_error_is_counted(self):
+        source = Source.objects.create(name="Hors ligne", base_url="http://127.0.0.1:1")
+        stats = harvest_standard_ckan(source, "", 100)
+
+        run = HarvestRun.objects.get(source=source)
+        self.assertEqual(run.status, "failed")
+        self.assertEqual(run.error_count, 1)
+        self.assertEqual(stats["errors"], 1)
+
+
+@override_settings(HARVEST_RETRY_BACKOFF=0, HARVEST_CONCURRENCY=1)
+class CheckpointResumeTests(TestCase):
+    def setUp(self):
+        self.ckan = FakeCKAN(make_packages(500)).start()
+        self.addCleanup(self.ckan.stop)
+        self.source = Source.objects.create(name="Fake", base_url=self.ckan.base_url)
+
+    def _checkpoint(self):
+        return HarvestCheckpoint.objects.get(source=self.source, query="")
+
+    def test_transient_errors_are_retried(self):
+        self.ckan.failures["pkg-0000199"] = 2
+        stats = harvest_standard_ckan(self.source, "", 1000)
+
+        self.assertEqual(stats, {"fetched": 500, "written": 500, "errors": 0})
+        self.assertEqual(self._checkpoint().resume_id, "")
+
+    def test_resume_continues_after_last_committed_package(self):
+        self.ckan.failures["pkg-0000299"] = 100  # panne persistante après le 300e paquet
+        stats = harvest_standard_ckan(self.source, "", 1000)
+        self.assertEqual((stats["fetched"], stats["errors"]), (300, 1))
+        self.assertEqual(self._checkpoint().resume_id, "pkg-0000299")
+        self.assertIsNone(self._checkpoint().watermark)
+
+        self.ckan.failures.clear()
+        self.ckan.requests.clear()
+        stats = harvest_standard_ckan(self.source, "", 1000, resume=True)
+
+        self.assertEqual(stats["fetched"], 200)
+        self.assertEqual(self.ckan.after(self.ckan.requests[0]), "pkg-0000299")
+        self.assertEqual(Dataset.objects.filter(source=self.source).count(), 500)
+        self.assertEqual(self._checkpoint().resume_id, "")
+        self.assertIsNotNone(self._checkpoint().watermark)
+
+
+    def test_packages_moved_before_resume_are_neither_skipped_nor_reread(self):
+        self.ckan.failures["pkg-0000299"] = 100
+        harvest_standard_ckan(self.source, "", 1000)
+        self.ckan.failures.clear()
+        # Entre la panne et la reprise : un paquet validé et un paquet à venir sont modifiés
+        now = timezone.now().replace(tzinfo=None).isoformat()
+        for i in (100, 400):
+            self.ckan.packages[i]["metadata_modified"] = now
+
+        stats = harvest_standard_ckan(self.source, "", 1000, resume=True)
+
+        # Par offset (start=300), le paquet 300 aurait glissé sous la reprise
+        self.assertEqual(stats["fetched"], 201)
+        self.assertEqual(Dataset.objects.filter(source=self.source).count(), 500)
+
+
+class DataverseHarvestTests(TestCase):
+    def test_all_pages_are_walked_and_written(self):
+        with FakeDataverse(make_dataverse_items(250)) as dataverse:
+            source = Source.objects.create(name="Boréalis", base_url=dataverse.base_url)
+            stats = harvest_dataverse(source)
+            starts = [r["start"] for r in dataverse.requests]
+
+        self.assertEqual(starts, ["0", "100", "200"])
+        self.assertEqual(stats, {"fetched": 250, "written": 250, "errors": 0})
+        dataset = Dataset.objects.get(source=source, external_id="doi:10.5683/SP3/FAKE000042")
+        self.assertEqual(dataset.publication_date.isoformat(), "2023-03-04")
+        self.assertEqual(list(dataset.themes.values_list("name", flat=True)), ["Écophysiologie marine"])
+
+    def test_max_results_caps_the_stream(self):
+        with FakeDataverse(make_dataverse_items(250)) as dataverse:
+            source = Source.objects.create(name="Boréalis", base_url=dataverse.base_url)
+            stats = harvest_dataverse(source, max_results=120)
+
+        self.assertEqual(stats["fetched"], 120)
+        self.assertEqual(Dataset.objects.filter(source=source).count(), 120)
+
+
+class CanWinParsingTests(SimpleTestCase):
+    def test_cards_are_extracted_from_static_html(self):
+        page = make_canwin_pages(45, per_page=20)[1]
+        cards = extract_cards(page, "https://canwin.test")
+
+        self.assertEqual(len(cards), 20)
+        self.assertEqual(cards[0], {
+            "slug": "canwin-00020",
+            "title": "Jeu CanWin 20",
+            "url": "https://canwin.test/data/dataset/canwin-00020",
+            "description": "Description CanWin 20.",
+        })
+
+    def test_page_urls_are_discovered_from_pagination(self):
+        first = make_canwin_pages(45, per_page=20)[0]
+        urls = discover_page_urls(first, "https://canwin.test/data/dataset?q=eau")
+
+        self.assertEqual(urls, [
+            "https://canwin.test/data/dataset?q=eau&page=2",
+            "https://canwin.test/data/dataset?q=eau&page=3",
+        ])
+
+
+class CanWinPartialRenderTests(TestCase):
+    def test_render_all_keeps_pages_that_rendered(self):
+        async def render(url):
+            if url.endswith("page=3"):
+                raise asyncio.TimeoutError("délai de rendu dépassé")
+            return f"<html>{url}</html>"
+
+        urls = [f"https://canwin.test/data/dataset?page={n}" for n in (2, 3, 4)]
+        with mock.patch.object(BrowserPool, "render", side_effect=render):
+            pages, failures = asyncio.run(BrowserPool().render_all(urls))
+
+        self.assertEqual(pages, [f"<html>{urls[0]}</html>", f"<html>{urls[2]}</html>"])
+        self.assertEqual([url for url, _ in failures], [urls[1]])
+        self.assertIsInstance(failures[0][1], asyncio.TimeoutError)
+
+    def test_failed_pages_are_recorded_and_the_others_written(self):
+        html = make_canwin_pages(60, per_page=20)
+        timeout = asyncio.TimeoutError("délai de rendu dépassé")
+
+        async def render_listing(*args):
+            return [html[0], html[2]], [("https://canwin.test/data/dataset?page=2", timeout)]
+
+        source = Source.objects.create(name="CanWin", base_url="https://canwin.test")
+        with mock.patch("harvest.ckan_harvester.render_listing", render_listing):
+            stats = harvest_canwin_js(source, max_results=60, list_url="https://canwin.test/data/dataset")
+
+        run = HarvestRun.objects.get(source=source)
+        self.assertEqual(stats["written"], 40)
+        self.assertEqual(run.status, "partial")
+        self.assertEqual(run.error_count, 1)
+        self.assertIn("page=2", run.last_error)
+
+
+def chromium_available():
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+        return True
+    except Exception:
+        return False
+
+
+class CanWinBrowserTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not chromium_available():
+            raise unittest.SkipTest("Chromium (Playwright) indisponible")
+        super().setUpClass()
+
+    def test_pages_are_rendered_in_parallel_from_a_local_site(self):
+        with FakeCanWin(make_canwin_pages(95, per_page=20)) as site:
+            source = Source.objects.create(name="CanWin", base_url=site.base_url)
+            stats = harvest_canwin_js(source, max_results=70, list_url=f"{site.base_url}/data/dataset")
+            pages = sorted(r.get("page", "1") for r in site.requests)
+
+        self.assertEqual(pages, ["1", "2", "3", "4"])
+        self.assertEqual(stats["written"], 70)
+
+
+def fake_source_harvest(source_id, query, max_results, markers):
+    """
+    Cible de test : la source 2 échoue, la source 3 ne termine jamais.
+    Chaque enfant note son début puis sa fin dans le dossier `markers`.
+    """
+    marker = Path(markers) / str(source_id)
+    marker.write_text("start\n")
+    if source_id == 2:
+        raise RuntimeError("CKAN indisponible")
+    if source_id == 3:
+        time.sleep(60)
+    time.sleep(0.3)
+    # Fin : sources déjà démarrées (toutes si les enfants tournent en parallèle)
+    started = sorted(p.name for p in Path(markers).iterdir())
+    with marker.open("a") as f:
+        f.write(f"end {' '.join(started)}\n")
+    return {"fetched": max_results, "written": source_id}
+
+
+class HarvestAllTests(TestCase):
+    def test_sources_run_in_parallel_and_fail_in_isolation(self):
+        sources = [Source.objects.create(id=i, name=f"Source {i}", base_url="https://x") for i in (1, 2, 3, 4)]
+        # Exécution ouverte par l'enfant de la source 3 avant d'être tué
+        killed = HarvestRun.objects.create(source=sources[2])
+
+        markers = self.enterContext(tempfile.TemporaryDirectory())
+        results = harvest_all(sources, max_results=50, timeout=1.0, target=fake_source_harvest,
+                              options={"markers": markers})
+
+        self.assertEqual([r["status"] for r in results], ["ok", "error", "timeout", "ok"])
+        self.assertEqual((results[0]["fetched"], results[0]["written"]), (50, 1))
+        self.assertIn("CKAN indisponible", results[1]["error"])
+        self.assertEqual(results[3]["written"], 4)
+        killed.refresh_from_db()
+        self.assertEqual(killed.status, "failed")
+        self.assertIsNotNone(killed.finished_at)
+        self.assertIn("délai", killed.last_error)
+        # Les enfants se chevauchent : à la fin des sources 1 et 4, toutes avaient démarré
+        for source_id in (1, 4):
+            self.assertEqual(
+                (Path(markers) / str(source_id)).read_text().splitlines(),
+                ["start", "end 1 2 3 4"],
+            )
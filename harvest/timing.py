@@ -0,0 +1,38 @@
+# harvest/timing.py
+
+from contextlib import contextmanager
+
+from django.utils import timezone
+from harvest.models import HarvestRun
+
+
+# ==============================================================
+# ⏱️ Instrumentation d'un moissonnage
+# ==============================================================
+@contextmanager
+def harvest_run(source, query=""):
+    """
+    Crée un HarvestRun, le fournit au bloc puis le clôt.
+
+        with harvest_run(source, query) as run:
+            with run.timed("http"):
+                ...
+            run.records_fetched += n
+
+    Une exception non gérée marque l'exécution « failed » puis est relancée.
+    """
+    run = HarvestRun.objects.create(source=source, query=query or "")
+    try:
+        yield run
+    except BaseException as e:
+        run.record_error(f"{type(e).__name__}: {e}")
+        run.status = "failed"
+        raise
+    else:
+        if not run.error_count:
+            run.status = "success"
+        else:
+            run.status = "partial" if run.records_fetched else "failed"
+    finally:
+        run.finished_at = timezone.now()
+        run.save()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ogsl_core.settings')
+# Servi en ASGI : les vues de lecture asynchrones remplacent leurs versions synchrones
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,79 @@
+# ogsl_core/middleware.py
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from ogsl_core import profiling
+
+
+# ==============================================================
+# 🧱 Fichiers statiques sans changement de fil sous ASGI
+# ==============================================================
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise utilisable par les deux piles. WhiteNoise n'est que synchrone :
+    sous ASGI, Django exécuterait alors toute la chaîne (vues asynchrones
+    comprises) dans un fil dédié par requête. Ici, la recherche du fichier
+    (dictionnaire en mémoire hors DEBUG) reste synchrone et le reste est attendu.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+# ==============================================================
+# ⏱️ Instrumentation par route (PROFILING_ENABLED)
+# ==============================================================
+class ProfilingMiddleware:
+    """
+    Mesure, pour chaque requête, le nombre de requêtes SQL, leur durée, la
+    durée totale et la taille de la réponse (ogsl_core.profiling), et peut les
+    annoncer dans l'en-tête Server-Timing. Désactivé, Django le retire de la
+    chaîne au démarrage : aucun coût par requête.
+
+    Volontairement synchrone : sous ASGI, Django exécute alors la suite de la
+    chaîne depuis ce fil, où passent aussi les requêtes ORM des vues asynchrones
+    (sync_to_async), si bien que les connexions instrumentées sont les bonnes.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with profiling.instrument() as timer:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        route = f"{request.method} /{match.route}" if match else f"{request.method} (non résolu)"
+        # Réponse en flux : taille inconnue sans la consommer
+        size = None if response.streaming else len(response.content)
+        profiling.record(route, timer.count, timer.duration, total_ms, size)
+
+        if settings.PROFILING_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'db;desc="{timer.count} SQL";dur={timer.duration:.1f}, total;dur={total_ms:.1f}'
+            )
+        return response
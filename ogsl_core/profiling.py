@@ -0,0 +1,90 @@
+# ogsl_core/profiling.py
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+METRICS = ("queries", "db_ms", "total_ms", "bytes")
+PERCENTILES = (50, 95, 99)
+
+_samples = {}
+_lock = threading.Lock()
+
+
+# ==============================================================
+# ⏱️ Mesure des requêtes SQL (connection.execute_wrapper)
+# ==============================================================
+class QueryTimer:
+    """Compte les requêtes SQL exécutées et cumule leur durée (ms)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def instrument():
+    """QueryTimer branché sur toutes les connexions du fil courant le temps du bloc."""
+    timer = QueryTimer()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield timer
+
+
+# ==============================================================
+# 🔁 Tampon circulaire par route
+# ==============================================================
+def record(route, queries, db_ms, total_ms, size):
+    """Ajoute une mesure ; seules les PROFILING_SAMPLES dernières de la route sont gardées."""
+    with _lock:
+        buffer = _samples.get(route)
+        if buffer is None:
+            buffer = _samples[route] = deque(maxlen=settings.PROFILING_SAMPLES)
+        buffer.append((queries, db_ms, total_ms, size))
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def percentile(sorted_values, p):
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def _summary(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    summary = {f"p{p}": round(percentile(values, p), 2) for p in PERCENTILES}
+    summary["max"] = round(values[-1], 2)
+    return summary
+
+
+def report():
+    """Percentiles de chaque métrique par route, les plus lentes (p95) en premier."""
+    with _lock:
+        snapshot = {route: list(buffer) for route, buffer in _samples.items()}
+    routes = []
+    for route, samples in snapshot.items():
+        columns = zip(*samples)
+        entry = {"route": route, "samples": len(samples)}
+        entry.update({metric: _summary(values) for metric, values in zip(METRICS, columns)})
+        routes.append(entry)
+    routes.sort(key=lambda r: r["total_ms"]["p95"], reverse=True)
+    return {"enabled": settings.PROFILING_ENABLED, "routes": routes}
+
@@ -37,18 +37,24 @@ INSTALLED_APPS = [
     "rest_framework",
     "drf_yasg",
     "django_filters",
+    "graphene_django",
 
     # Applications internes essentielles
     "harvest",
     "catalog",
+
+    # Portail et tableau de bord
+    "portal",
+    "dashboard",
 ]
 
 # =====================================================
 # ⚙️ Middleware
 # =====================================================
 MIDDLEWARE = [
+    "ogsl_core.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "ogsl_core.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,6 +63,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Instrumentation par route (requêtes SQL, durées, taille) : /api/profiling/
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+# Mesures gardées par route (tampon circulaire, par processus)
+PROFILING_SAMPLES = int(os.getenv("PROFILING_SAMPLES", "1000"))
+# En-tête Server-Timing (visible dans les outils de développement du navigateur)
+PROFILING_SERVER_TIMING = os.getenv("PROFILING_SERVER_TIMING", "False") == "True"
+
 # =====================================================
 # 🔗 URLs & WSGI
 # =====================================================
@@ -79,6 +92,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "ogsl_core.wsgi.application"
+ASGI_APPLICATION = "ogsl_core.asgi.application"
+
+# Vues de lecture asynchrones (tableau de bord, recherche) : activées par ogsl_core.asgi
+# (servi seulement avec SERVE_ASGI=True, voir gunicorn.conf.py)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
 
 # =====================================================
 # 🗄️ Base de données
@@ -92,11 +110,33 @@ DATABASES = {
 }
 
 # ✅ Si Render fournit DATABASE_URL (PostgreSQL), on l’utilise
+# Connexions persistantes en WSGI (défaut) seulement : sous ASGI (SERVE_ASGI,
+# optionnel) chaque requête peut s'exécuter dans un fil différent et les
+# connexions ouvertes s'accumuleraient ; une connexion par requête, prévoir
+# un regroupeur (PgBouncer) avant de l'activer en production
 if os.getenv("DATABASE_URL"):
     DATABASES["default"] = dj_database_url.config(
-        conn_max_age=600, ssl_require=True
+        conn_max_age=0 if ASYNC_VIEWS else 600, ssl_require=True
     )
 
+# =====================================================
+# 🧊 Cache
+# =====================================================
+# CACHE_URL : locmem:// (défaut, local au processus — aussi utilisé par les tests),
+# file:///chemin/dossier, redis://hôte:6379/0 (paquet redis requis) ou dummy://
+CACHE_URL = os.getenv("CACHE_URL", "locmem://")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    _cache_backend = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+elif CACHE_URL.startswith("file://"):
+    _cache_backend = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": CACHE_URL[len("file://"):]}
+elif CACHE_URL.startswith("dummy://"):
+    _cache_backend = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+else:
+    _cache_backend = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ogsl"}
+CACHES = {"default": {**_cache_backend, "KEY_PREFIX": "ogsl"}}
+# Durée de vie des vues et agrégats du catalogue (invalidés par étiquettes à chaque moissonnage)
+CATALOG_CACHE_SECONDS = int(os.getenv("CATALOG_CACHE_SECONDS", "3600"))
+
 # =====================================================
 # 🔑 Authentification & mots de passe
 # =====================================================
@@ -130,7 +170,33 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
 }
 
+# =====================================================
+# 📄 Pagination des jeux de données (API et portail)
+# =====================================================
+DATASET_PAGE_SIZE = int(os.getenv("DATASET_PAGE_SIZE", "50"))
+DATASET_MAX_PAGE_SIZE = int(os.getenv("DATASET_MAX_PAGE_SIZE", "500"))
+
+# =====================================================
+# 🔎 GraphQL
+# =====================================================
+GRAPHENE = {"SCHEMA": "catalog.schema.schema"}
+# Taille maximale d'une page (first/last) et limites de coût par requête
+GRAPHQL_MAX_PAGE_SIZE = int(os.getenv("GRAPHQL_MAX_PAGE_SIZE", "1000"))
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "8"))
+GRAPHQL_MAX_COMPLEXITY = int(os.getenv("GRAPHQL_MAX_COMPLEXITY", "20000"))
+
 # =====================================================
 # ✅ Divers
 # =====================================================
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# =====================================================
+# 🌾 Moissonnage
+# =====================================================
+# Nombre de pages CKAN téléchargées en parallèle
+HARVEST_CONCURRENCY = int(os.getenv("HARVEST_CONCURRENCY", "4"))
+# Délai maximal (secondes) accordé à chaque source par `harvest_all`
+HARVEST_SOURCE_TIMEOUT = int(os.getenv("HARVEST_SOURCE_TIMEOUT", "3600"))
+# Nouvelles tentatives sur erreurs HTTP transitoires, délai exponentiel (secondes)
+HARVEST_MAX_RETRIES = int(os.getenv("HARVEST_MAX_RETRIES", "5"))
+HARVEST_RETRY_BACKOFF = float(os.getenv("HARVEST_RETRY_BACKOFF", "1.0"))
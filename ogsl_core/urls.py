@@ -4,6 +4,10 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 from django.http import HttpResponseRedirect
+from django.views.decorators.csrf import csrf_exempt
+from graphene_django.views import GraphQLView
+
+from catalog.schema import schema, validation_rules
 
 # --- Configuration Swagger ---
 schema_view = get_schema_view(
@@ -24,6 +28,17 @@ urlpatterns = [
     # 📦 API REST principale (tes endpoints DRF)
     path("api/", include("catalog.urls")),
 
+    # 🖥️ Portail et tableau de bord
+    path("portal/", include("portal.urls")),
+    path("dashboard/", include("dashboard.urls")),
+
+    # 🔎 API GraphQL (GraphiQL dans le navigateur)
+    path(
+        "graphql/",
+        csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema, validation_rules=validation_rules())),
+        name="graphql",
+    ),
+
     # 📚 Documentation Swagger & Redoc
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
@@ -1,3 +1,74 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Dataset, Source
+from portal import views
+
+
+# Le portail n'est pas dans INSTALLED_APPS : on vérifie le contexte sans rendre les gabarits
+@mock.patch("portal.views.render")
+class HomeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        for i in range(12):
+            Dataset.objects.create(title=f"Jeu {i}", description="", url="https://x", source=source)
+
+    def test_home_is_read_only(self, render):
+        with CaptureQueriesContext(connection) as ctx:
+            views.home(self.factory.get("/"))
+
+        self.assertFalse([q for q in ctx if not q["sql"].lstrip().upper().startswith("SELECT")])
+        self.assertFalse(Dataset.objects.exclude(latitude=None).exists())
+
+    def test_stats_come_from_the_cached_aggregate(self, render):
+        views.home(self.factory.get("/"))
+        # Cache chaud : points de la carte et page de jeux, aucun COUNT
+        with CaptureQueriesContext(connection) as ctx:
+            views.home(self.factory.get("/"))
+        self.assertFalse([q for q in ctx if "COUNT(" in q["sql"].upper()])
+
+        context = render.call_args.args[2]
+        self.assertEqual(context["stats"]["datasets_count"], 12)
+        self.assertEqual(len(context["page"].items), 9)
+
+    def test_listing_pages_by_cursor(self, render):
+        views.home(self.factory.get("/"))
+        cursor = render.call_args.args[2]["page"].next_cursor
+
+        views.home(self.factory.get("/", {"cursor": cursor}))
+        page = render.call_args.args[2]["page"]
+        self.assertEqual((len(page.items), page.has_next, page.has_previous), (3, False, True))
+
+        views.home(self.factory.get("/", {"cursor": "invalide"}))
+        self.assertFalse(render.call_args.args[2]["page"].has_previous)
+
+
+@mock.patch("portal.views.render")
+class SearchViewTests(TestCase):
+    def setUp(self):
+        source = Source.objects.create(name="OpenGouv", base_url="https://ouvert.canada.ca")
+        for i in range(15):
+            Dataset.objects.create(title=f"Qualité de l'eau {i}", description="", url="https://x", source=source)
+        Dataset.objects.create(title="Glaces", description="", url="https://x", source=source)
+        self.factory = RequestFactory()
+
+    def _context(self, render):
+        context = render.call_args.args[2]
+        return context["page_obj"].paginator.count, list(context["page_obj"]), context["facets"]
+
+    async def test_async_search_matches_sync_search(self, render):
+        request = self.factory.get("/", {"q": "eau", "page": "2"})
+        await sync_to_async(views.search)(request)
+        expected = self._context(render)
+
+        await views.asearch(request)
+        self.assertEqual(self._context(render), expected)
+        count, datasets, _ = expected
+        self.assertEqual((count, len(datasets)), (15, 3))
@@ -1,4 +1,5 @@
 # portal/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -6,7 +7,7 @@ app_name = "portal"
 
 urlpatterns = [
     path("", views.home, name="home"),
-    path("search/", views.search, name="search"),
+    # Serveur ASGI (settings.ASYNC_VIEWS) : recherche asynchrone
+    path("search/", views.asearch if settings.ASYNC_VIEWS else views.search, name="search"),
     path("about/", views.about, name="about"),
 ]
-
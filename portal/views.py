@@ -1,16 +1,29 @@
 # portal/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from catalog.models import Dataset, Source, Theme, Organization
+from catalog.aggregates import catalog_stats
+from catalog.cache import DATASETS_TAG, cached_queryset
+from catalog.models import Dataset
+from catalog.facets import facet_counts
+from catalog.filters import DatasetFilter
+from catalog.pagination import InvalidCursor, keyset_page
+from catalog.search import search as search_datasets
 from django.core.paginator import Paginator
-from random import uniform
+
+# Titres des facettes de la recherche
+FACET_LABELS = {
+    "source": "Sources",
+    "organization": "Organisations",
+    "theme": "Thèmes",
+    "year": "Année de publication",
+}
+
 
 def home(request):
-    stats = {
-        "sources_count": Source.objects.count(),
-        "datasets_count": Dataset.objects.count(),
-        "organizations_count": Organization.objects.count(),
-        "themes_count": Theme.objects.count(),
-    }
+    """Page d'accueil : lecture seule (coordonnées : commande enrich_coordinates)"""
+    stats = catalog_stats()
 
     sources_cards = [
         {"name": "OpenGouv", "url": "https://ouvert.canada.ca", "color": "primary"},
@@ -19,42 +32,88 @@ def home(request):
         {"name": "Boréalis", "url": "https://borealisdata.ca", "color": "purple"},
     ]
 
-    # 🗺️ Simulation de coordonnées aléatoires (si manquantes)
-    for dataset in Dataset.objects.filter(latitude__isnull=True)[:100]:
-        dataset.latitude = uniform(45.0, 49.5)    # entre Montréal et Québec
-        dataset.longitude = uniform(-79.5, -65.0)
-        dataset.save()
-
-    # 📍 Points pour l’aperçu cartographique
-    points = (
+    # 📍 Points pour l’aperçu cartographique (en cache jusqu'au prochain moissonnage)
+    points = cached_queryset(
+        "portal:points",
         Dataset.objects.exclude(latitude__isnull=True)
         .exclude(longitude__isnull=True)
-        .values("title", "description", "latitude", "longitude")[:50]
+        .values("title", "description", "latitude", "longitude")[:50],
+        tags=(DATASETS_TAG,),
     )
 
-    # 📦 Tous les jeux de données (pagination)
-    all_datasets = Dataset.objects.order_by("-publication_date")
-    paginator = Paginator(all_datasets, 9)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # 📦 Tous les jeux de données (pagination par clé : coût constant en profondeur)
+    try:
+        page = keyset_page(Dataset.objects.select_related("source"), request.GET.get("cursor"), 9)
+    except InvalidCursor:
+        page = keyset_page(Dataset.objects.select_related("source"), None, 9)
 
     return render(request, "portal/home.html", {
         "stats": stats,
         "sources_cards": sources_cards,
-        "page_obj": page_obj,
-        "points": list(points),
+        "page": page,
+        "points": points,
     })
 
 
+def _search_results(request):
+    # Facettes choisies (source, organisation, thème, année) : mêmes filtres que l'API
+    filtered = DatasetFilter(request.GET, queryset=Dataset.objects.all()).qs
+    return search_datasets(request.GET.get("q", ""), filtered)
+
+
 def search(request):
-    """Recherche simple de datasets"""
-    query = request.GET.get("q", "")
-    results = []
+    """Recherche plein texte des datasets, classée par pertinence (catalog.search)"""
+    results = _search_results(request)
+
+    paginator = Paginator(results, 12)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    return render(request, "portal/search.html", {
+        "query": request.GET.get("q", ""),
+        "page_obj": page_obj,
+        "facets": _facet_groups(request.GET, facet_counts(results.matches())),
+    })
+
+
+async def asearch(request):
+    """
+    Version asynchrone de search (serveur ASGI) : total et facettes sont lancés
+    ensemble, puis la page (SQL brut de l'index plein texte, via sync_to_async).
+    """
+    results = await sync_to_async(_search_results)(request)
+    _, facets = await asyncio.gather(
+        sync_to_async(results.count)(),
+        sync_to_async(facet_counts)(results.matches()),
+    )
+
+    # Total déjà connu : seule la page est lue
+    paginator = Paginator(results, 12)
+    page_obj = await sync_to_async(paginator.get_page)(request.GET.get("page"))
+
+    return render(request, "portal/search.html", {
+        "query": request.GET.get("q", ""),
+        "page_obj": page_obj,
+        "facets": _facet_groups(request.GET, facets),
+    })
+
 
-    if query:
-        results = Dataset.objects.filter(title__icontains=query)[:50]
+def _facet_groups(params, facets):
+    """Facettes à afficher, chaque valeur avec le lien qui l'applique (ou la retire si active)"""
+    groups = []
+    for name, values in facets.items():
+        for entry in values:
+            link = params.copy()
+            link.pop("page", None)
+            entry["active"] = link.get(name) == str(entry["value"])
+            if entry["active"]:
+                link.pop(name)
+            else:
+                link[name] = entry["value"]
+            entry["url"] = "?" + link.urlencode()
+        if values:
+            groups.append({"name": name, "label": FACET_LABELS[name], "values": values})
+    return groups
 
-    return render(request, "portal/search.html", {"query": query, "results": results})
 
 def about(request):
     """Page à propos de l'OGSL"""
@@ -5,5 +5,6 @@ set -o errexit
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
 
-# Démarrer l’application Django
-gunicorn ogsl_core.wsgi:application
+# Démarrer l’application Django : WSGI par défaut, ASGI avec SERVE_ASGI=True
+# (application et workers choisis dans gunicorn.conf.py)
+exec gunicorn